@@ -0,0 +1,85 @@
+# Compares the central asyncio.Queue with per-sender work-stealing deques.
+# To run the benchmark, use the command: python3 -m benchmarks.bench_dispatch
+
+import asyncio
+import logging
+import sys
+import time
+from models.producer_model import ProducerModel
+from models.sender_model import SenderModel
+from models.work_stealing_model import WorkStealingDispatcher
+from models.virtual_clock_model import run_virtual
+from config import config
+
+logging.disable(logging.CRITICAL)
+
+SENDER_COUNTS = (50, 500, 5000)
+TOTAL_MESSAGES = 200000
+SCENARIOS = {
+    'backlog': 1000, #producer runs far ahead, queue is rarely empty
+    'trickle': 10,   #producer yields every 10 messages, idle senders wait for work
+}
+
+class CountingQueue(asyncio.Queue):
+    """asyncio.Queue that counts how often a waiting getter is woken."""
+
+    def __init__(self):
+        super().__init__()
+        self.wakeups = 0
+
+    def _wakeup_next(self, waiters):
+        if waiters is self._getters and waiters:
+            self.wakeups += 1
+        super()._wakeup_next(waiters)
+
+async def run_pipeline(queue, num_senders: int, batch_size: int) -> dict:
+    """
+    Runs the producer and num_senders senders over the given queue and counts the outcome
+    """
+    stats = {'sent': 0, 'failed': 0, 'total_time': 0.0}
+    producer = ProducerModel(queue, batch_size = batch_size, vectorized = True)
+    producer_task = asyncio.create_task(producer.produce_messages())
+    senders = []
+    for i in range(num_senders):
+        sender_queue = queue.queue_for(i) if isinstance(queue, WorkStealingDispatcher) else queue
+        senders.append(asyncio.create_task(SenderModel(i, sender_queue, stats, 0.0, 0.01).run()))
+    await producer_task
+    await queue.join()
+    await asyncio.gather(*senders)
+    return stats
+
+def bench(mode: str, num_senders: int, scenario: str) -> dict:
+    """
+    Times one fast-forward run and returns its throughput and wakeup figures
+    """
+    config.total_messages = TOTAL_MESSAGES
+    config.num_senders = num_senders
+    queue = WorkStealingDispatcher(num_senders) if mode == "work_stealing" else CountingQueue()
+
+    start = time.perf_counter()
+    stats = run_virtual(run_pipeline(queue, num_senders, SCENARIOS[scenario]))
+    elapsed = time.perf_counter() - start
+    assert stats['sent'] == TOTAL_MESSAGES
+
+    return {
+        'scenario': scenario,
+        'mode': mode,
+        'senders': num_senders,
+        'msgs_per_sec': TOTAL_MESSAGES / elapsed,
+        'wakeups': queue.wakeups,
+        'wakeups_per_sec': queue.wakeups / elapsed,
+        'steals': getattr(queue, 'steals', 0),
+    }
+
+def main():
+    sender_counts = [int(arg) for arg in sys.argv[1:]] or SENDER_COUNTS
+    print(f"{'scenario':<10}{'mode':<14}{'senders':>8}{'msgs/sec':>12}{'wakeups':>10}{'wakeups/sec':>13}{'steals':>8}")
+    for scenario in SCENARIOS:
+        for num_senders in sender_counts:
+            for mode in ("central", "work_stealing"):
+                result = bench(mode, num_senders, scenario)
+                print(f"{result['scenario']:<10}{result['mode']:<14}{result['senders']:>8}{result['msgs_per_sec']:>12.0f}"
+                      f"{result['wakeups']:>10}{result['wakeups_per_sec']:>13.0f}{result['steals']:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Compares sending over real sockets to the gateway stub with a new connection per message, pooled keep-alive
+# connections, and pooled connections with pipelining.
+# To run the benchmark, use the command: python3 -m benchmarks.bench_gateway
+
+import asyncio
+import logging
+import multiprocessing
+import sys
+import time
+from models.producer_model import ProducerModel
+from models.sender_model import SenderModel
+from models.gateway_model import GatewayServer, GatewayPool
+from models.latency_histogram_model import LatencyHistogram
+from config import config
+
+logging.disable(logging.CRITICAL)
+
+SENDER_COUNTS = (50, 200)
+TOTAL_MESSAGES = 20000
+MEAN_TIME = 0.005 #gateway response time
+CONNECT_TIME = 0.005 #gateway handshake on a new connection
+FAILURE_RATE = 0.1
+MODES = {
+    'no_pool': (0, 1),       #(pool size, pipeline depth), a new connection per message
+    'keep_alive': (32, 1),   #one request at a time per pooled connection
+    'pipelined': (32, 8),    #several requests in flight per pooled connection
+}
+
+def serve(ports, stop):
+    """
+    Gateway process entry point: runs the stub on a free port, reports it and serves until stop is set
+    """
+    async def serve_main():
+        gateway = GatewayServer(MEAN_TIME, FAILURE_RATE, CONNECT_TIME)
+        ports.put(await gateway.start())
+        while not stop.is_set():
+            await asyncio.sleep(0.05)
+        await gateway.stop()
+    asyncio.run(serve_main())
+
+async def run_pipeline(port: int, num_senders: int, pool_size: int, pipeline_depth: int) -> tuple:
+    """
+    Runs the producer and num_senders senders over the gateway and counts the outcome
+    """
+    stats = {'sent': 0, 'failed': 0, 'total_time': 0.0, 'latency': LatencyHistogram()}
+    queue = asyncio.Queue()
+    pool = GatewayPool("127.0.0.1", port, pool_size, pipeline_depth)
+    producer = ProducerModel(queue, vectorized = True)
+    producer_task = asyncio.create_task(producer.produce_messages())
+    senders = [asyncio.create_task(SenderModel(i, queue, stats, transport = pool).run()) for i in range(num_senders)]
+    await producer_task
+    await queue.join()
+    await asyncio.gather(*senders)
+    await pool.close()
+    return stats, pool.opened
+
+def bench(mode: str, num_senders: int) -> dict:
+    """
+    Times one real-time run against a fresh gateway process and returns its throughput and latency figures
+    """
+    config.total_messages = TOTAL_MESSAGES
+    config.num_senders = num_senders
+    ports, stop = multiprocessing.Queue(), multiprocessing.Event()
+    gateway = multiprocessing.Process(target = serve, args = (ports, stop), daemon = True)
+    gateway.start()
+    try:
+        port = ports.get(timeout = 10)
+        start = time.perf_counter()
+        stats, opened = asyncio.run(run_pipeline(port, num_senders, *MODES[mode]))
+        elapsed = time.perf_counter() - start
+    finally:
+        stop.set()
+        gateway.join()
+    assert stats['sent'] + stats['failed'] == TOTAL_MESSAGES
+
+    return {
+        'mode': mode,
+        'senders': num_senders,
+        'msgs_per_sec': TOTAL_MESSAGES / elapsed,
+        'connections': opened,
+        'p50': stats['latency'].percentile(50),
+        'p99': stats['latency'].percentile(99),
+    }
+
+def main():
+    sender_counts = [int(arg) for arg in sys.argv[1:]] or SENDER_COUNTS
+    print(f"{'mode':<12}{'senders':>8}{'msgs/sec':>12}{'connections':>13}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    for num_senders in sender_counts:
+        for mode in MODES:
+            result = bench(mode, num_senders)
+            print(f"{result['mode']:<12}{result['senders']:>8}{result['msgs_per_sec']:>12.0f}{result['connections']:>13}"
+                  f"{result['p50'] * 1000:>10.1f}{result['p99'] * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
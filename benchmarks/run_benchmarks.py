@@ -0,0 +1,249 @@
+# Benchmark suite for the producer, sender and end-to-end hot loops.
+# To run the suite, use the command: python3 -m benchmarks.run_benchmarks
+# Results are written as JSON and compared against benchmarks/baseline.json; the exit status is 1 on a regression.
+# Refresh the baseline on a reference machine with: python3 -m benchmarks.run_benchmarks --runs 5 --update-baseline
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from models.producer_model import ProducerModel
+from models.sender_model import SenderModel
+from models.simulation_model import new_stats, run_simulation
+from models.virtual_clock_model import run_virtual
+from models.logging_model import configure_logging
+from config import config
+
+logging.disable(logging.CRITICAL)
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_TOLERANCE = 0.25 #allowed relative slowdown (or memory growth) before a result counts as a regression
+REPEATS = 5 #micro-benchmarks keep the best of this many runs
+
+GENERATE_MESSAGES = 20000
+PRODUCE_MESSAGES = 200000
+DRAIN_MESSAGES = 50000
+END_TO_END_SIZES = ((1000, 50), (10000, 500), (100000, 5000)) #(total_messages, num_senders)
+
+def best_rate(count: int, run) -> float:
+    """
+    Returns:
+        float: highest count/second over REPEATS calls of run
+    """
+    best = 0.0
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        run()
+        best = max(best, count / (time.perf_counter() - start))
+    return best
+
+def peak_rss_mb() -> float:
+    """
+    Returns:
+        float: peak resident memory of this process in MB. VmHWM is preferred because ru_maxrss
+        carries over the parent's peak across fork and exec.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 1024 #bytes on macOS, kilobytes elsewhere
+
+def bench_generate_message() -> dict:
+    """ProducerModel.generate_message, one Message at a time."""
+    producer = ProducerModel(asyncio.Queue())
+
+    def run():
+        for _ in range(GENERATE_MESSAGES):
+            producer.generate_message()
+    return {'msgs_per_sec': best_rate(GENERATE_MESSAGES, run)}
+
+def bench_generate_batch() -> dict:
+    """ProducerModel.generate_message_batch, vectorized columnar batches."""
+    producer = ProducerModel(asyncio.Queue())
+    return {'msgs_per_sec': best_rate(PRODUCE_MESSAGES, lambda: producer.generate_message_batch(PRODUCE_MESSAGES))}
+
+def bench_produce_messages() -> dict:
+    """ProducerModel.produce_messages into an unbounded queue, without consumers."""
+    config.total_messages = PRODUCE_MESSAGES
+
+    async def produce():
+        await ProducerModel(asyncio.Queue(), vectorized = True).produce_messages(add_sentinels = False)
+    return {'msgs_per_sec': best_rate(PRODUCE_MESSAGES, lambda: run_virtual(produce()))}
+
+def bench_sender_drain() -> dict:
+    """One SenderModel draining a prefilled queue with zero delay and no failures."""
+    producer = ProducerModel(asyncio.Queue())
+    messages = producer.generate_batch(DRAIN_MESSAGES)
+
+    async def drain():
+        queue = asyncio.Queue()
+        for message in messages:
+            queue.put_nowait(message)
+        queue.put_nowait(None)
+        stats = new_stats()
+        await SenderModel(0, queue, stats, failure_rate = 0.0, mean_time = 0.0).run()
+        assert stats['sent'] == DRAIN_MESSAGES
+    return {'msgs_per_sec': best_rate(DRAIN_MESSAGES, lambda: run_virtual(drain()))}
+
+def bench_sender_drain_logged() -> dict:
+    """One SenderModel draining a prefilled queue with INFO logging, sampled successes and 15% failures."""
+    producer = ProducerModel(asyncio.Queue())
+    messages = producer.generate_batch(DRAIN_MESSAGES)
+    config.log_success_sample = 100
+
+    async def drain():
+        queue = asyncio.Queue()
+        for message in messages:
+            queue.put_nowait(message)
+        queue.put_nowait(None)
+        await SenderModel(0, queue, new_stats(), failure_rate = 0.15, mean_time = 0.0).run()
+
+    with open(os.devnull, "w") as devnull:
+        log_writer = configure_logging("INFO", devnull)
+        try:
+            rate = best_rate(DRAIN_MESSAGES, lambda: run_virtual(drain()))
+        finally:
+            log_writer.stop()
+            logging.disable(logging.CRITICAL)
+    return {'msgs_per_sec': rate}
+
+def bench_end_to_end(total_messages: int, num_senders: int) -> dict:
+    """
+    Full run_simulation in fast-forward mode with the default failure rate and send time.
+    Peak RSS is only meaningful when this is the only benchmark in the process.
+    """
+    config.total_messages = total_messages
+    config.num_senders = num_senders
+    config.monitor_interval = 10**9 #keep monitor output out of the measurement
+    stats = new_stats()
+    start = time.perf_counter()
+    run_virtual(run_simulation(stats))
+    elapsed = time.perf_counter() - start
+    assert stats['sent'] + stats['failed'] == total_messages
+    return {
+        'msgs_per_sec': total_messages / elapsed,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+def run_isolated(total_messages: int, num_senders: int) -> dict:
+    """
+    Runs one end-to-end benchmark in a fresh interpreter so its peak RSS is not inflated by earlier runs
+    """
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run_benchmarks", "--end-to-end", str(total_messages), str(num_senders)],
+        check = True, capture_output = True, text = True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+def run_all() -> dict:
+    """
+    Returns:
+        dict: benchmark name -> metrics
+    """
+    results = {
+        'producer.generate_message': bench_generate_message(),
+        'producer.generate_message_batch': bench_generate_batch(),
+        'producer.produce_messages': bench_produce_messages(),
+        'sender.drain': bench_sender_drain(),
+        'sender.drain_logged': bench_sender_drain_logged(),
+    }
+    for total_messages, num_senders in END_TO_END_SIZES:
+        results[f"end_to_end.{total_messages}x{num_senders}"] = run_isolated(total_messages, num_senders)
+    return results
+
+def median_results(runs: list) -> dict:
+    """
+    Combine several runs of the suite into one result per metric, the median, so a baseline is not set by one
+    lucky or unlucky run
+
+    Args:
+        runs (list): benchmark name -> metrics, one dictionary per run
+
+    Returns:
+        dict: benchmark name -> median metrics
+    """
+    return {name: {metric: statistics.median(run[name][metric] for run in runs) for metric in metrics}
+            for name, metrics in runs[0].items()}
+
+def compare(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """
+    Compare results with a baseline. Rates (*_per_sec) regress when they drop by more than tolerance,
+    memory (*_mb) when it grows by more than tolerance. Benchmarks missing from either side are skipped.
+
+    Args:
+        results (dict): benchmark name -> metrics from this run
+        baseline (dict): benchmark name -> metrics to compare against
+        tolerance (float): allowed relative change in the bad direction
+
+    Returns:
+        list: description of each regression, empty if there are none
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            expected = baseline.get(name, {}).get(metric)
+            if not expected:
+                continue
+            change = (value - expected) / expected
+            if metric.endswith('_per_sec') and change < -tolerance:
+                regressions.append(f"{name} {metric}: {value:.1f} vs baseline {expected:.1f} ({change:+.0%})")
+            elif metric.endswith('_mb') and change > tolerance:
+                regressions.append(f"{name} {metric}: {value:.1f} vs baseline {expected:.1f} ({change:+.0%})")
+    return regressions
+
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(description = "Run the benchmark suite and compare it against a baseline.")
+    parser.add_argument("--output", default = "benchmark_results.json", help = "where to write the results")
+    parser.add_argument("--baseline", default = BASELINE_PATH, help = "baseline to compare against")
+    parser.add_argument("--tolerance", type = float, default = DEFAULT_TOLERANCE, help = "allowed relative regression")
+    parser.add_argument("--update-baseline", action = "store_true", help = "store these results as the new baseline")
+    parser.add_argument("--runs", type = int, default = 1, help = "run the suite this many times and keep the medians")
+    parser.add_argument("--end-to-end", nargs = 2, type = int, metavar = ("MESSAGES", "SENDERS"), help = argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.end_to_end: #worker mode used by run_isolated
+        print(json.dumps(bench_end_to_end(*args.end_to_end)))
+        return 0
+
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': median_results([run_all() for _ in range(max(1, args.runs))]),
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent = 2)
+    for name, metrics in report['results'].items():
+        print(f"{name:<36}" + "".join(f"{metric}={value:,.1f}  " for metric, value in metrics.items()))
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent = 2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, nothing to compare")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(report['results'], baseline['results'], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regressions beyond {args.tolerance:.0%} of the baseline")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
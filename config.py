@@ -1,4 +1,4 @@
-from dataclasses import dataclass 
+from dataclasses import dataclass, field
 
 @dataclass
 class Config:
@@ -8,5 +8,58 @@ class Config:
     monitor_interval: float = 5.0 # in seconds
     sender_failure: float = 0.15 # 15%
     sender_mean_time: float = 2.0 # in seconds
+    vectorized_producer: bool = True # generate messages in NumPy batches
+    message_chunk_size: int = 0 # enqueue columnar MessageBatch chunks of this size (0 = single messages)
+    trace_record_path: str = "" # record message arrivals to this trace file ("" = off)
+    trace_record_content: bool = False # store message content in the trace, not just lengths
+    trace_replay_path: str = "" # replay this trace instead of generating messages ("" = off)
+    trace_replay_speed: float = 1.0 # replay speed relative to the recording (0 = as fast as possible)
+    trace_replay_shard: int = 0 # replay only the records whose index modulo trace_replay_shards is this, set per shard
+    trace_replay_shards: int = 1 # number of shards the trace is dealt across (1 = replay every record)
+    dispatch: str = "central" # "central" queue, per-sender "work_stealing" deques or "health"-aware routing with circuit breakers
+    dispatch_depth: int = 2 # health dispatch: most messages queued at or being sent by one sender
+    breaker_window: int = 20 # health dispatch: recent attempts of a sender judged by its circuit breaker
+    breaker_failure_threshold: float = 0.5 # failure rate over a full window above which a sender's breaker opens
+    breaker_cooldown: float = 5.0 # in seconds, time an open breaker sheds a sender's traffic before letting a probe through
+    queue_maxsize: int = 0 # bound on queued items (0 = unbounded)
+    queue_high_watermark: float = 0.8 # fraction of queue_maxsize where the producer pauses
+    queue_low_watermark: float = 0.5 # fraction of queue_maxsize where the producer resumes
+    arrival_process: str = "" # open-loop arrivals: "poisson", "mmpp", "diurnal" or "step" ("" = closed-loop producer)
+    arrival_rate: float = 1000.0 # messages per second: Poisson rate, calm MMPP rate, diurnal mean or starting step rate
+    arrival_params: dict = field(default_factory = dict) # shape of the arrivals, e.g. {"burst_rate": 5000.0} or {"steps": [[10.0, 2000.0]]}
+    arrival_slot: float = 0.001 # in seconds, shortest time between two releases of due arrivals
+    stage_timing: bool = True # stamp messages at creation, enqueue, dequeue and completion to report per-stage latency
+    pull_source: bool = False # senders pull messages from a lazy source as they need them instead of a pre-filled queue
+    sender_batch_size: int = 1 # messages submitted per request (1 = no batching)
+    sender_batch_linger: float = 0.005 # in seconds, wait for a batch to fill
+    sender_batch_base_time: float = 2.0 # in seconds, average delay per batch request
+    sender_batch_message_time: float = 0.01 # in seconds, extra delay per message in a batch
+    retry_max_attempts: int = 1 # attempts per message including the first (1 = no retries)
+    retry_base_delay: float = 1.0 # in seconds, backoff before the first retry
+    retry_max_delay: float = 60.0 # in seconds, backoff cap
+    sender_rate_limit: float = 0.0 # messages per second allowed per sender (0 = unlimited)
+    sender_rate_burst: float = 1.0 # burst size of each sender's token bucket
+    carrier_pools: dict = field(default_factory = dict) # name -> {"rate": msgs/sec, "burst": n, "senders": n}, shared limits
+    sender_pools: dict = field(default_factory = dict) # name -> {"senders": n, "failure": rate, "mean_time": seconds}, senders unlike the rest
+    autoscale: bool = False # resize the sender pool during the run, starting from num_senders
+    autoscale_min_senders: int = 1 # smallest pool size
+    autoscale_max_senders: int = 500 # largest pool size
+    autoscale_target_latency: float = 10.0 # in seconds, target for queue wait plus send time
+    autoscale_interval: float = 1.0 # in seconds, time between scaling decisions
+    autoscale_scale_down_step: int = 1 # most senders retired per interval
+    log_level: str = "CRITICAL" # lowest level logged by the background writer ("INFO" for diagnostics, "CRITICAL" = quiet)
+    log_success_sample: int = 100 # log one in this many successful sends (1 = all, 0 = none), failures are always logged
+    metrics_port: int = 0 # serve OpenMetrics at http://127.0.0.1:<port>/metrics (0 = off), shard i uses port + i
+    seed: int = None # seed of every random stream (None = fresh entropy, logged so the run can be repeated)
+    num_workers: int = 1 # processes to shard the simulation across
+    ring_transport: bool = False # one producer process feeds num_workers sender processes through a shared-memory ring
+    ring_capacity: int = 65536 # message records the shared-memory ring holds
+    ring_claim_size: int = 32 # messages a sender takes from the ring at a time
+    gateway_transport: bool = False # senders send over HTTP to a gateway instead of simulating the delay and failures
+    gateway_port: int = 0 # port of a running gateway on 127.0.0.1 (0 = start the bundled stub, using sender_mean_time and sender_failure)
+    gateway_connect_time: float = 0.0 # in seconds, the bundled stub's delay before answering on a new connection (handshake cost)
+    gateway_pool_size: int = 8 # keep-alive connections shared by the senders (0 = a new connection per message)
+    gateway_pipeline_depth: int = 16 # most requests in flight on one connection (1 = keep-alive without pipelining)
+    fast_forward: bool = False # run on a virtual clock instead of real time
 
 config = Config()
\ No newline at end of file
@@ -1,59 +1,45 @@
 import asyncio
-import time
-from models.producer_model import ProducerModel
-from models.sender_model import SenderModel
-from models.display_monitor_model import monitor_progress
+from models.simulation_model import new_stats, run_simulation
+from models.display_monitor_model import format_stats, format_stages, format_pool_history
+from models.shard_runner_model import run_sharded
+from models.ring_pipeline_model import run_ring_pipeline
+from models.virtual_clock_model import run_virtual
+from models.logging_model import configure_logging
 from config import config
 
-import logging
-logging.disable(logging.CRITICAL)
+def report(stats: dict, elapsed_time: float):
+    print(f"[Final] {elapsed_time:.4f}s, {format_stats(stats)}")
+    stages = format_stages(stats)
+    if stages: #per-stage latency, from creation to completion
+        print(f"[Stages] {stages}")
+    if 'pool_history' in stats: #autoscaled run, show how the pool size changed
+        print(f"[Autoscaler] {format_pool_history(stats['pool_history'], elapsed_time)}")
 
 async def main():
-    start_time = time.time()
-    queue = asyncio.Queue() # main datastructure to handle messages
+    loop = asyncio.get_running_loop()
+    start_time = loop.time() #virtual when running in fast-forward mode
 
-    stats = {
-        'sent': 0,
-        'failed': 0,
-        'total_time': 0.0
-    }
+    stats = new_stats()
+    await run_simulation(stats)
 
-    #initialize producer (s)
-    producer = ProducerModel(queue) 
-    producer_task = asyncio.create_task(producer.produce_messages())
-
-    sender_tasks = []
-    #initialize senders
-    for i in range(config.num_senders):
-        sender = SenderModel(i, queue, stats)
-        new_task = asyncio.create_task(sender.run())
-        sender_tasks.append(new_task)
-
-    #initialize monitor
-    monitor_task = asyncio.create_task(monitor_progress(stats))
-
-    #==============================Await Async Tasks==============================
-
-    await producer_task
-    await queue.join() #wait for senders to finish process all messages in queue
-    for task in sender_tasks: #extra check to make sure that tasks have also finished
-        await task 
-
-    monitor_task.cancel() #manully cancel monitor task
-    try:
-        await monitor_task
-    except asyncio.CancelledError:
-        pass
-    
     #display final stats
-    elapsed_time = time.time() - start_time
-    sent = stats.get('sent', 0)
-    failed = stats.get('failed', 0)
-    total_time = stats.get('total_time', 0.0)
-    avg_time = (total_time / sent) if sent > 0 else 0.0
-    print(f"[Final] {elapsed_time:.4f}s, Sent: {sent}, Failed: {failed}, Avg Time: {avg_time:.4f} seconds")
+    elapsed_time = loop.time() - start_time
+    report(stats, elapsed_time)
 
 if __name__ == "__main__":
-    asyncio.run(main())
-
-
+    log_writer = configure_logging(config.log_level) #log records are written by a background thread
+    try:
+        if config.ring_transport:
+            stats, elapsed_time = run_ring_pipeline(config.num_workers) #producer and senders in separate processes
+            report(stats, elapsed_time)
+        elif config.num_workers > 1:
+            stats, elapsed_time = run_sharded(config.num_workers) #one producer/sender/queue shard per process
+            report(stats, elapsed_time)
+        elif config.fast_forward:
+            run_virtual(main()) #discrete-event mode: simulated delays do not take real time
+        elif config.seed is not None:
+            run_virtual(main(), paced = True) #real time, with event order and stats reproducible from the seed
+        else:
+            asyncio.run(main())
+    finally:
+        log_writer.stop() #flush records still waiting to be written
@@ -0,0 +1,306 @@
+import math
+import numpy as np
+from collections import Counter
+from dataclasses import dataclass, field
+from .arrival_model import build_arrivals
+from .health_dispatch_model import build_sender_profiles
+from config import config, Config
+
+EULER_GAMMA = 0.5772156649015329
+COMPARED = ('sent', 'failed', 'elapsed', 'throughput', 'avg_time', 'latency_p50', 'latency_p99', 'mean_wait') #also reported by a simulation run
+
+@dataclass
+class Prediction:
+    """
+    Expected results of a simulation run, in the units the simulation reports them in
+
+    Attributes:
+        sent (float): Messages sent successfully.
+        failed (float): Failed send attempts.
+        attempts (float): Send attempts including retries.
+        elapsed (float): Time until the last message is done, in seconds.
+        throughput (float): Send attempts per second over the run.
+        avg_time (float): Mean send time of successful messages.
+        latency_p50 (float): Median send time.
+        latency_p99 (float): 99th percentile send time.
+        mean_wait (float): Mean time a message waits in the queue before a sender takes it.
+        utilization (float): Share of sender time spent sending.
+        notes (list): Parts of the configuration the prediction only approximates.
+    """
+    sent: float
+    failed: float
+    attempts: float
+    elapsed: float
+    throughput: float
+    avg_time: float
+    latency_p50: float
+    latency_p99: float
+    mean_wait: float
+    utilization: float
+    notes: list = field(default_factory = list)
+
+def harmonic(n: int) -> float:
+    """
+    Returns:
+        float: 1 + 1/2 + ... + 1/n, from its asymptotic expansion for large n
+    """
+    if n <= 0:
+        return 0.0
+    if n <= 64:
+        return sum(1.0 / k for k in range(1, n + 1))
+    return math.log(n) + EULER_GAMMA + 1 / (2 * n) - 1 / (12 * n * n)
+
+def expected_longest(mean_times: list) -> float:
+    """
+    Expected longest of independent exponential times, E[max] = integral of 1 - prod(1 - exp(-t / mean)) dt,
+    which is mean * H(n) when all n means are equal
+
+    Args:
+        mean_times (list): Mean of each exponential time, all positive.
+
+    Returns:
+        float: expected maximum, by the trapezoidal rule over times sharing a mean
+    """
+    counts = Counter(mean_times)
+    t = np.linspace(0.0, max(counts) * (math.log(len(mean_times)) + 40), 4001)
+    below = np.ones_like(t) #P(every time is below t)
+    for mean_time, n in counts.items():
+        below *= (-np.expm1(-t / mean_time)) ** n
+    above = 1 - below
+    return float((above.sum() - (above[0] + above[-1]) / 2) * (t[1] - t[0]))
+
+def erlang_c(servers: int, offered_load: float) -> float:
+    """
+    Probability that an arrival has to wait in an M/M/c queue
+
+    Args:
+        servers (int): Number of servers c.
+        offered_load (float): Arrival rate times mean service time, in Erlangs.
+
+    Returns:
+        float: Erlang C probability, 1 if the queue is unstable
+    """
+    if offered_load >= servers:
+        return 1.0
+    blocking = 1.0
+    for k in range(1, servers + 1): #Erlang B recursion, stable for large c
+        blocking = offered_load * blocking / (k + offered_load * blocking)
+    return servers * blocking / (servers - offered_load * (1 - blocking))
+
+def mmc(arrival_rate: float, mean_time: float, servers: int) -> dict:
+    """
+    Steady-state figures of an M/M/c queue
+
+    Args:
+        arrival_rate (float): Poisson arrivals per second.
+        mean_time (float): Mean of the exponential service time.
+        servers (int): Number of servers.
+
+    Returns:
+        dict: utilization, wait_probability, mean_wait and mean_response (infinite waits if unstable)
+    """
+    load = arrival_rate * mean_time
+    utilization = load / servers
+    if utilization >= 1:
+        return {'utilization': 1.0, 'wait_probability': 1.0, 'mean_wait': math.inf, 'mean_response': math.inf}
+    wait_probability = erlang_c(servers, load)
+    mean_wait = wait_probability * mean_time / (servers - load)
+    return {'utilization': utilization, 'wait_probability': wait_probability,
+            'mean_wait': mean_wait, 'mean_response': mean_wait + mean_time}
+
+def sender_mix(profiles: list, by_speed: bool = True) -> list:
+    """
+    Share of the send attempts each kind of sender makes while every sender keeps busy. A sender takes its next
+    message as soon as it is done, so its share is proportional to its send rate, 1 / mean_time; senders with no
+    send time take everything. With by_speed False every request takes the same time and the shares are equal.
+
+    Args:
+        profiles (list): (failure_rate, mean_time) of each sender, from build_sender_profiles.
+        by_speed (boolean): Weight senders by their send rate.
+
+    Returns:
+        list: (share, failure_rate, mean_time) of each distinct profile, shares summing to 1
+    """
+    counts = Counter(profiles)
+    if not by_speed:
+        weights = dict(counts)
+    elif any(mean_time <= 0 for _, mean_time in counts):
+        weights = {profile: n if profile[1] <= 0 else 0 for profile, n in counts.items()}
+    else:
+        weights = {profile: n / profile[1] for profile, n in counts.items()}
+    total = sum(weights.values())
+    return [(weight / total, failure, mean_time) for (failure, mean_time), weight in weights.items() if weight]
+
+def mixture_percentile(mix: list, q: float) -> float:
+    """
+    Percentile of a send time drawn from one of several exponential distributions
+
+    Args:
+        mix (list): (share, failure_rate, mean_time) of each distribution, as from sender_mix.
+        q (float): Percentile between 0 and 100.
+
+    Returns:
+        float: time t with P(send time > t) = 1 - q/100, found by bisection between the percentiles of the parts
+    """
+    tail = 1 - q / 100
+    low = min(mean_time for _, _, mean_time in mix) * math.log(1 / tail)
+    high = max(mean_time for _, _, mean_time in mix) * math.log(1 / tail)
+    for _ in range(60):
+        middle = (low + high) / 2
+        if sum(share * math.exp(-middle / mean_time) for share, _, mean_time in mix if mean_time > 0) > tail:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+def predict(cfg: Config = None, arrival_rate: float = None) -> Prediction:
+    """
+    Predict a run from queueing theory instead of simulating it. Senders are c exponential servers and
+    every attempt fails independently with the configured probability. By default all messages are queued
+    at the start, as the producer does, and the run is the time c servers take to clear that backlog: while
+    all c are busy one finishes every mean/c seconds, and the last c jobs end after the longest of c
+    exponential times, so E[elapsed] = (jobs - c) * mean / c + mean * H(c). With arrival_rate the messages
+    arrive as a Poisson stream instead and waits follow the M/M/c (Erlang C) formulas. Configs with an arrival
+    process are predicted the same way at the process's mean rate. Sender pools are folded in through
+    sender_mix: the failure rate is that of the average attempt, the c servers share the harmonic mean send
+    time, a backlog ends with the expected longest of every sender's last send, and the mean and percentiles of
+    successful send times are those of the pools' exponential times mixed in proportion to the successes each
+    pool contributes.
+
+    Args:
+        cfg (Config): Configuration to predict, the global config if None.
+        arrival_rate (float): Messages per second arriving over the run, None if they are all queued at once
+            or arrive by the configured arrival process.
+
+    Returns:
+        Prediction: expected results, with notes on what was approximated
+    """
+    cfg = cfg if cfg is not None else config
+    notes = []
+    messages = cfg.total_messages
+    servers = cfg.num_senders
+    batch = max(1, cfg.sender_batch_size)
+    profiles = build_sender_profiles(servers, cfg.sender_failure, cfg.sender_mean_time, cfg.sender_pools)
+    mix = sender_mix(profiles, by_speed = batch == 1) #batch requests take the same time on every sender
+    failure = sum(share * pool_failure for share, pool_failure, _ in mix)
+    if len(mix) > 1:
+        notes.append("sender pools approximated by their mean failure rate and harmonic mean send time")
+    if cfg.dispatch == "health":
+        notes.append("health dispatch not modelled, messages shared as by the central queue")
+    if arrival_rate is None and cfg.arrival_process:
+        arrivals = build_arrivals(cfg.arrival_process, cfg.arrival_rate, cfg.arrival_params)
+        arrival_rate = getattr(arrivals, 'rate', cfg.arrival_rate) #mean rate of Poisson and MMPP arrivals
+        if cfg.arrival_process != "poisson":
+            notes.append(f"{cfg.arrival_process} arrivals treated as Poisson at {arrival_rate:g}/s")
+
+    #attempts per message: retried until it succeeds or runs out of attempts
+    max_attempts = max(1, cfg.retry_max_attempts)
+    attempts_per_message = (1 - failure ** max_attempts) / (1 - failure) if failure < 1 else max_attempts
+    attempts = messages * attempts_per_message
+    sent = messages * (1 - failure ** max_attempts)
+    if max_attempts > 1:
+        notes.append("retry backoff delays not included in elapsed")
+
+    #a job is one request: a single message, or a full batch when batching
+    if batch > 1:
+        job_time = cfg.sender_batch_base_time + batch * cfg.sender_batch_message_time
+        exponential_part = cfg.sender_batch_base_time #only the base delay is random
+        notes.append("batches assumed full")
+    else:
+        job_time = exponential_part = sum(share * mean_time for share, _, mean_time in mix)
+    fixed_part = job_time - exponential_part
+    jobs = math.ceil(attempts / batch)
+    if cfg.autoscale:
+        notes.append(f"autoscaling not modelled, pool fixed at {servers} senders")
+
+    if job_time <= 0:
+        elapsed = mean_wait = 0.0
+    elif arrival_rate is None:
+        busy = max(0, jobs - servers) #jobs started while every sender was busy
+        elapsed = busy * job_time / servers + fixed_part
+        if batch == 1 and len(mix) > 1 and jobs >= servers: #the last send on a slow sender ends the run
+            elapsed += expected_longest([mean_time for _, mean_time in profiles])
+        else:
+            elapsed += exponential_part * harmonic(min(jobs, servers))
+        mean_wait = job_time / servers * busy * (busy + 1) / (2 * jobs) if jobs else 0.0
+    else:
+        queue = mmc(arrival_rate / batch, job_time, servers)
+        if math.isinf(queue['mean_wait']):
+            notes.append("arrivals exceed capacity, backlog drained as if queued at once")
+            busy = max(0, jobs - servers)
+            elapsed = max(attempts / arrival_rate, busy * job_time / servers + exponential_part * harmonic(servers) + fixed_part)
+            mean_wait = elapsed / 2 #backlog grows steadily, the average message waits about half the run
+        else:
+            elapsed = attempts / arrival_rate + queue['mean_response']
+            mean_wait = queue['mean_wait']
+
+    #rate limits cap the combined send rate, the run takes at least attempts / cap
+    message_times = [job_time / batch] * servers if batch > 1 else [mean_time for _, mean_time in profiles]
+    capacity = _rate_capacity(cfg, message_times)
+    if capacity is not None and elapsed < attempts / capacity:
+        elapsed = attempts / capacity
+        notes.append("rate limited, elapsed from the limit")
+
+    #only successful sends are timed, and flaky pools contribute fewer of them
+    successes = sum(share * (1 - pool_failure) for share, pool_failure, _ in mix)
+    timed = [(share * (1 - pool_failure) / successes, pool_failure, mean_time)
+             for share, pool_failure, mean_time in mix] if successes else mix
+    avg_time = sum(share * mean_time for share, _, mean_time in timed) if batch == 1 else job_time
+
+    def latency_percentile(q: float) -> float:
+        if batch == 1 and len(mix) > 1:
+            return mixture_percentile(timed, q)
+        return exponential_part * math.log(100 / (100 - q)) + fixed_part
+
+    return Prediction(
+        sent = sent,
+        failed = attempts - sent,
+        attempts = attempts,
+        elapsed = elapsed,
+        throughput = attempts / elapsed if elapsed > 0 else math.inf,
+        avg_time = avg_time,
+        latency_p50 = latency_percentile(50),
+        latency_p99 = latency_percentile(99),
+        mean_wait = mean_wait,
+        utilization = jobs * job_time / (servers * elapsed) if elapsed > 0 else 0.0,
+        notes = notes,
+    )
+
+def _rate_capacity(cfg: Config, message_times: list):
+    """
+    Args:
+        message_times (list): Mean time each sender takes per message.
+
+    Returns:
+        float: most messages per second the senders can send under the configured rate limits, None without limits
+    """
+    if cfg.sender_rate_limit <= 0 and not cfg.carrier_pools:
+        return None
+    rates = [1 / message_time if message_time > 0 else math.inf for message_time in message_times]
+    if cfg.sender_rate_limit > 0:
+        rates = [min(rate, cfg.sender_rate_limit) for rate in rates]
+    pooled = 0
+    capacity = 0.0
+    for pool in cfg.carrier_pools.values():
+        members = rates[pooled:pooled + max(0, pool['senders'])]
+        pooled += len(members)
+        capacity += min(pool['rate'], sum(members))
+    return capacity + sum(rates[pooled:])
+
+def deviation(prediction: Prediction, result: dict) -> dict:
+    """
+    Relative deviation of simulated results from the prediction, (simulated - predicted) / predicted
+
+    Args:
+        prediction (Prediction): Predicted results.
+        result (dict): Results of a simulation run with the same keys.
+
+    Returns:
+        dict: key -> relative deviation, for every compared key in result with a nonzero prediction
+    """
+    deviations = {}
+    for key in COMPARED:
+        predicted = getattr(prediction, key)
+        if key in result and predicted:
+            deviations[key] = (result[key] - predicted) / predicted
+    return deviations
@@ -0,0 +1,308 @@
+import asyncio
+import bisect
+import logging
+import math
+import numpy as np
+from .producer_model import ProducerModel
+from config import config
+
+logger = logging.getLogger(__name__)
+
+ARRIVAL_PROCESSES = ("poisson", "mmpp", "diurnal", "step")
+
+class PoissonArrivals:
+    """
+    Poisson arrivals at a constant rate: exponential gaps drawn a block at a time
+
+    Attributes:
+        rate (float): Mean arrivals per second.
+        rng (np.random.Generator): Source of the gaps.
+    """
+
+    def __init__(self, rate: float, rng: np.random.Generator = None):
+        if rate <= 0:
+            raise ValueError("Arrival rate must be positive")
+        self.rate = rate
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    def blocks(self, block_size: int = 8192):
+        """
+        Yields:
+            np.ndarray: next block of increasing arrival times, in seconds from the start
+        """
+        now = 0.0
+        while True:
+            times = now + np.cumsum(self.rng.standard_exponential(block_size) / self.rate)
+            now = float(times[-1])
+            yield times
+
+class MMPPArrivals:
+    """
+    Bursty arrivals from a Markov-modulated Poisson process. The process stays in each state for an exponential
+    time and moves to the next state in turn, arriving as a Poisson stream at the state's rate meanwhile. With two
+    states this alternates between a calm and a burst rate.
+
+    Attributes:
+        rates (list): Arrivals per second in each state.
+        mean_sojourns (list): Mean time spent in each state per visit.
+        rng (np.random.Generator): Source of sojourns and arrivals.
+    """
+
+    def __init__(self, rates: list, mean_sojourns: list, rng: np.random.Generator = None):
+        if len(rates) != len(mean_sojourns) or not rates:
+            raise ValueError("MMPP needs one mean sojourn per rate")
+        self.rates = list(rates)
+        self.mean_sojourns = list(mean_sojourns)
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    @property
+    def rate(self) -> float:
+        """
+        Returns:
+            float: long-run mean arrivals per second, rates weighted by the time spent in each state
+        """
+        return sum(r * s for r, s in zip(self.rates, self.mean_sojourns)) / sum(self.mean_sojourns)
+
+    def blocks(self, block_size: int = 8192):
+        """
+        Yields:
+            np.ndarray: arrival times of the next sojourn, or part of a long one, in seconds from the start
+        """
+        now = 0.0
+        state = 0
+        while True:
+            end = now + self.rng.exponential(self.mean_sojourns[state])
+            rate = self.rates[state]
+            while rate > 0: #a Poisson stream within the sojourn, cut where the state changes
+                times = now + np.cumsum(self.rng.standard_exponential(block_size) / rate)
+                if times[-1] >= end:
+                    times = times[:np.searchsorted(times, end)]
+                    if len(times):
+                        yield times
+                    break
+                now = float(times[-1])
+                yield times
+            now = end
+            state = (state + 1) % len(self.rates)
+
+class RateCurveArrivals:
+    """
+    Arrivals whose rate follows a curve over time, such as a daily cycle or step changes. Candidates are drawn
+    as a Poisson stream at the curve's peak rate and each is kept with probability rate(t) / peak (thinning),
+    which gives exactly a non-homogeneous Poisson process.
+
+    Attributes:
+        rate_at (callable): Arrivals per second at the given times, taking and returning NumPy arrays.
+        peak_rate (float): Upper bound of the curve.
+        rng (np.random.Generator): Source of candidates and of the thinning.
+        max_idle (float): Longest stretch in seconds without an arrival before the curve is taken to have
+            dropped to zero for good.
+    """
+
+    def __init__(self, rate_at, peak_rate: float, rng: np.random.Generator = None, max_idle: float = 3600.0):
+        if not peak_rate > 0:
+            raise ValueError("Peak arrival rate must be positive")
+        self.rate_at = rate_at
+        self.peak_rate = peak_rate
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.max_idle = max_idle
+
+    def blocks(self, block_size: int = 8192):
+        """
+        Yields:
+            np.ndarray: next block of increasing arrival times, in seconds from the start
+
+        Raises:
+            ValueError: if no candidate is kept for max_idle seconds, rather than drawing forever
+        """
+        now = last_arrival = 0.0
+        while True:
+            candidates = now + np.cumsum(self.rng.standard_exponential(block_size) / self.peak_rate)
+            now = float(candidates[-1])
+            kept = candidates[self.rng.random(block_size) * self.peak_rate < self.rate_at(candidates)]
+            if len(kept):
+                last_arrival = float(kept[-1])
+                yield kept
+            elif now - last_arrival > self.max_idle:
+                raise ValueError(f"No arrivals for {self.max_idle:g}s after {last_arrival:.1f}s, "
+                                 "the arrival rate stays at zero")
+
+def diurnal(rate: float, amplitude: float = 0.5, period: float = 60.0, phase: float = 0.0,
+            rng: np.random.Generator = None) -> RateCurveArrivals:
+    """
+    Daily cycle: rate * (1 + amplitude * sin(2 pi t / period + phase)), with the day compressed to period seconds
+
+    Args:
+        rate (float): Mean arrivals per second over a period.
+        amplitude (float): Swing around the mean as a fraction of it, between 0 and 1.
+        period (float): Length of one cycle in seconds.
+        phase (float): Offset of the cycle in radians, -pi/2 starts at the trough.
+    """
+    amplitude = min(max(amplitude, 0.0), 1.0)
+    return RateCurveArrivals(lambda t: rate * (1 + amplitude * np.sin(2 * math.pi * t / period + phase)),
+                             rate * (1 + amplitude), rng)
+
+def steps(rate: float, changes: list, rng: np.random.Generator = None) -> RateCurveArrivals:
+    """
+    Step changes: the rate starts at rate and jumps to a new value at each given time
+
+    Args:
+        rate (float): Arrivals per second before the first change.
+        changes (list): [time, rate] pairs, in seconds from the start.
+    """
+    changes = sorted(changes)
+    if any(new_rate < 0 for _, new_rate in changes) or rate < 0:
+        raise ValueError("Step rates must not be negative")
+    if (changes[-1][1] if changes else rate) <= 0:
+        raise ValueError("The last step rate must be positive, otherwise arrivals stop for good")
+    times = np.array([time for time, _ in changes], dtype = np.float64)
+    rates = np.array([rate] + [new_rate for _, new_rate in changes], dtype = np.float64)
+    return RateCurveArrivals(lambda t: rates[np.searchsorted(times, t, side = 'right')], float(rates.max()), rng)
+
+def scale_arrivals(rate: float, params: dict, factor: float) -> tuple:
+    """
+    Scale every rate of an arrival process, for giving each shard of a run its share of the load
+
+    Returns:
+        tuple: scaled rate and a copy of params with burst_rate and step rates scaled
+    """
+    params = dict(params)
+    if 'burst_rate' in params:
+        params['burst_rate'] *= factor
+    if 'steps' in params:
+        params['steps'] = [[time, step_rate * factor] for time, step_rate in params['steps']]
+    return rate * factor, params
+
+def build_arrivals(process: str, rate: float, params: dict = None, rng: np.random.Generator = None):
+    """
+    Build an arrival process from its config
+
+    Args:
+        process (str): One of ARRIVAL_PROCESSES.
+        rate (float): Arrivals per second: the Poisson rate, the calm rate of an MMPP, the mean of a diurnal
+            curve or the starting rate of step changes.
+        params (dict): Shape parameters. mmpp: burst_rate (default 5 * rate), mean_calm (10.0), mean_burst (1.0).
+            diurnal: amplitude (0.5), period (60.0), phase (0.0). step: steps, a list of [time, rate] pairs.
+        rng (np.random.Generator): Source of the arrival times.
+    """
+    params = params or {}
+    if process == "poisson":
+        return PoissonArrivals(rate, rng)
+    if process == "mmpp":
+        return MMPPArrivals([rate, params.get('burst_rate', 5 * rate)],
+                            [params.get('mean_calm', 10.0), params.get('mean_burst', 1.0)], rng)
+    if process == "diurnal":
+        return diurnal(rate, params.get('amplitude', 0.5), params.get('period', 60.0), params.get('phase', 0.0), rng)
+    if process == "step":
+        return steps(rate, params.get('steps', []), rng)
+    raise ValueError(f"Unknown arrival process: {process}")
+
+class ArrivalProducer(ProducerModel):
+    """
+    Open-loop producer: messages arrive on the schedule of an arrival process, whether or not the senders keep up,
+    instead of as fast as the queue accepts them. Each message carries its scheduled arrival time (created_at) and
+    its release time (enqueued_at), so senders can report queue wait apart from service time, and the release lag
+    is recorded as producer time.
+
+    A sleep per message would cost a timer and a loop iteration per arrival, a large share of the loop at tens of
+    thousands of arrivals per second, so the producer wakes once per timer slot and releases every arrival due by
+    then. Wake-ups target absolute deadlines on the loop clock, so a late wake-up is caught up in the next release
+    and never shifts later arrivals. When the next arrival is further away than a slot the producer sleeps until
+    exactly that arrival. A full bounded queue drops arrivals rather than holding them back.
+
+    Attributes:
+        process: Arrival process, such as PoissonArrivals.
+        slot (float): Shortest time between two releases, in seconds, 0 to release each arrival at its exact time.
+        block_size (int): Arrivals whose messages are generated together. Generating a block stalls releases
+            briefly, 256 keeps that well under a millisecond.
+        dropped (int): Arrivals that found the queue full.
+        releases (int): Number of wake-ups that released arrivals.
+        last_release (float): Loop time of the last release.
+        max_lag (float): Largest delay between an arrival's scheduled time and its release.
+    """
+
+    def __init__(self, queue: asyncio.Queue, process, slot: float = 0.001, stats: dict = None, block_size: int = 256,
+                 **kwargs):
+        super().__init__(queue, stats = stats, **kwargs)
+        self.process = process
+        self.slot = slot
+        self.block_size = block_size
+        self.dropped = 0
+        self.releases = 0
+        self.last_release = None
+        self.max_lag = 0.0
+        if stats is not None:
+            stats.setdefault('dropped', 0)
+
+    async def produce_messages(self, add_sentinels: bool = True):
+        """
+        Release config.total_messages arrivals into the queue on the arrival process's schedule
+
+        Args:
+            add_sentinels (boolean): Add sentinel values once every arrival has been released.
+        """
+        try:
+            self.running = True
+            loop = asyncio.get_running_loop()
+            start_time = loop.time()
+            total = config.total_messages
+            logger.info("Starting open-loop arrivals")
+            blocks = self.process.blocks(self.block_size)
+            times, messages = [], []
+            index = 0
+
+            while self.messages_produced < total and self.running:
+                if index == len(times): #messages of a block of arrivals are made at once, and released as they fall due
+                    block = next(blocks)[:total - self.messages_produced] + start_time
+                    #counted as they are released, IDs stay in arrival order
+                    messages = self.generate_message_batch(len(block), count = False).to_messages(block)
+                    times = block.tolist()
+                    index = 0
+                now = loop.time()
+                due = bisect.bisect_right(times, now, index)
+                if due > index:
+                    self.release(messages[index:due], now)
+                    index = due
+                    continue
+                wake = times[index] #next arrival, but at most one release per slot
+                if self.last_release is not None:
+                    wake = max(wake, self.last_release + self.slot)
+                await asyncio.sleep(wake - now) #absolute deadline, lateness is not carried over
+
+            if add_sentinels:
+                await self.add_sentinel_vals()
+            logger.info("Open-loop arrivals completed")
+
+        except Exception as e:
+            logger.error("Failed open-loop arrivals: %s", e)
+            raise
+
+        finally:
+            self.running = False
+
+    def release(self, messages: list, now: float):
+        """
+        Put arrivals that are due on the queue
+
+        Args:
+            messages (list): TimedMessages stamped with their scheduled loop times, all at or before now.
+            now (float): Current loop time.
+        """
+        if now != self.last_release: #a release split over two blocks is still one wake-up
+            self.releases += 1
+        self.last_release = now
+        self.max_lag = max(self.max_lag, now - messages[0].created_at)
+        self.messages_produced += len(messages)
+        for message in messages:
+            message.enqueued_at = now
+            if self.producer_time is not None:
+                self.producer_time.record(now - message.created_at)
+            try:
+                self.queue.put_nowait(message)
+            except asyncio.QueueFull: #open loop, arrivals do not wait for room
+                self.dropped += 1
+                if self.stats is not None:
+                    self.stats['dropped'] += 1
+                continue
+            if self.recorder is not None:
+                self.recorder.record(message, message.created_at)
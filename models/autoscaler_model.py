@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import math
+from .sender_model import SenderModel
+from .counters_model import collect_counters
+
+logger = logging.getLogger(__name__)
+
+class PoolHistory:
+    """
+    Step function of the sender pool size over time, recorded only when the size changes.
+    Histories of several shards merge into the history of their combined pool.
+
+    Attributes:
+        times (list): Times (seconds from the start of the run) at which the size changed.
+        sizes (list): Pool size from each time on.
+    """
+    __slots__ = ('times', 'sizes')
+
+    def __init__(self):
+        self.times = []
+        self.sizes = []
+
+    def record(self, time: float, size: int):
+        if self.sizes and self.sizes[-1] == size:
+            return
+        if self.times and self.times[-1] == time: #several changes at once, keep the last
+            self.sizes[-1] = size
+            return
+        self.times.append(time)
+        self.sizes.append(size)
+
+    def size_at(self, time: float) -> int:
+        """
+        Returns:
+            int: pool size at the given time, 0 before the first record
+        """
+        size = 0
+        for when, value in zip(self.times, self.sizes):
+            if when > time:
+                break
+            size = value
+        return size
+
+    def sender_seconds(self, until: float) -> float:
+        """
+        Returns:
+            float: area under the pool size curve up to until, i.e. the cost of the pool
+        """
+        total = 0.0
+        for i, (when, size) in enumerate(zip(self.times, self.sizes)):
+            end = self.times[i + 1] if i + 1 < len(self.times) else until
+            total += size * max(0.0, min(end, until) - when)
+        return total
+
+    def merge(self, other: "PoolHistory"):
+        """
+        Add another pool's size at every point in time
+
+        Args:
+            other (PoolHistory): History of a pool running alongside this one.
+        """
+        merged = PoolHistory()
+        for when in sorted(set(self.times) | set(other.times)):
+            merged.record(when, self.size_at(when) + other.size_at(when))
+        self.times, self.sizes = merged.times, merged.sizes
+
+    def copy(self) -> "PoolHistory":
+        clone = PoolHistory()
+        clone.times, clone.sizes = list(self.times), list(self.sizes)
+        return clone
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+class Autoscaler:
+    """
+    Grows and shrinks the set of sender tasks during a run with a target-latency controller. Every interval it
+    estimates the arrival rate from the drain rate and queue growth, and the send time from recent latency, then
+    sizes the pool by Little's law so that the current backlog clears within what is left of the latency target:
+
+        desired = (arrival rate + queue depth / (target latency - send time)) * send time
+
+    The pool grows to the desired size at once and shrinks by at most scale_down_step senders per interval.
+    Retired senders stop cleanly: idle ones are cancelled while waiting on the queue and busy ones finish
+    their current send first, so no sentinel values are needed.
+
+    Attributes:
+        queue (asyncio.Queue): Queue the senders take messages from.
+        stats (dict): Shared stats, extended with active_senders and pool_history.
+        create_sender (callable): Builds the SenderModel for a given sender ID.
+        min_senders (int): Smallest pool size.
+        max_senders (int): Largest pool size, sender IDs stay below it.
+        target_latency (float): Target for queue wait plus send time, in seconds.
+        interval (float): Time between scaling decisions.
+        scale_down_step (int): Most senders retired per interval.
+        senders (dict): Sender ID -> (SenderModel, task) for the active pool.
+        history (PoolHistory): Pool size over time.
+    """
+
+    def __init__(self, queue: asyncio.Queue, stats: dict, create_sender, min_senders: int = 1, max_senders: int = 500,
+                 target_latency: float = 10.0, interval: float = 1.0, scale_down_step: int = 1):
+        self.queue = queue
+        self.stats = stats
+        self.create_sender = create_sender
+        self.min_senders = max(1, min_senders)
+        self.max_senders = max(self.min_senders, max_senders)
+        self.target_latency = target_latency
+        self.interval = interval
+        self.scale_down_step = max(1, scale_down_step)
+        self.senders = {}
+        self.history = stats.setdefault('pool_history', PoolHistory())
+        self._retiring = set() #tasks of senders finishing their last send
+        self._send_time = None #last estimate of the mean send time
+        self._start_time = None
+        stats['active_senders'] = 0
+
+    def scale_to(self, size: int):
+        """
+        Start or retire senders until size are active
+
+        Args:
+            size (int): New pool size, clamped to min_senders and max_senders.
+        """
+        size = min(max(size, self.min_senders), self.max_senders)
+        while len(self.senders) < size:
+            sender_id = next(i for i in range(self.max_senders) if i not in self.senders) #reuse retired IDs
+            sender = self.create_sender(sender_id)
+            self.senders[sender_id] = (sender, asyncio.create_task(sender.run()))
+        while len(self.senders) > size:
+            self._retire(*self.senders.popitem()[1])
+
+        self.stats['active_senders'] = size
+        loop = asyncio.get_running_loop()
+        if self._start_time is None:
+            self._start_time = loop.time()
+        self.history.record(loop.time() - self._start_time, size)
+
+    def _retire(self, sender: SenderModel, task: asyncio.Task):
+        idle = sender.idle or not sender.running #waiting on the queue, or not started yet
+        sender.running = False #a busy sender exits after its current send
+        if idle:
+            task.cancel()
+        elif not task.done():
+            self._retiring.add(task)
+            task.add_done_callback(self._retiring.discard)
+
+    def desired_size(self, depth: int, drain_rate: float, arrival_rate: float, send_time: float) -> int:
+        """
+        Pool size that keeps queue wait plus send time within the latency target
+
+        Args:
+            depth (int): Messages waiting in the queue.
+            drain_rate (float): Messages per second the pool completed over the last interval.
+            arrival_rate (float): Messages per second arriving on the queue over the last interval.
+            send_time (float): Recent mean send time, None if nothing has been sent yet.
+
+        Returns:
+            int: unclamped pool size
+        """
+        size = len(self.senders)
+        if send_time is None: #no samples yet, double while work is waiting
+            return size * 2 if depth > 0 and drain_rate == 0 else size
+        wait_budget = self.target_latency - send_time
+        if wait_budget <= 0: #the target cannot be met by adding senders, use as many as allowed
+            return self.max_senders if depth > 0 else size
+        return math.ceil((arrival_rate + depth / wait_budget) * send_time)
+
+    async def run(self):
+        """
+        Control loop: measures the last interval and resizes the pool
+        """
+        loop = asyncio.get_running_loop()
+        if not self.senders:
+            self.scale_to(self.min_senders)
+        latency = self.stats.get('latency')
+        collect_counters(self.stats)
+        last_time = loop.time()
+        last_done = self.stats['sent'] + self.stats['failed']
+        last_depth = self.queue.qsize()
+        last_count, last_total = (latency.count, latency.total) if latency is not None else (0, 0.0)
+
+        while True:
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            elapsed = now - last_time
+            if elapsed <= 0:
+                continue
+            collect_counters(self.stats) #totals of the per-sender counters
+            done = self.stats['sent'] + self.stats['failed']
+            depth = self.queue.qsize()
+            drain_rate = (done - last_done) / elapsed
+            arrival_rate = max(0.0, drain_rate + (depth - last_depth) / elapsed)
+            if latency is not None and latency.count > last_count:
+                self._send_time = (latency.total - last_total) / (latency.count - last_count)
+                last_count, last_total = latency.count, latency.total
+
+            size = len(self.senders)
+            desired = self.desired_size(depth, drain_rate, arrival_rate, self._send_time)
+            if desired < size:
+                desired = max(desired, size - self.scale_down_step)
+            if desired != size:
+                logger.info(f"Autoscaler: {size} -> {desired} senders (depth {depth}, drain {drain_rate:.1f}/s)")
+                self.scale_to(desired)
+            last_time, last_done, last_depth = now, done, depth
+
+    async def stop(self):
+        """
+        Retire every sender and wait for those still finishing a send
+        """
+        for sender, task in list(self.senders.values()):
+            self._retire(sender, task)
+        tasks = [task for _, task in self.senders.values()] + list(self._retiring)
+        self.senders.clear()
+        self.stats['active_senders'] = 0
+        if self._start_time is not None:
+            self.history.record(asyncio.get_running_loop().time() - self._start_time, 0)
+        await asyncio.gather(*tasks, return_exceptions = True)
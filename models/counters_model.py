@@ -0,0 +1,205 @@
+import statistics
+
+class SenderCounters:
+    """
+    Counters owned by a single sender. Only that sender writes them, so senders never contend on shared
+    state whether they run as coroutines, threads or processes; readers merge them when they need totals.
+
+    Attributes:
+        sender_id (int): Sender the counters belong to.
+        sent (int): Messages sent successfully.
+        failed (int): Failed send attempts.
+        total_time (float): Sum of the send times of successful messages.
+        throttle_time (float): Time spent waiting on rate limits.
+        active (boolean): True while the sender is running.
+    """
+    __slots__ = ('sender_id', 'sent', 'failed', 'total_time', 'throttle_time', 'active')
+
+    def __init__(self, sender_id: int):
+        self.sender_id = sender_id
+        self.sent = 0
+        self.failed = 0
+        self.total_time = 0.0
+        self.throttle_time = 0.0
+        self.active = False
+
+    @property
+    def attempts(self) -> int:
+        return self.sent + self.failed
+
+    def failure_rate(self) -> float:
+        """
+        Returns:
+            float: failed share of all attempts, 0 before the first attempt
+        """
+        return self.failed / self.attempts if self.attempts else 0.0
+
+    def merge(self, other: "SenderCounters"):
+        self.sent += other.sent
+        self.failed += other.failed
+        self.total_time += other.total_time
+        self.throttle_time += other.throttle_time
+        self.active = self.active or other.active
+
+    def copy(self) -> "SenderCounters":
+        clone = SenderCounters.__new__(SenderCounters)
+        for name in self.__slots__:
+            setattr(clone, name, getattr(self, name))
+        return clone
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+class StatsDictCounters:
+    """
+    Counters that write straight into a shared stats dictionary, for senders created without a CounterRegistry.
+    Keeps code and tests that pass a plain dict to SenderModel working unchanged.
+
+    Attributes:
+        stats (dict): Shared stats dictionary.
+    """
+    __slots__ = ('stats', 'active')
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+        self.active = False
+
+    def _counter(key):
+        return property(lambda self: self.stats.get(key, 0),
+                        lambda self, value: self.stats.__setitem__(key, value))
+
+    sent = _counter('sent')
+    failed = _counter('failed')
+    total_time = _counter('total_time')
+    throttle_time = _counter('throttle_time')
+    del _counter
+
+class CounterRegistry:
+    """
+    Collection of per-sender counters. Registries of different threads or processes merge into one,
+    and collect() folds the counters into the totals of a stats dictionary for reporting.
+
+    Attributes:
+        offset (int): Added to sender IDs so registries of different shards do not collide when merged.
+        counters (dict): Sender ID (with offset) -> SenderCounters.
+    """
+
+    def __init__(self, offset: int = 0):
+        self.offset = offset
+        self.counters = {}
+
+    def counters_for(self, sender_id: int) -> SenderCounters:
+        """
+        Returns:
+            SenderCounters: counters of the sender, created on first use and kept if the ID is reused
+        """
+        key = self.offset + sender_id
+        counters = self.counters.get(key)
+        if counters is None:
+            counters = self.counters[key] = SenderCounters(key)
+        return counters
+
+    def __len__(self) -> int:
+        return len(self.counters)
+
+    def __iter__(self):
+        return iter(self.counters.values())
+
+    def collect(self, stats: dict):
+        """
+        Write the summed counters into stats as sent, failed, total_time and (if present) throttle_time
+
+        Args:
+            stats (dict): Stats dictionary read by the monitor and reports.
+        """
+        sent = failed = 0
+        total_time = throttle_time = 0.0
+        for counters in self.counters.values():
+            sent += counters.sent
+            failed += counters.failed
+            total_time += counters.total_time
+            throttle_time += counters.throttle_time
+        stats['sent'] = sent
+        stats['failed'] = failed
+        stats['total_time'] = total_time
+        if 'throttle_time' in stats:
+            stats['throttle_time'] = throttle_time
+
+    def sent_counts(self) -> dict:
+        """
+        Returns:
+            dict: sender ID -> messages sent so far, used to measure throughput between two ticks
+        """
+        return {key: counters.sent for key, counters in self.counters.items()}
+
+    def merge(self, other: "CounterRegistry"):
+        for key, counters in other.counters.items():
+            if key in self.counters:
+                self.counters[key].merge(counters)
+            else:
+                self.counters[key] = counters.copy()
+
+    def copy(self) -> "CounterRegistry":
+        clone = CounterRegistry(self.offset)
+        clone.counters = {key: counters.copy() for key, counters in self.counters.items()}
+        return clone
+
+def collect_counters(stats: dict):
+    """
+    Refresh the totals in stats from its per-sender counters, if it has any
+    """
+    registry = stats.get('senders')
+    if registry is not None:
+        registry.collect(stats)
+
+def find_outliers(values: dict, threshold: float = 3.5) -> dict:
+    """
+    Flag values far from the median using the modified z-score, which uses the median absolute
+    deviation (MAD) and so is not pulled around by the outliers themselves
+
+    Args:
+        values (dict): Key -> value.
+        threshold (float): Modified z-score above which a value is an outlier.
+
+    Returns:
+        dict: key -> modified z-score of each outlier, empty if values do not vary
+    """
+    if len(values) < 3:
+        return {}
+    median = statistics.median(values.values())
+    mad = statistics.median(abs(value - median) for value in values.values())
+    if mad == 0: #more than half the values are equal, fall back to the mean absolute deviation
+        mad = statistics.mean(abs(value - median) for value in values.values()) * 0.8453 #ratio of MAD to mean absolute deviation for normal data
+        if mad == 0:
+            return {}
+    scores = {key: 0.6745 * (value - median) / mad for key, value in values.items()}
+    return {key: score for key, score in scores.items() if abs(score) > threshold}
+
+def sender_summary(registry: CounterRegistry, previous_counts: dict, interval: float, min_attempts: int = 20) -> dict:
+    """
+    Per-sender throughput over the last interval and failure rate so far, for active senders, with outliers
+
+    Args:
+        registry (CounterRegistry): Counters of every sender.
+        previous_counts (dict): sent_counts() of the registry one interval ago.
+        interval (float): Time between the two readings.
+        min_attempts (int): Attempts a sender needs before its failure rate is judged.
+
+    Returns:
+        dict: 'throughput' and 'failure_rate' (sender ID -> value) and 'outliers' (sender ID -> reasons)
+    """
+    active = [counters for counters in registry if counters.active]
+    throughput = {c.sender_id: (c.sent - previous_counts.get(c.sender_id, 0)) / interval for c in active} if interval > 0 else {}
+    failure_rate = {c.sender_id: c.failure_rate() for c in active if c.attempts >= min_attempts}
+
+    outliers = {}
+    for sender_id, score in find_outliers(throughput).items():
+        outliers.setdefault(sender_id, []).append("slow" if score < 0 else "fast")
+    for sender_id, score in find_outliers(failure_rate).items():
+        if score > 0: #only unusually high failure rates are a problem
+            outliers.setdefault(sender_id, []).append("failing")
+    return {'throughput': throughput, 'failure_rate': failure_rate, 'outliers': outliers}
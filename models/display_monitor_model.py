@@ -2,8 +2,13 @@
 
 import asyncio
 from config import config
+from .latency_histogram_model import LatencyHistogram
+from .counters_model import collect_counters, sender_summary
 import time
 
+#stats keys of the stage histograms, in the order a message goes through them, with their display names
+STAGES = {'producer_time': "Producer", 'queue_wait': "Queue wait", 'service_time': "Service", 'total_latency': "Total"}
+
 def validate_stats(stats: dict):
     """
     Check to ensure that stats dictionary has the required keys for stats monitoring
@@ -15,25 +20,143 @@ def validate_stats(stats: dict):
     missing_keys = required_keys - stats.keys()
     if missing_keys:
         raise ValueError("Missing required stats keys")
+    if 'latency' in stats and not isinstance(stats['latency'], LatencyHistogram):
+        raise ValueError("Latency stats must be a LatencyHistogram")
+
+def format_stats(stats: dict) -> str:
+    """
+    Formats the sent, failed and average time figures shared by the monitor and final report,
+    followed by retry outcomes, pool size, time spent rate limited, latency percentiles, circuit breaker trips and dropped
+    arrivals when stats has them
+
+    Attributes:
+        stats (dict): A dictionary of relevant stats to be displayed
+    """
+    sent = stats.get('sent', 0)
+    failed = stats.get('failed', 0)
+    total_time = stats.get('total_time', 0.0)
+    avg_time = (total_time / sent) if sent > 0 else 0.0
+    line = f"Sent: {sent}, Failed: {failed}, Avg Time: {avg_time:.4f} seconds"
+
+    if 'dead_lettered' in stats: #retries enabled, failed counts failed attempts
+        line += (f", First Attempt: {stats['first_attempt_sent']}, After Retry: {stats['retry_sent']}"
+                 f", Dead-lettered: {stats['dead_lettered']}")
+
+    if 'active_senders' in stats: #autoscaled pool
+        line += f", Senders: {stats['active_senders']}"
+
+    if 'throttle_time' in stats: #rate limits enabled
+        line += f", Throttled: {stats['throttle_time']:.4f} seconds"
+
+    latency = stats.get('latency')
+    if latency is not None and latency.count > 0:
+        percentiles = ", ".join(f"p{q:g}: {latency.percentile(q):.4f}" for q in (50, 90, 99, 99.9))
+        line += f", Latency {percentiles}, max: {latency.max:.4f} seconds"
+
+    if 'breaker_trips' in stats: #health dispatch
+        line += f", Breaker Trips: {stats['breaker_trips']}, Shed: {stats['shed']}"
+
+    if stats.get('dropped'): #open-loop arrivals that found the queue full
+        line += f", Dropped: {stats['dropped']}"
+    return line
+
+def format_stages(stats: dict) -> str:
+    """
+    Formats the latency of each stage a message goes through: producer time until it was put on the queue, queue
+    wait, service time and end-to-end total. Each stage's share of the mean total shows which one the run is bound by
+
+    Attributes:
+        stats (dict): A dictionary of relevant stats to be displayed
 
-async def monitor_progress(stats: dict):
+    Returns:
+        str: one entry per stage with samples, empty if there are none
     """
-    Logs stats collected through senders in console
+    total = stats.get('total_latency')
+    total_mean = total.mean() if total is not None and total.count > 0 else 0.0
+    parts = []
+    for key, name in STAGES.items():
+        histogram = stats.get(key)
+        if histogram is None or histogram.count == 0:
+            continue
+        part = (f"{name} mean: {histogram.mean():.4f}, p50: {histogram.percentile(50):.4f}"
+                f", p99: {histogram.percentile(99):.4f}, max: {histogram.max:.4f}")
+        if key != 'total_latency' and total_mean > 0:
+            part += f" ({histogram.mean() / total_mean:.0%})"
+        parts.append(part)
+    return "; ".join(parts) + " seconds" if parts else ""
+
+def format_pool_history(history, elapsed: float) -> str:
+    """
+    Formats the sender pool size at each change, followed by the mean size and total sender-seconds
+
+    Attributes:
+        history (PoolHistory): Pool size over time
+        elapsed (float): Length of the run, closes the last step
+    """
+    steps = ", ".join(f"{when:.1f}s: {size}" for when, size in zip(history.times, history.sizes))
+    sender_seconds = history.sender_seconds(elapsed)
+    mean_size = sender_seconds / elapsed if elapsed > 0 else 0.0
+    return f"Pool size {steps}; mean {mean_size:.1f} senders, {sender_seconds:.1f} sender-seconds"
+
+def format_senders(summary: dict) -> str:
+    """
+    Formats the spread of per-sender throughput and failure rate, followed by outlier senders
+
+    Attributes:
+        summary (dict): Result of sender_summary for one monitor interval
+    """
+    throughput = sorted(summary['throughput'].values())
+    if not throughput:
+        return "No active senders"
+    line = (f"{len(throughput)} senders, msgs/sec median {throughput[len(throughput) // 2]:.2f}"
+            f" (min {throughput[0]:.2f}, max {throughput[-1]:.2f})")
+    failure_rates = sorted(summary['failure_rate'].values())
+    if failure_rates:
+        line += (f", failure rate median {failure_rates[len(failure_rates) // 2]:.1%}"
+                 f" (min {failure_rates[0]:.1%}, max {failure_rates[-1]:.1%})")
+    outliers = summary['outliers']
+    if outliers:
+        line += ", outliers: " + ", ".join(f"{sender_id} ({'/'.join(reasons)})" for sender_id, reasons in sorted(outliers.items()))
+    return line
+
+def format_queue(depth: int, maxsize: int = 0) -> str:
+    """
+    Formats queue occupancy, including the bound when the queue is bounded
+
+    Attributes:
+        depth (int): Number of items waiting in the queue
+        maxsize (int): Capacity of the queue, 0 when unbounded
+    """
+    return f"Queue: {depth}/{maxsize}" if maxsize > 0 else f"Queue: {depth}"
+
+async def monitor_progress(stats: dict, queue: asyncio.Queue = None):
+    """
+    Logs stats collected through senders in console. If stats holds stage histograms, a second line shows the
+    latency of each stage. If stats holds per-sender counters, they are merged into the totals on every tick and
+    another line shows per-sender throughput, failure rates and outliers
 
     Attributes:
         stats (dict): A dictionary of relevant stats to be displayed
+        queue (asyncio.Queue): Optional message queue whose occupancy is displayed
     """
     validate_stats(stats)
     counter = 0
+    registry = stats.get('senders') #per-sender counters, if the senders keep their own
+    previous_counts = registry.sent_counts() if registry is not None else {}
 
     while True:
         await asyncio.sleep(config.monitor_interval)
         counter +=1
         current_time = counter * config.monitor_interval #keep track of time elapsed
-
-        sent = stats.get('sent', 0)
-        failed = stats.get('failed', 0)
-        total_time = stats.get('total_time', 0.0)
-        avg_time = (total_time / sent) if sent > 0 else 0.0
-        print(f"[Monitor] {current_time}s, Sent: {sent}, Failed: {failed}, Avg Time: {avg_time:.4f} seconds")
+        collect_counters(stats) #merge per-sender counters into the totals
+        line = f"[Monitor] {current_time}s, {format_stats(stats)}"
+        if queue is not None:
+            line += f", {format_queue(queue.qsize(), queue.maxsize)}"
+        print(line)
+        stages = format_stages(stats)
+        if stages:
+            print(f"[Stages] {current_time}s, {stages}")
+        if registry is not None:
+            print(f"[Senders] {current_time}s, {format_senders(sender_summary(registry, previous_counts, config.monitor_interval))}")
+            previous_counts = registry.sent_counts()
 
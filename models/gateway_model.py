@@ -0,0 +1,307 @@
+import asyncio
+import collections
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+MAX_HEADER_BYTES = 8192 #request or status line plus headers
+SEND_PATH = b"/send"
+
+class GatewayServer:
+    """
+    Local stand-in for an SMS gateway: an HTTP/1.1 server on the event loop that answers POST /send with 200 OK or,
+    to inject failures, 503 Service Unavailable, after an exponential delay. Connections are kept alive and requests
+    may be pipelined: each request's delay starts when it is read, so pipelined requests are served concurrently,
+    and responses go back in request order as HTTP/1.1 requires. A new connection answers nothing until
+    connect_time has passed, which stands in for the TCP and TLS handshakes of a remote gateway.
+
+    Attributes:
+        mean_time (float): Average delay of a response in an exp. distribution, 0 for no delay.
+        failure_rate (float): Chance of answering 503.
+        connect_time (float): Delay before the first response on a new connection.
+        rng: Source of delays and failures, the random module or a BufferedRandom stream.
+        requests (int): Requests answered or being answered.
+        connections (int): Connections accepted.
+        server (asyncio.Server): Listening server while started.
+    """
+
+    def __init__(self, mean_time: float = 0.0, failure_rate: float = 0.0, connect_time: float = 0.0, rng = None):
+        self.mean_time = mean_time
+        self.failure_rate = failure_rate
+        self.connect_time = connect_time
+        self.rng = rng if rng is not None else random
+        self.requests = 0
+        self.connections = 0
+        self.server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """
+        Start listening for requests
+
+        Args:
+            host (str): Interface to bind, localhost by default.
+            port (int): Port to bind, 0 to pick a free one.
+
+        Returns:
+            int: port the gateway listens on
+        """
+        self.server = await asyncio.start_server(self._handle, host, port, limit = MAX_HEADER_BYTES)
+        port = self.server.sockets[0].getsockname()[1]
+        logger.info("Gateway stub listening on %s:%d", host, port)
+        return port
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        self.connections += 1
+        ready = loop.time() + self.connect_time
+        responses = collections.deque() #(due, status, close) in request order
+        wakeup = asyncio.Event()
+        responder = asyncio.create_task(self._respond(writer, responses, wakeup))
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                method, path = (head.split(b" ", 2) + [b"", b""])[:2]
+                length, close = parse_headers(head)
+                if length:
+                    await reader.readexactly(length)
+                self.requests += 1
+                delay = self.rng.expovariate(1.0/self.mean_time) if self.mean_time > 0 else 0.0
+                if method != b"POST" or path != SEND_PATH:
+                    status = "404 Not Found"
+                elif self.rng.random() < self.failure_rate:
+                    status = "503 Service Unavailable"
+                else:
+                    status = "200 OK"
+                responses.append((max(loop.time(), ready) + delay, status, close))
+                wakeup.set()
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass #client closed the connection or sent an oversized request
+        finally:
+            responses.append(None)
+            wakeup.set()
+            await responder
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, responses: collections.deque, wakeup: asyncio.Event):
+        """
+        Write the responses of one connection in request order, each once its delay has passed
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                while not responses:
+                    wakeup.clear()
+                    await wakeup.wait()
+                response = responses.popleft()
+                if response is None:
+                    break
+                due, status, close = response
+                if due > loop.time():
+                    await asyncio.sleep(due - loop.time())
+                writer.write(f"HTTP/1.1 {status}\r\nContent-Length: 0\r\n"
+                             f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+def parse_headers(head: bytes) -> tuple:
+    """
+    Returns:
+        tuple: Content-Length and whether the connection closes after this message, from a request or status line
+            and its headers
+    """
+    length, close = 0, False
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"connection":
+            close = value.strip().lower() == b"close"
+    return length, close
+
+class GatewayConnection:
+    """
+    One keep-alive connection to a gateway. Requests are written without waiting for earlier responses
+    (pipelining), and a reader task matches responses to requests in order.
+
+    Attributes:
+        reader (asyncio.StreamReader): Response stream.
+        writer (asyncio.StreamWriter): Request stream.
+        pending (collections.deque): Futures of requests awaiting their response, oldest first.
+        closed (boolean): True once the connection failed or was closed.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, on_response = None):
+        self.reader = reader
+        self.writer = writer
+        self.pending = collections.deque()
+        self.closed = False
+        self._on_response = on_response
+        self._reader_task = asyncio.create_task(self._read_responses())
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.pending)
+
+    def send(self, request: bytes) -> asyncio.Future:
+        """
+        Write a request
+
+        Returns:
+            asyncio.Future: True if the gateway answered 2xx
+        """
+        future = asyncio.get_running_loop().create_future()
+        if self.closed:
+            future.set_exception(ConnectionError("Gateway connection closed"))
+            return future
+        self.pending.append(future)
+        self.writer.write(request) #buffered, the pipeline depth bounds how much is outstanding
+        return future
+
+    async def _read_responses(self):
+        try:
+            while True:
+                head = await self.reader.readuntil(b"\r\n\r\n")
+                length, close = parse_headers(head)
+                if length:
+                    await self.reader.readexactly(length)
+                future = self.pending.popleft()
+                if not future.done(): #the request was not cancelled meanwhile
+                    future.set_result(head[9:10] == b"2") #"HTTP/1.1 2xx"
+                if self._on_response is not None:
+                    self._on_response(self)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, IndexError):
+            pass
+        finally:
+            self.closed = True
+            while self.pending:
+                future = self.pending.popleft()
+                if not future.done():
+                    future.set_exception(ConnectionError("Gateway connection closed"))
+            self.writer.close()
+            if self._on_response is not None: #requests waiting for room can go to another connection
+                self._on_response(self)
+
+    async def close(self):
+        self.writer.close()
+        self._reader_task.cancel()
+        try:
+            await self._reader_task
+        except asyncio.CancelledError:
+            pass
+
+class GatewayPool:
+    """
+    Client side of the gateway, shared by the senders. A bounded pool of keep-alive connections, opened as they are
+    needed, with up to pipeline_depth requests in flight on each. A request goes to an idle connection first, then
+    to a new one while the pool is not full, and otherwise to the least busy connection with room, waiting if
+    none has any. With size 0 there is no pool: every request opens its own connection and closes it, paying the
+    connection setup each time.
+
+    Attributes:
+        host (str): Gateway address.
+        port (int): Gateway port.
+        size (int): Most connections kept open, 0 for a new connection per request.
+        pipeline_depth (int): Most requests in flight on one connection, 1 for keep-alive without pipelining.
+        connections (list): Open GatewayConnections.
+        opened (int): Connections opened so far.
+    """
+
+    def __init__(self, host: str, port: int, size: int = 8, pipeline_depth: int = 16):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.pipeline_depth = max(1, pipeline_depth)
+        self.connections = []
+        self.opened = 0
+        self._opening = 0
+        self._waiters = collections.deque()
+
+    async def send(self, content: str) -> bool:
+        """
+        Submit one message to the gateway
+
+        Args:
+            content (str): Message text, sent as the request body.
+
+        Returns:
+            bool: True if the gateway accepted the message, False if it refused it or the connection failed
+        """
+        body = content.encode() if content else b""
+        try:
+            if not self.size:
+                return await self._send_once(body)
+            connection = await self._acquire()
+            return await connection.send(self._request(body, False))
+        except (ConnectionError, OSError) as e:
+            logger.warning("Gateway request failed: %s", e)
+            return False
+
+    def _request(self, body: bytes, close: bool) -> bytes:
+        return (f"POST /send HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n").encode() + body
+
+    async def _send_once(self, body: bytes) -> bool:
+        reader, writer = await asyncio.open_connection(self.host, self.port, limit = MAX_HEADER_BYTES)
+        self.opened += 1
+        connection = GatewayConnection(reader, writer)
+        try:
+            return await connection.send(self._request(body, True))
+        finally:
+            await connection.close()
+
+    async def _acquire(self) -> GatewayConnection:
+        """
+        Returns:
+            GatewayConnection: connection with room for one more request
+        """
+        while True:
+            self.connections = [connection for connection in self.connections if not connection.closed]
+            least_busy = min(self.connections, key = lambda connection: connection.in_flight, default = None)
+            if least_busy is not None and least_busy.in_flight == 0:
+                return least_busy
+            if len(self.connections) + self._opening < self.size:
+                return await self._open()
+            if least_busy is not None and least_busy.in_flight < self.pipeline_depth:
+                return least_busy
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+
+    async def _open(self) -> GatewayConnection:
+        self._opening += 1
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port, limit = MAX_HEADER_BYTES)
+        finally:
+            self._opening -= 1
+        self.opened += 1
+        connection = GatewayConnection(reader, writer, self._response_received)
+        self.connections.append(connection)
+        return connection
+
+    def _response_received(self, connection: GatewayConnection):
+        """
+        A connection has room again, wake one request waiting for it
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    async def close(self):
+        for connection in self.connections:
+            await connection.close()
+        self.connections = []
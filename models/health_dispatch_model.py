@@ -0,0 +1,439 @@
+import asyncio
+import itertools
+import logging
+import random
+import time
+from collections import deque
+from .counters_model import CounterRegistry
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+LATENCY_WEIGHT = 0.2 #weight of the newest sample in the moving averages of send time
+
+def build_sender_profiles(num_senders: int, failure_rate: float, mean_time: float, pools: dict = None) -> list:
+    """
+    Failure rate and mean send time of each sender: those of the sender pool it belongs to, else the defaults.
+    Pool members are assigned in order of sender ID, like carrier pools.
+
+    Args:
+        num_senders (int): Number of senders.
+        failure_rate (float): Failure rate of senders outside every pool.
+        mean_time (float): Mean send time of senders outside every pool.
+        pools (dict): Pool name -> {"senders": number of senders, "failure": failure rate, "mean_time": mean send time},
+            a pool without failure or mean_time keeps the default.
+
+    Returns:
+        list: (failure_rate, mean_time) of each sender
+    """
+    profiles = [(failure_rate, mean_time)] * num_senders
+    next_sender = 0
+    for name, pool in (pools or {}).items():
+        profile = (pool.get('failure', failure_rate), pool.get('mean_time', mean_time))
+        members = range(next_sender, min(next_sender + pool['senders'], num_senders))
+        for i in members:
+            profiles[i] = profile
+        next_sender = members.stop
+        logger.info(f"Sender pool {name}: {len(members)} senders failing {profile[0]:.0%} in {profile[1]} seconds")
+    return profiles
+
+class CircuitBreaker:
+    """
+    Trips when too many of a sender's recent attempts fail. An open breaker sheds the sender's traffic for cooldown
+    seconds, then lets a single probe through (half open): a successful probe closes it, a failed one opens it again
+    for another cooldown.
+
+    Attributes:
+        window (int): Number of recent attempts judged.
+        threshold (float): Failure rate over a full window above which the breaker opens.
+        cooldown (float): Time the breaker stays open before a probe.
+        state (str): CLOSED, OPEN or HALF_OPEN.
+        opened_at (float): Loop time the breaker last opened.
+        probing (boolean): True while the probe of a half-open breaker is out.
+        trips (int): Number of times the breaker opened.
+    """
+
+    def __init__(self, window: int = 20, threshold: float = 0.5, cooldown: float = 5.0):
+        self.window = window
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.opened_at = None
+        self.probing = False
+        self.trips = 0
+        self._outcomes = deque(maxlen = window) #True for each recent success
+        self._failures = 0
+
+    def success_rate(self) -> float:
+        """
+        Returns:
+            float: share of recent attempts that succeeded, smoothed so that a sender without attempts scores 0.5
+        """
+        return (len(self._outcomes) - self._failures + 1) / (len(self._outcomes) + 2)
+
+    def admits(self, now: float) -> bool:
+        """
+        Returns:
+            bool: True if the sender may be given a message, moving an open breaker whose cooldown is over to half open
+        """
+        if self.state == OPEN and now - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+        return self.state == CLOSED or (self.state == HALF_OPEN and not self.probing)
+
+    def record(self, sent: int, failed: int, now: float) -> bool:
+        """
+        Record the outcome of attempts
+
+        Args:
+            sent (int): Attempts that succeeded.
+            failed (int): Attempts that failed.
+            now (float): Current loop time.
+
+        Returns:
+            bool: True if the breaker opened
+        """
+        if self.state == OPEN: #attempts started before it opened
+            return False
+        if self.state == HALF_OPEN:
+            self.probing = False
+            if failed > self.threshold * (sent + failed):
+                self._open(now)
+                return True
+            self.state = CLOSED #recovered, judged afresh
+            self._outcomes.clear()
+            self._failures = 0
+            return False
+        for success in itertools.chain(itertools.repeat(True, sent), itertools.repeat(False, failed)):
+            if len(self._outcomes) == self.window and not self._outcomes[0]: #oldest outcome drops out
+                self._failures -= 1
+            self._outcomes.append(success)
+            self._failures += not success
+        if len(self._outcomes) == self.window and self._failures > self.threshold * self.window:
+            self._open(now)
+            return True
+        return False
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self.opened_at = now
+        self.trips += 1
+
+class SenderHealth:
+    """
+    What the dispatcher knows about one sender.
+
+    Attributes:
+        counters (SenderCounters): The sender's own counters, whose changes give the outcome of its attempts.
+        breaker (CircuitBreaker): The sender's circuit breaker.
+        queue (deque): Items routed to the sender and not yet taken.
+        taken (deque): Loop time each item still being sent was taken, None for a sentinel.
+        latency (float): Moving average of the time per attempt, None before the first.
+        stopped (boolean): True once the sender took a sentinel.
+    """
+    __slots__ = ('counters', 'breaker', 'queue', 'taken', 'latency', 'stopped', 'reported')
+
+    def __init__(self, counters, breaker: CircuitBreaker):
+        self.counters = counters
+        self.breaker = breaker
+        self.queue = deque()
+        self.taken = deque()
+        self.latency = None
+        self.stopped = False
+        self.reported = (0, 0) #sent and failed when last observed
+
+    @property
+    def load(self) -> int:
+        return len(self.queue) + len(self.taken)
+
+class RoutedQueue:
+    """
+    One sender's view of a HealthAwareDispatcher. Offers the parts of the asyncio.Queue interface that SenderModel
+    uses, so senders run unchanged.
+
+    Attributes:
+        dispatcher (HealthAwareDispatcher): The dispatcher routing items to this sender.
+        index (int): Position of the sender.
+    """
+
+    def __init__(self, dispatcher: "HealthAwareDispatcher", index: int):
+        self.dispatcher = dispatcher
+        self.index = index
+
+    async def get(self):
+        return await self.dispatcher.get(self.index)
+
+    def get_nowait(self):
+        return self.dispatcher.get_nowait(self.index)
+
+    def task_done(self):
+        self.dispatcher.task_done(self.index)
+
+    def qsize(self) -> int:
+        return len(self.dispatcher.senders[self.index].queue)
+
+    def empty(self) -> bool:
+        return self.dispatcher.empty()
+
+class HealthAwareDispatcher:
+    """
+    Routes every item to one sender chosen by how well the senders are doing, rather than letting them all take from
+    one queue. Each choice compares two senders, the one that just freed up (if any) or a random one and another
+    random one (power of two choices), and picks the lower expected cost: items queued or being sent, times its
+    average time per attempt, divided by its recent success rate. A sender holds at most depth items, queued or being
+    sent, so routing follows current health; the rest wait in a shared backlog.
+
+    Each sender has a circuit breaker. When it trips, the sender's queued items go back to the front of the backlog
+    for other senders (shed), and it gets nothing until its cooldown is over and a single probe has succeeded.
+    Outcomes are read from the senders' own counters when they mark items done, so senders need no changes.
+    Sentinel values (None) are held back until the backlog is empty.
+
+    Attributes:
+        senders (list): SenderHealth of each sender.
+        backlog (deque): Items not yet routed.
+        depth (int): Most items queued at or being sent by one sender.
+        maxsize (int): Always 0, the dispatcher is unbounded.
+        stats (dict): Stats dictionary where breaker_trips and shed are counted, None to leave them out.
+        rng (random.Random): Picks the senders to compare, the random module if none is given.
+        wakeups (int): Number of times a waiting sender was woken.
+    """
+
+    def __init__(self, num_senders: int, registry: CounterRegistry, depth: int = 2, window: int = 20,
+                 threshold: float = 0.5, cooldown: float = 5.0, stats: dict = None, rng: random.Random = None):
+        self.senders = [SenderHealth(registry.counters_for(i), CircuitBreaker(window, threshold, cooldown))
+                        for i in range(num_senders)]
+        self.backlog = deque()
+        self.depth = max(1, depth)
+        self.maxsize = 0
+        self.stats = stats
+        self.rng = rng if rng is not None else random
+        self.wakeups = 0
+        self.mean_latency = None #moving average over every sender, stands in for senders not yet measured
+        self._size = 0
+        self._sentinels = 0
+        self._waiters = {} #sender index -> future of a sender waiting for work
+        self._unfinished = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+        if stats is not None:
+            stats.setdefault('breaker_trips', 0)
+            stats.setdefault('shed', 0)
+
+    def queue_for(self, index: int) -> RoutedQueue:
+        """
+        Returns:
+            RoutedQueue: queue-like view for the sender at index
+        """
+        return RoutedQueue(self, index)
+
+    def qsize(self) -> int:
+        return self._size + self._sentinels
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def put_nowait(self, item):
+        """
+        Route an item to a sender, or hold a sentinel until the backlog is empty
+
+        Args:
+            item: Message, MessageBatch or None sentinel.
+        """
+        self._unfinished += 1
+        self._finished.clear()
+        if item is None:
+            self._sentinels += 1
+            self._release_sentinels()
+            return
+        self.backlog.append(item)
+        self._size += 1
+        if len(self.backlog) == 1: #a longer backlog means no sender had room when the last item was put
+            self._dispatch()
+
+    async def put(self, item):
+        self.put_nowait(item)
+
+    def get_nowait(self, index: int):
+        """
+        Take the next item routed to a sender, or a sentinel once there is no work left for it
+
+        Args:
+            index (int): Sender asking for work.
+        """
+        sender = self.senders[index]
+        if not sender.queue and self.backlog:
+            self._dispatch(index)
+        if sender.queue:
+            self._size -= 1
+            sender.taken.append(_loop_time())
+            return sender.queue.popleft()
+        if self._sentinels and not self.backlog:
+            self._sentinels -= 1
+            sender.stopped = True
+            sender.taken.append(None)
+            return None
+        raise asyncio.QueueEmpty
+
+    async def get(self, index: int):
+        """
+        Take the next item routed to a sender, waiting if there is none
+
+        Args:
+            index (int): Sender asking for work.
+        """
+        while True:
+            try:
+                return self.get_nowait(index)
+            except asyncio.QueueEmpty:
+                pass
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters[index] = waiter
+            try:
+                await waiter
+            finally:
+                if self._waiters.get(index) is waiter:
+                    del self._waiters[index]
+
+    def task_done(self, index: int = None):
+        """
+        Mark the oldest item a sender took as done, judge the attempts it made since the last one and route more work
+
+        Args:
+            index (int): Sender the item was taken by.
+        """
+        if self._unfinished <= 0:
+            raise ValueError('task_done() called too many times')
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._finished.set()
+        if index is None:
+            return
+        sender = self.senders[index]
+        taken = sender.taken.popleft() if sender.taken else None
+        if taken is not None:
+            self._observe(index, taken)
+        if self.backlog:
+            self._dispatch(index)
+
+    async def join(self):
+        await self._finished.wait()
+
+    def cost(self, index: int) -> float:
+        """
+        Returns:
+            float: expected time for a sender to get one more item through, from its load, time per attempt and
+                success rate
+        """
+        sender = self.senders[index]
+        latency = sender.latency if sender.latency is not None else self.mean_latency
+        latency = max(latency, 1e-9) if latency is not None else 1.0 #zero-time senders are still told apart by success
+        return (sender.load + 1) * latency / sender.breaker.success_rate()
+
+    def _available(self, sender: SenderHealth, now: float) -> bool:
+        return (not sender.stopped and len(sender.queue) + len(sender.taken) < self.depth
+                and sender.breaker.admits(now))
+
+    def _choose(self, hint: int = None, now: float = None) -> int:
+        """
+        Args:
+            hint (int): Sender that just made room, compared with one random sender. Only it can have room while
+                there is a backlog, so None is returned without a search if it has none.
+
+        Returns:
+            int: cheaper of two available senders, None if no sender is
+        """
+        if hint is not None:
+            if not self._available(self.senders[hint], now):
+                return None
+            picks, draws = [hint], 1 #compared with one random sender, kept if that one has no room
+        else:
+            picks, draws = [], 4 #a few random draws, a full scan only if they all miss
+        for _ in range(draws):
+            if len(picks) == 2:
+                break
+            index = self.rng.randrange(len(self.senders))
+            if index not in picks and self._available(self.senders[index], now):
+                picks.append(index)
+        if not picks:
+            available = [i for i, sender in enumerate(self.senders) if self._available(sender, now)]
+            if not available:
+                return None
+            picks = self.rng.sample(available, min(2, len(available)))
+        return min(picks, key = self.cost)
+
+    def _dispatch(self, hint: int = None):
+        """
+        Route backlog items while some sender has room, or until the hinted sender's room is filled, then hand out
+        sentinels if the backlog is empty
+        """
+        now = _loop_time()
+        while self.backlog:
+            index = self._choose(hint, now)
+            if index is None:
+                break
+            sender = self.senders[index]
+            if sender.breaker.state == HALF_OPEN:
+                sender.breaker.probing = True
+            sender.queue.append(self.backlog.popleft())
+            self._wake(index)
+            if index == hint:
+                break
+        self._release_sentinels()
+
+    def _observe(self, index: int, taken: float):
+        """
+        Feed the attempts a sender made since it last marked an item done to its breaker and moving averages
+        """
+        sender = self.senders[index]
+        sent, failed = sender.counters.sent, sender.counters.failed
+        previous_sent, previous_failed = sender.reported
+        sender.reported = (sent, failed)
+        sent, failed = sent - previous_sent, failed - previous_failed
+        if not sent + failed:
+            return
+        now = _loop_time()
+        latency = (now - taken) / (sent + failed)
+        sender.latency = latency if sender.latency is None else sender.latency + LATENCY_WEIGHT * (latency - sender.latency)
+        self.mean_latency = latency if self.mean_latency is None else self.mean_latency + LATENCY_WEIGHT * (latency - self.mean_latency)
+        if sender.breaker.record(sent, failed, now):
+            self._trip(index)
+
+    def _trip(self, index: int):
+        """
+        A sender's breaker opened: move its queued items back to the backlog and retry routing after the cooldown
+        """
+        sender = self.senders[index]
+        shed = len(sender.queue)
+        self.backlog.extendleft(reversed(sender.queue)) #ahead of newer items, in their order
+        sender.queue.clear()
+        logger.warning("Sender %d: circuit breaker opened, %d queued messages shed", index, shed)
+        if self.stats is not None:
+            self.stats['breaker_trips'] += 1
+            self.stats['shed'] += shed
+        try:
+            asyncio.get_running_loop().call_later(sender.breaker.cooldown, self._dispatch)
+        except RuntimeError: #no loop, routing resumes with the next put or task_done
+            pass
+
+    def _release_sentinels(self):
+        """
+        Once nothing is left to route, wake every waiting sender so they can take the sentinels
+        """
+        if self._sentinels and not self.backlog:
+            for index in list(self._waiters):
+                self._wake(index)
+
+    def _wake(self, index: int):
+        waiter = self._waiters.pop(index, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+            self.wakeups += 1
+
+def _loop_time() -> float:
+    """
+    Returns:
+        float: time of the running event loop, which may be virtual, or the monotonic clock outside one
+    """
+    try:
+        return asyncio.get_running_loop().time()
+    except RuntimeError:
+        return time.monotonic()
@@ -0,0 +1,154 @@
+import math
+from array import array
+
+_log = math.log #module-level binding keeps record() cheap
+
+class LatencyHistogram:
+    """
+    Fixed-memory latency histogram with logarithmic buckets. Recording is O(1) and only updates
+    preallocated counters, and histograms with the same layout can be merged across senders or processes.
+    Reported percentiles are bucket upper bounds, accurate to within one bucket (about 2% by default).
+
+    Attributes:
+        lowest (float): Smallest latency in seconds that gets its own bucket, anything faster lands in the first bucket.
+        buckets_per_octave (int): Number of buckets each time the latency doubles.
+        counts (array): Number of samples in each bucket.
+        count (int): Total number of samples recorded.
+        total (float): Sum of all recorded latencies.
+        max (float): Largest latency recorded.
+    """
+    __slots__ = ('lowest', 'buckets_per_octave', 'counts', 'count', 'total', 'max', '_scale', '_last', '_inv_lowest')
+
+    def __init__(self, lowest: float = 1e-6, highest: float = 1e5, buckets_per_octave: int = 32):
+        self.lowest = lowest
+        self.buckets_per_octave = buckets_per_octave
+        num_buckets = int(math.ceil(math.log2(highest / lowest) * buckets_per_octave)) + 1
+        self.counts = array('q', bytes(8 * num_buckets))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._scale = buckets_per_octave / math.log(2)
+        self._inv_lowest = 1.0 / lowest
+        self._last = num_buckets - 1
+
+    def record(self, value: float, n: int = 1):
+        """
+        Add n samples of the same latency
+
+        Args:
+            value (float): Latency in seconds.
+            n (int): Number of samples with this latency.
+        """
+        if value > self.lowest:
+            index = int(_log(value * self._inv_lowest) * self._scale)
+            if index > self._last:
+                index = self._last
+        else:
+            index = 0
+        self.counts[index] += n
+        self.count += n
+        self.total += value * n
+        if value > self.max:
+            self.max = value
+
+    def bucket_upper_bound(self, index: int) -> float:
+        """
+        Returns:
+            float: largest latency that falls into the bucket
+        """
+        return self.lowest * 2 ** ((index + 1) / self.buckets_per_octave)
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimate a latency percentile
+
+        Args:
+            q (float): Percentile between 0 and 100.
+
+        Returns:
+            float: upper bound of the bucket holding the percentile, never above the recorded max
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index == self._last: #overflow bucket has no upper bound
+                    return self.max
+                return min(self.bucket_upper_bound(index), self.max)
+        return self.max
+
+    def count_at_or_below(self, value: float) -> int:
+        """
+        Returns:
+            int: number of samples in buckets whose upper bound is at most value
+        """
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if self.bucket_upper_bound(index) > value:
+                break
+            seen += bucket_count
+        return seen
+
+    def cumulative_counts(self, bounds: list) -> list:
+        """
+        Count samples at or below each of several latencies in one pass over the buckets
+
+        Args:
+            bounds (list): Latencies in seconds, in increasing order.
+
+        Returns:
+            list: for each bound, the number of samples in buckets whose upper bound is at most that bound
+        """
+        result = []
+        seen = 0
+        index = 0
+        for bound in bounds:
+            while index < self._last and self.bucket_upper_bound(index) <= bound:
+                seen += self.counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+    def mean(self) -> float:
+        """
+        Returns:
+            float: exact mean of recorded latencies
+        """
+        return self.total / self.count if self.count else 0.0
+
+    def merge(self, other: "LatencyHistogram"):
+        """
+        Add the samples of another histogram with the same bucket layout
+
+        Args:
+            other (LatencyHistogram): Histogram to merge into this one.
+        """
+        if (other.lowest, other.buckets_per_octave, len(other.counts)) != (self.lowest, self.buckets_per_octave, len(self.counts)):
+            raise ValueError("Cannot merge histograms with different bucket layouts")
+        for index, bucket_count in enumerate(other.counts):
+            if bucket_count:
+                self.counts[index] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def copy(self) -> "LatencyHistogram":
+        """
+        Returns:
+            LatencyHistogram: independent histogram with the same samples
+        """
+        clone = LatencyHistogram.__new__(LatencyHistogram)
+        for name in self.__slots__:
+            setattr(clone, name, getattr(self, name))
+        clone.counts = array('q', self.counts)
+        return clone
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
@@ -0,0 +1,149 @@
+import logging
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+class LogSampler:
+    """
+    Counter deciding which of many similar log lines to emit, so per-message success lines
+    can stay on in production at a fraction of the cost. Failures should not be sampled.
+
+    Attributes:
+        every (int): Emit one in every this many calls, 1 for all and 0 for none.
+    """
+    __slots__ = ('every', '_count')
+
+    def __init__(self, every: int = 1):
+        self.every = every
+        self._count = 0
+
+    def sample(self) -> bool:
+        """
+        Returns:
+            bool: True if this occurrence should be logged
+        """
+        if self.every <= 0:
+            return False
+        self._count += 1
+        if self._count >= self.every:
+            self._count = 0
+            return True
+        return False
+
+class BatchingQueueHandler(QueueHandler):
+    """
+    QueueHandler that hands records to the writer thread in blocks, unformatted. Enqueuing one record at a time
+    wakes the writer thread for every record, and on a busy interpreter the two threads then keep trading the GIL.
+    A block is passed on once it is full, once its oldest record is flush_interval seconds old, or as soon as
+    an ERROR is logged. The age is checked when the next record arrives and, for a block nothing else is logged
+    after, by the writer thread when it wakes from waiting (see BatchListener). Records only cross threads within
+    this process, so they are passed on as they are and message formatting happens on the writer thread.
+
+    Attributes:
+        capacity (int): Records collected before a block is handed over.
+        flush_interval (float): Longest time in seconds a record waits in a partly filled block.
+    """
+
+    def __init__(self, records: queue.SimpleQueue, capacity: int = 256, flush_interval: float = 0.5):
+        super().__init__(records)
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self._block = []
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        block = self._block
+        block.append(record)
+        if len(block) >= self.capacity or record.levelno >= logging.ERROR or record.created - block[0].created >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._block:
+                self.queue.put_nowait(self._block)
+                self._block = []
+        finally:
+            self.release()
+
+    def flush_stale(self) -> float:
+        """
+        Hand over the partly filled block if its oldest record is flush_interval seconds old
+
+        Returns:
+            float: seconds until the block as it is now is due, flush_interval if nothing is waiting
+        """
+        self.acquire()
+        try:
+            if self._block:
+                age = time.time() - self._block[0].created
+                if age < self.flush_interval:
+                    return self.flush_interval - age
+                self.queue.put_nowait(self._block)
+                self._block = []
+            return self.flush_interval
+        finally:
+            self.release()
+
+class BatchListener(QueueListener):
+    """
+    QueueListener for blocks of records from a BatchingQueueHandler. While no block arrives it wakes when
+    the source's partly filled block is due and takes it, so a lone record is written within flush_interval.
+    Stopping it first hands over the partly filled block, so nothing logged before stop() is lost.
+    """
+
+    def __init__(self, records: queue.SimpleQueue, source: BatchingQueueHandler, *handlers):
+        super().__init__(records, *handlers, respect_handler_level = True)
+        self.source = source
+
+    def dequeue(self, block: bool):
+        timeout = self.source.flush_interval if self.source.flush_interval > 0 else None
+        while True:
+            try:
+                return self.queue.get(block, timeout)
+            except queue.Empty:
+                if not block:
+                    raise
+                timeout = self.source.flush_stale() #hands the block over, the next get returns it
+
+    def handle(self, block: list):
+        for record in block:
+            super().handle(record)
+
+    def stop(self):
+        self.source.flush()
+        super().stop()
+
+def configure_logging(level: str = "WARNING", stream = None, capacity: int = 256, flush_interval: float = 0.5) -> BatchListener:
+    """
+    Route all logging through an in-memory queue to a background writer thread, so callers only pay
+    for creating a record. Replaces any handlers already installed on the root logger.
+
+    Args:
+        level (str): Name of the lowest level that is logged, such as "INFO" or "WARNING".
+        stream: Where the writer thread writes formatted lines, stderr if None.
+        capacity (int): Records handed to the writer thread at a time.
+        flush_interval (float): Longest time in seconds a record waits before it is handed over.
+
+    Returns:
+        BatchListener: the started writer, stop it to flush remaining records at shutdown
+    """
+    handler = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    records = queue.SimpleQueue()
+    source = BatchingQueueHandler(records, capacity, flush_interval)
+    listener = BatchListener(records, source, handler)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(source)
+    root.setLevel(logging.getLevelName(level.upper()))
+    logging.disable(logging.NOTSET)
+    listener.start()
+    return listener
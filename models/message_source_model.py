@@ -0,0 +1,146 @@
+import asyncio
+import collections
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MessageSource:
+    """
+    Pull-based replacement for the message queue. Senders take items straight from an iterator that creates them
+    on demand, so nothing is produced ahead of the senders and memory stays flat however many messages a run has.
+    Retries are put back with put() like on a queue and are handed out before new items.
+
+    The source is exhausted, and every sender's pull ends, once the iterator is used up, no retry is waiting or
+    scheduled, and every item handed out has been marked done (a send in flight may still fail and be retried),
+    so no sentinels are needed. Iterators are pulled directly; async iterators (such as async generators) are
+    pulled by one sender at a time.
+
+    Attributes:
+        items: Iterator or async iterator of Message and MessageBatch items.
+        retry_scheduler (RetryScheduler): Scheduler putting retries back on this source, None without retries.
+        in_flight (int): Items handed out and not yet marked done.
+        exhausted (boolean): True once the iterator is used up.
+        maxsize (int): Always 0, nothing is buffered.
+    """
+    maxsize = 0
+
+    def __init__(self, items, retry_scheduler = None):
+        self.is_async = hasattr(items, '__aiter__')
+        self.items = items.__aiter__() if self.is_async else iter(items)
+        self.retry_scheduler = retry_scheduler
+        self.in_flight = 0
+        self.exhausted = False
+        self._ready = collections.deque() #retries due to be sent again
+        self._waiters = collections.deque() #futures of senders waiting for a retry or for the end
+        self._lock = asyncio.Lock() if self.is_async else None
+
+    def qsize(self) -> int:
+        """
+        Returns:
+            int: retries waiting to be taken, new items are only created when taken
+        """
+        return len(self._ready)
+
+    def done(self) -> bool:
+        """
+        Returns:
+            bool: True once no item is left to hand out and none can come back as a retry
+        """
+        return (self.exhausted and not self._ready and not self.in_flight
+                and (self.retry_scheduler is None or not self.retry_scheduler.pending))
+
+    async def put(self, item):
+        """
+        Hand an item out again, used by the RetryScheduler
+        """
+        self._ready.append(item)
+        self._wake(1)
+
+    def get_nowait(self):
+        """
+        Take a retry or the next item of a plain iterator without waiting
+
+        Raises:
+            asyncio.QueueEmpty: if nothing can be taken at once
+        """
+        if self._ready:
+            self.in_flight += 1
+            return self._ready.popleft()
+        if not self.exhausted and not self.is_async:
+            item = next(self.items, None)
+            if item is not None:
+                self.in_flight += 1
+                return item
+            self._exhaust()
+        raise asyncio.QueueEmpty
+
+    async def get(self):
+        """
+        Take the next item, waiting for a retry once the iterator is used up
+
+        Raises:
+            StopAsyncIteration: once the source is done
+        """
+        while True:
+            if self._ready:
+                self.in_flight += 1
+                return self._ready.popleft()
+            if not self.exhausted:
+                item = await self._pull() if self.is_async else next(self.items, None)
+                if item is not None:
+                    self.in_flight += 1
+                    return item
+                self._exhaust()
+                continue
+            if self.done():
+                raise StopAsyncIteration
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif self._ready: #woken for a retry, pass it on to another sender
+                    self._wake(1)
+                raise
+
+    def task_done(self):
+        """
+        Mark an item taken with get or get_nowait as processed, after any retry of it was scheduled
+        """
+        self.in_flight -= 1
+        if self._waiters and self.done(): #the last send in flight ended the run
+            self._wake()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+    async def _pull(self):
+        async with self._lock: #async generators cannot be resumed by two senders at once
+            if self.exhausted:
+                return None
+            try:
+                return await self.items.__anext__()
+            except StopAsyncIteration:
+                return None
+
+    def _exhaust(self):
+        if not self.exhausted:
+            self.exhausted = True
+            logger.info("Message source exhausted")
+            self._wake()
+
+    def _wake(self, count: int = None):
+        """
+        Wake count waiting senders, all of them if None. A retry needs only one, the end of the source needs all.
+        """
+        if count is None:
+            count = len(self._waiters)
+        for _ in range(min(count, len(self._waiters))):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
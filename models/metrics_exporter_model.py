@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import time
+from .counters_model import collect_counters
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+LATENCY_BOUNDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0) #histogram le labels, in seconds
+MAX_REQUEST_BYTES = 8192 #request line plus headers, scrapers send far less
+
+class MetricsExporter:
+    """
+    Serves the stats of a running simulation as OpenMetrics text over HTTP on the simulation's own event loop, so
+    Prometheus-compatible scrapers can follow a run. A scrape only compares a handful of numbers against the last
+    render and returns the cached body when nothing changed. Summing the per-sender counters for that comparison
+    is itself O(senders), so scrapes arriving within max_age seconds of the last check reuse the body outright;
+    a scraper polling in a tight loop then costs the event loop a bounded share of its time.
+
+    Exported metrics: sms_messages_sent and sms_messages_failed counters, the sms_send_latency_seconds histogram,
+    sms_queue_depth and sms_active_senders gauges, the sms_messages_produced counter and the sms_producer_rate gauge.
+
+    Attributes:
+        stats (dict): Shared stats of the simulation.
+        queue (asyncio.Queue): Queue whose depth is exported, None to leave the gauge out.
+        producer (ProducerModel): Producer whose output is exported, None to leave it out.
+        rate_window (float): Shortest time in seconds over which the producer rate is measured.
+        max_age (float): Real time in seconds during which a rendered body is served without checking the stats.
+        renders (int): Number of times the body was rendered, for checking the cache.
+        server (asyncio.Server): Listening server while started.
+    """
+
+    def __init__(self, stats: dict, queue: asyncio.Queue = None, producer = None, rate_window: float = 1.0,
+                 max_age: float = 0.05):
+        self.stats = stats
+        self.queue = queue
+        self.producer = producer
+        self.rate_window = rate_window
+        self.max_age = max_age
+        self.renders = 0
+        self.server = None
+        self._body = None
+        self._key = None
+        self._checked = None #time.monotonic() of the last comparison against the stats
+        self._rate = 0.0
+        self._rate_time = None
+        self._rate_count = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """
+        Start listening for scrapes
+
+        Args:
+            host (str): Interface to bind, localhost by default.
+            port (int): Port to bind, 0 to pick a free one.
+
+        Returns:
+            int: port the exporter listens on
+        """
+        self.server = await asyncio.start_server(self._handle, host, port, limit = MAX_REQUEST_BYTES)
+        port = self.server.sockets[0].getsockname()[1]
+        logger.info("Serving metrics on http://%s:%d/metrics", host, port)
+        return port
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    def active_senders(self) -> int:
+        """
+        Returns:
+            int: senders currently running, from the autoscaler if there is one, else from the per-sender counters
+        """
+        if 'active_senders' in self.stats:
+            return self.stats['active_senders']
+        registry = self.stats.get('senders')
+        return sum(1 for counters in registry if counters.active) if registry is not None else 0
+
+    def producer_rate(self, now: float) -> float:
+        """
+        Messages per second produced, measured over at least rate_window seconds
+
+        Args:
+            now (float): Current loop time.
+        """
+        produced = self.producer.messages_produced
+        if self._rate_time is None:
+            self._rate_time, self._rate_count = now, produced
+        elif now - self._rate_time >= self.rate_window:
+            self._rate = (produced - self._rate_count) / (now - self._rate_time)
+            self._rate_time, self._rate_count = now, produced
+        return self._rate
+
+    def render(self) -> bytes:
+        """
+        Returns:
+            bytes: OpenMetrics exposition of the current stats, reused while none of them changed
+        """
+        now = time.monotonic() #real time, the loop may run on a virtual clock
+        if self._checked is not None and now - self._checked < self.max_age:
+            return self._body
+        self._checked = now
+        collect_counters(self.stats) #fold per-sender counters into the totals
+        latency = self.stats.get('latency')
+        depth = self.queue.qsize() if self.queue is not None else None
+        produced = rate = None
+        if self.producer is not None:
+            rate = self.producer_rate(asyncio.get_running_loop().time())
+            produced = self.producer.messages_produced
+        key = (self.stats['sent'], self.stats['failed'], latency.count if latency is not None else 0,
+               depth, self.active_senders(), produced, rate)
+        if key == self._key:
+            return self._body
+
+        lines = [
+            "# TYPE sms_messages_sent counter",
+            "# HELP sms_messages_sent Messages sent successfully.",
+            f"sms_messages_sent_total {self.stats['sent']}",
+            "# TYPE sms_messages_failed counter",
+            "# HELP sms_messages_failed Failed send attempts.",
+            f"sms_messages_failed_total {self.stats['failed']}",
+        ]
+        if latency is not None:
+            lines += [
+                "# TYPE sms_send_latency_seconds histogram",
+                "# UNIT sms_send_latency_seconds seconds",
+                "# HELP sms_send_latency_seconds Send time of successful messages.",
+            ]
+            for bound, count in zip(LATENCY_BOUNDS, latency.cumulative_counts(LATENCY_BOUNDS)):
+                lines.append(f'sms_send_latency_seconds_bucket{{le="{bound}"}} {count}')
+            lines += [
+                f'sms_send_latency_seconds_bucket{{le="+Inf"}} {latency.count}',
+                f"sms_send_latency_seconds_count {latency.count}",
+                f"sms_send_latency_seconds_sum {latency.total}",
+            ]
+        if depth is not None:
+            lines += [
+                "# TYPE sms_queue_depth gauge",
+                "# HELP sms_queue_depth Items waiting in the queue.",
+                f"sms_queue_depth {depth}",
+            ]
+        lines += [
+            "# TYPE sms_active_senders gauge",
+            "# HELP sms_active_senders Senders currently running.",
+            f"sms_active_senders {key[4]}",
+        ]
+        if produced is not None:
+            lines += [
+                "# TYPE sms_messages_produced counter",
+                "# HELP sms_messages_produced Messages put on the queue by the producer.",
+                f"sms_messages_produced_total {produced}",
+                "# TYPE sms_producer_rate gauge",
+                "# HELP sms_producer_rate Messages produced per second over the last rate window.",
+                f"sms_producer_rate {rate}",
+            ]
+        lines.append("# EOF\n")
+
+        self._body = "\n".join(lines).encode()
+        self._key = key
+        self.renders += 1
+        return self._body
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            method, path = (request.split(b" ", 2) + [b"", b""])[:2]
+            if method not in (b"GET", b"HEAD"):
+                status, body, content_type = "405 Method Not Allowed", b"", "text/plain"
+            elif path.split(b"?", 1)[0] != b"/metrics":
+                status, body, content_type = "404 Not Found", b"", "text/plain"
+            else:
+                status, body, content_type = "200 OK", self.render(), CONTENT_TYPE
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode())
+            if method != b"HEAD":
+                writer.write(body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass #client went away or sent an oversized request
+        finally:
+            writer.close()
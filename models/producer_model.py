@@ -2,35 +2,162 @@ import logging
 import random
 import asyncio
 import string
+import itertools
+import numpy as np
 from dataclasses import dataclass
 from config import config
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level = logging.INFO)
+
+MAX_MESSAGE_LENGTH = 100
+CHARACTERS = string.ascii_letters + string.digits + ' '
+CHARACTER_CODES = np.frombuffer(CHARACTERS.encode('ascii'), dtype = np.uint8) #alphabet as a lookup table for batches
 
 @dataclass
 class Message:
     """dataclass representing an SMS message"""
+    __slots__ = ('id', 'content') #no per-instance __dict__
     id: str
     content: str
 
+class TimedMessage(Message):
+    """Message stamped with the loop times it was created (or scheduled to arrive) and last put on the queue"""
+    __slots__ = ('created_at', 'enqueued_at')
+
+    def __init__(self, id: str, content: str, created_at: float, enqueued_at: float = None):
+        super().__init__(id, content)
+        self.created_at = created_at
+        self.enqueued_at = enqueued_at
+
+class MessageBatch:
+    """
+    Columnar batch of SMS messages stored as arrays instead of one object per message.
+    Slices share the arrays and the content buffer of the batch they were taken from.
+
+    Attributes:
+        prefix (str): ID prefix shared by every message in the batch.
+        ids (np.ndarray): Integer sequence numbers of the messages.
+        lengths (np.ndarray): Content length of each message.
+        offsets (np.ndarray): Start of each message in the content buffer.
+        content (bytes): Contiguous ASCII buffer holding all message content, or a memoryview of shared records.
+        created_at (float): Loop time the messages were created, None if the batch is not timed.
+        enqueued_at (float): Loop time the batch was last put on the queue, None if the batch is not timed.
+    """
+    __slots__ = ('prefix', 'ids', 'lengths', 'offsets', 'content', 'created_at', 'enqueued_at')
+
+    def __init__(self, prefix: str, ids: np.ndarray, lengths: np.ndarray, offsets: np.ndarray, content: bytes,
+                 created_at: float = None, enqueued_at: float = None):
+        self.prefix = prefix
+        self.ids = ids
+        self.lengths = lengths
+        self.offsets = offsets
+        self.content = content
+        self.created_at = created_at
+        self.enqueued_at = enqueued_at
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self):
+        return (self.message(i) for i in range(len(self)))
+
+    def message_id(self, i: int) -> str:
+        """
+        Returns: 
+            str: ID of the i-th message in the same format as Message.id
+        """
+        return f"{self.prefix}{self.ids[i]}"
+
+    def content_at(self, i: int) -> str:
+        """
+        Returns: 
+            str: content of the i-th message
+        """
+        start = int(self.offsets[i])
+        return str(self.content[start:start + int(self.lengths[i])], 'ascii') #content may be bytes or a memoryview
+
+    def message(self, i: int) -> Message:
+        """
+        Materialize the i-th row as a Message object, a TimedMessage keeping the batch's stamps if it is timed
+
+        Returns: 
+            Message: the message at index i
+        """
+        if self.created_at is not None:
+            return TimedMessage(self.message_id(i), self.content_at(i), self.created_at, self.enqueued_at)
+        return Message(id = self.message_id(i), content = self.content_at(i))
+
+    def slice(self, start: int, stop: int) -> "MessageBatch":
+        """
+        Returns: 
+            MessageBatch: a view of rows start to stop sharing this batch's buffers
+        """
+        return MessageBatch(self.prefix, self.ids[start:stop], self.lengths[start:stop], self.offsets[start:stop], self.content,
+                            self.created_at)
+
+    def to_messages(self, created_at: np.ndarray = None) -> list:
+        """
+        Args:
+            created_at (np.ndarray | float): Creation or arrival time of each row, or one time for every row,
+                to build TimedMessage objects.
+
+        Returns: 
+            list: every row materialized as a Message object
+        """
+        text = str(self.content, 'latin-1') #a shared buffer can hold other bytes between messages, content itself is ASCII
+        ends = (self.offsets + self.lengths).tolist()
+        ids = [self.prefix + str(i) for i in self.ids.tolist()]
+        contents = [text[start:end] for start, end in zip(self.offsets.tolist(), ends)]
+        if isinstance(created_at, np.ndarray):
+            return list(map(TimedMessage, ids, contents, created_at.tolist()))
+        if created_at is not None:
+            return list(map(TimedMessage, ids, contents, itertools.repeat(created_at)))
+        return list(map(Message, ids, contents))
+
 class ProducerModel:
     """
     Generates a configurable amount of SMS messages of up to length 100.
 
     Attributes:
-        queue (asyncio.Queue): The queue to handle generated messages.
+        queue (asyncio.Queue): The queue to handle generated messages, None if they are only pulled through messages().
         messages_produced (int): Count of how many messages were produced.
         running (boolean): Status of producer function.
+        batch_size (int): Number of messages produced before yielding to consumers.
+        vectorized (boolean): Generate whole batches with NumPy instead of one message at a time.
+        chunk_size (int): If above 0, enqueue MessageBatch chunks of this many messages instead of Message objects.
+        rng (np.random.Generator): Random source used for batch generation, a fresh unseeded one if none is given.
+        message_random (random.Random): Random source of generate_message, seeded from rng.
+        high_watermark (int): Queue depth at which the producer pauses, 0 when the queue is unbounded.
+        low_watermark (int): Queue depth the producer waits for before resuming.
+        drain_rate (float): Smoothed rate (items/sec) at which consumers were observed emptying the queue.
+        paused_time (float): Total time spent paused at the high watermark.
+        recorder (TraceRecorder): Records every item put on the queue, None to skip recording.
+        stats (dict): Shared stats, None if the producer reports nothing.
+        producer_time (LatencyHistogram): Histogram of the time from creating a message until it was put on the
+            queue, if stats has a 'producer_time' entry. Messages are then stamped when created and enqueued.
     """
 
-    def __init__(self, queue: asyncio.Queue, batch_size: int = 1000):
+    def __init__(self, queue: asyncio.Queue, batch_size: int = 1000, vectorized: bool = False, chunk_size: int = 0,
+                 high_watermark: float = config.queue_high_watermark, low_watermark: float = config.queue_low_watermark,
+                 recorder = None, rng: np.random.Generator = None, stats: dict = None):
         self.queue = queue
         self.messages_produced = 0
         self.running = False
         self.batch_size = batch_size
-        logger.info("Initialized Producer with an empty queue")
+        self.vectorized = vectorized
+        self.chunk_size = chunk_size
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.message_random = random.Random(int(self.rng.integers(2**63))) #scalar draws are faster through random.Random
+        maxsize = queue.maxsize if queue is not None else 0
+        self.high_watermark = max(1, int(maxsize * high_watermark)) if maxsize > 0 else 0
+        self.low_watermark = min(int(maxsize * low_watermark), self.high_watermark - 1) if maxsize > 0 else 0
+        self.drain_rate = 0.0
+        self.paused_time = 0.0
+        self.recorder = recorder
+        self.stats = stats
+        self.producer_time = stats.get('producer_time') if stats is not None else None
+        logger.debug("Initialized Producer with an empty queue")
 
     def generate_message(self) -> Message:
         """
@@ -39,9 +166,8 @@ class ProducerModel:
         Returns: 
             Message: newly created Message object
         """
-        msg_length = random.randint(1,100)
-        characters = string.ascii_letters + string.digits + ' '
-        random_msg = ''.join(random.choices(characters, k = msg_length))
+        msg_length = self.message_random.randint(1,MAX_MESSAGE_LENGTH)
+        random_msg = ''.join(self.message_random.choices(CHARACTERS, k = msg_length))
 
         message = Message(
             id = f"MSG_{int(datetime.now().timestamp())}_{self.messages_produced}",
@@ -50,39 +176,178 @@ class ProducerModel:
         self.messages_produced +=1
         return message
 
-    async def produce_messages(self):
+    def generate_message_batch(self, n: int, count: bool = True) -> MessageBatch:
+        """
+        Generate n random messages at once as a columnar MessageBatch. Lengths and characters are drawn
+        as NumPy arrays with the same distribution as generate_message, and all IDs share one timestamp.
+
+        Args:
+            n (int): Number of messages to generate.
+            count (boolean): Add them to messages_produced now. False leaves counting to the caller, such as a
+                producer that counts messages as it releases them; IDs still continue from messages_produced.
+
+        Returns:
+            MessageBatch: newly created batch of messages
+        """
+        lengths = self.rng.integers(1, MAX_MESSAGE_LENGTH + 1, size = n, dtype = np.int32)
+        offsets = np.cumsum(lengths) - lengths
+        total_length = int(offsets[-1] + lengths[-1]) if n else 0
+        codes = CHARACTER_CODES[self.rng.integers(0, len(CHARACTER_CODES), size = total_length)]
+
+        batch = MessageBatch(
+            prefix = f"MSG_{int(datetime.now().timestamp())}_",
+            ids = np.arange(self.messages_produced, self.messages_produced + n, dtype = np.int64),
+            lengths = lengths,
+            offsets = offsets,
+            content = codes.tobytes() #one contiguous buffer for the whole batch
+        )
+        if count:
+            self.messages_produced += n
+        return batch
+
+    def generate_batch(self, n: int, created_at: float = None) -> list:
+        """
+        Generate n random messages at once using generate_message_batch
+
+        Args:
+            n (int): Number of messages to generate.
+            created_at (float): Loop time to stamp on every message, None for plain Message objects.
+
+        Returns:
+            list: newly created Message objects
+        """
+        return self.generate_message_batch(n).to_messages(created_at)
+
+    def stamp_enqueued(self, item, now: float):
+        """
+        Stamp a timed item with the time it was put on the queue and record how long that took since its creation
+
+        Args:
+            item (TimedMessage | MessageBatch): Item just put on the queue.
+            now (float): Current loop time.
+        """
+        item.enqueued_at = now
+        self.producer_time.record(now - item.created_at, len(item) if isinstance(item, MessageBatch) else 1)
+
+    def _new_items(self, n: int, now: float = None):
+        """
+        Generate the next n messages as chunk_size MessageBatch chunks, a vectorized block of Message objects or a
+        single Message, stamped with now if it is given
+
+        Returns:
+            list: new items
+        """
+        if self.chunk_size > 0:
+            batch = self.generate_message_batch(n)
+            batch.created_at = now
+            return [batch.slice(i, i + self.chunk_size) for i in range(0, n, self.chunk_size)]
+        if self.vectorized:
+            return self.generate_batch(n, now)
+        message = self.generate_message()
+        return [message if now is None else TimedMessage(message.id, message.content, now)]
+
+    def messages(self):
+        """
+        Lazily generate config.total_messages messages for a pull-based MessageSource, each one only when a sender
+        asks for it. Yields MessageBatch chunks of chunk_size when chunking, and otherwise single messages. When
+        vectorized, messages are generated one block of batch_size at a time, so memory is bounded by one block
+        rather than by the run.
+
+        Yields:
+            Message | MessageBatch: the next item to send
+        """
+        self.running = True
+        logger.info("Starting lazy production of messages")
+        loop = asyncio.get_running_loop() if self.producer_time is not None else None #stamp messages if timed
+        try:
+            while self.messages_produced < config.total_messages and self.running:
+                remaining = config.total_messages - self.messages_produced
+                n = min(self.chunk_size if self.chunk_size > 0 else self.batch_size, remaining)
+                for item in self._new_items(n, 0.0 if loop is not None else None):
+                    if self.recorder is not None:
+                        self.recorder.record(item)
+                    if loop is not None: #a pulled item is handed to a sender as soon as it exists
+                        item.created_at = loop.time()
+                        self.stamp_enqueued(item, item.created_at)
+                    yield item
+            logger.info("Message production completed")
+        finally:
+            self.running = False
+
+    async def produce_messages(self, add_sentinels: bool = True):
         """
         Calls generator function and adds messages to queue asynchronously
+
+        Args:
+            add_sentinels (boolean): Add sentinel values once production is done. Callers that still
+                put messages on the queue afterwards (such as retries) add them later with add_sentinel_vals.
         """
         try:
             self.running = True
             msgs_in_batch = 0
+            loop = asyncio.get_running_loop() if self.producer_time is not None else None #stamp messages if timed
             logger.info("Starting production of messages")
 
             while(self.messages_produced < config.total_messages and self.running):
-                message = self.generate_message()
-                msgs_in_batch += 1
-                await self.queue.put(message) #asynchronous operation of adding messages to queue
+                n = min(self.batch_size, config.total_messages - self.messages_produced)
+                if self.chunk_size <= 0 and not self.vectorized:
+                    n = 1
+                messages = self._new_items(n, loop.time() if loop is not None else None)
+                msgs_in_batch += n
+                for message in messages:
+                    await self.queue.put(message) #asynchronous operation of adding messages to queue
+                    if loop is not None:
+                        self.stamp_enqueued(message, loop.time())
+                    if self.recorder is not None:
+                        self.recorder.record(message)
+                    if self.high_watermark and self.queue.qsize() >= self.high_watermark:
+                        await self.wait_for_drain()
 
                 #batch processing implmeentation to allow consumers to catch up
                 if msgs_in_batch >= self.batch_size:
                     msgs_in_batch = 0
-                    logger.info(f"Produced batch of {self.batch_size} messages")
+                    logger.debug("Produced batch of %d messages", self.batch_size)
                     await asyncio.sleep(0.001)
 
-            await self.add_sentinel_vals()
+            if add_sentinels:
+                await self.add_sentinel_vals()
             logger.info("Message production completed")
 
 
         except Exception as e:
-            logger.error(f"Failed message production: {e}")
+            logger.error("Failed message production: %s", e)
             self.running = False
             raise 
 
         finally:
-            logging.info("Producer has completed adding messages to queue")
+            logger.debug("Producer has completed adding messages to queue")
         self.running = False
         
+    async def wait_for_drain(self, min_pause: float = 0.001, max_pause: float = 1.0):
+        """
+        Pause production until the queue falls to the low watermark. Each pause is sized from the
+        observed drain rate so the producer resumes about when the queue reaches the low watermark.
+
+        Args:
+            min_pause (float): Shortest pause, also used before any drain rate has been observed.
+            max_pause (float): Longest single pause before the queue depth is checked again.
+        """
+        loop = asyncio.get_running_loop()
+        while self.queue.qsize() > self.low_watermark:
+            depth = self.queue.qsize()
+            excess = depth - self.low_watermark
+            pause = excess / self.drain_rate if self.drain_rate > 0 else min_pause
+            pause = min(max(pause, min_pause), max_pause)
+
+            start_time = loop.time()
+            await asyncio.sleep(pause)
+            elapsed_time = loop.time() - start_time
+            self.paused_time += elapsed_time
+
+            if elapsed_time > 0: #the producer is not adding items, so every removed item was drained
+                observed_rate = (depth - self.queue.qsize()) / elapsed_time
+                self.drain_rate = observed_rate if self.drain_rate == 0 else 0.7 * self.drain_rate + 0.3 * observed_rate
+
     async def add_sentinel_vals(self):
         """
         Adds sentinel values to queue to tell consumers to stop processing
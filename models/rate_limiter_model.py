@@ -0,0 +1,94 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    Token bucket limiting sends to a rate with bursts of up to capacity. Callers reserve tokens up front,
+    letting the balance go negative, and sleep exactly until their reservation is covered, so throttled
+    senders wait on a single timer instead of polling and are served in the order they asked.
+
+    Attributes:
+        rate (float): Tokens added per second, i.e. the sustained messages per second.
+        capacity (float): Largest number of tokens the bucket holds, i.e. the burst size.
+        name (str): Label used in logs, such as the carrier pool name.
+        tokens (float): Current balance, negative while reservations are outstanding.
+        throttle_time (float): Total time callers were told to wait on this bucket.
+    """
+    __slots__ = ('rate', 'capacity', 'name', 'tokens', 'throttle_time', '_updated')
+
+    def __init__(self, rate: float, capacity: float = 1.0, name: str = ""):
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.name = name
+        self.tokens = self.capacity
+        self.throttle_time = 0.0
+        self._updated = None
+
+    def reserve(self, n: float = 1, now: float = None) -> float:
+        """
+        Take n tokens, going into debt if there are not enough
+
+        Args:
+            n (float): Tokens needed, one per message.
+            now (float): Current time, the running loop's clock if None.
+
+        Returns:
+            float: seconds until the reservation is covered, 0 if the tokens were available
+        """
+        if now is None:
+            now = asyncio.get_running_loop().time()
+        if self._updated is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self.tokens -= n
+        if self.tokens >= 0:
+            return 0.0
+        wait = -self.tokens / self.rate
+        self.throttle_time += wait
+        return wait
+
+async def acquire(buckets: list, n: float = 1) -> float:
+    """
+    Reserve n tokens from every bucket (for example a sender's own and its carrier pool's)
+    and sleep until the slowest of them allows the send
+
+    Args:
+        buckets (list): TokenBuckets that all have to admit the send.
+        n (float): Tokens needed, one per message.
+
+    Returns:
+        float: time spent throttled
+    """
+    wait = max((bucket.reserve(n) for bucket in buckets), default = 0.0)
+    if wait > 0:
+        await asyncio.sleep(wait)
+    return wait
+
+def build_rate_limiters(num_senders: int, sender_rate: float = 0.0, sender_burst: float = 1.0, pools: dict = None) -> list:
+    """
+    Create the buckets each sender has to pass: its own bucket if sender_rate is set, plus the shared
+    bucket of the carrier pool it belongs to. Pool members are assigned in order of sender ID.
+
+    Args:
+        num_senders (int): Number of senders.
+        sender_rate (float): Messages per second allowed per sender, 0 for no per-sender limit.
+        sender_burst (float): Burst size of each per-sender bucket.
+        pools (dict): Pool name -> {"rate": msgs/sec, "burst": burst size, "senders": number of senders}.
+
+    Returns:
+        list: one list of TokenBuckets per sender, empty for senders without limits
+    """
+    limiters = [[TokenBucket(sender_rate, sender_burst, f"sender-{i}")] if sender_rate > 0 else [] for i in range(num_senders)]
+    next_sender = 0
+    for name, pool in (pools or {}).items():
+        bucket = TokenBucket(pool['rate'], pool.get('burst', 1.0), name)
+        members = range(next_sender, min(next_sender + pool['senders'], num_senders))
+        for i in members:
+            limiters[i].append(bucket)
+        next_sender = members.stop
+        logger.info(f"Carrier pool {name}: {len(members)} senders sharing {pool['rate']} msgs/sec")
+    return limiters
@@ -0,0 +1,145 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from .producer_model import Message
+from config import config
+
+logger = logging.getLogger(__name__)
+
+class RetryScheduler:
+    """
+    Holds failed messages in a single timer heap and puts them back on the queue once their backoff expires.
+    One coroutine serves every pending retry, so waiting retries cost a heap entry each rather than a task.
+
+    Attributes:
+        queue (asyncio.Queue): Queue that retried messages are put back on.
+        stats (dict): Shared stats, extended with first_attempt_sent, retry_sent, retried and dead_lettered.
+        max_attempts (int): Attempts allowed per message, including the first one.
+        base_delay (float): Backoff before the first retry, doubled for every later one.
+        max_delay (float): Upper limit on the backoff.
+        attempts (dict): Failed attempts so far, per message ID.
+        dead_letters (list): Messages that failed max_attempts times.
+        rng: Source of the backoff jitter, the random module or a BufferedRandom stream.
+    """
+
+    def __init__(self, queue: asyncio.Queue, stats: dict, max_attempts: int = config.retry_max_attempts,
+                 base_delay: float = config.retry_base_delay, max_delay: float = config.retry_max_delay, rng = None):
+        self.queue = queue
+        self.stats = stats
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempts = {}
+        self.dead_letters = []
+        self.rng = rng if rng is not None else random
+        self._heap = [] #(due time, sequence, message)
+        self._sequence = itertools.count() #keeps heap order stable for equal due times
+        self._in_transit = 0
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        for key in ('first_attempt_sent', 'retry_sent', 'retried', 'dead_lettered'):
+            stats.setdefault(key, 0)
+
+    @property
+    def pending(self) -> int:
+        """
+        Returns:
+            int: retries waiting in the heap or on their way back to the queue
+        """
+        return len(self._heap) + self._in_transit
+
+    def backoff(self, failures: int) -> float:
+        """
+        Exponential backoff with equal jitter: half the delay is fixed and half is random
+
+        Args:
+            failures (int): Number of failed attempts so far.
+
+        Returns:
+            float: delay before the next attempt
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** (failures - 1))
+        return delay / 2 + self.rng.uniform(0, delay / 2)
+
+    def schedule(self, message: Message) -> bool:
+        """
+        Record a failed attempt and schedule a retry, or dead-letter the message once it runs out of attempts
+
+        Args:
+            message (Message): The message that failed to send.
+
+        Returns:
+            bool: True if a retry was scheduled
+        """
+        failures = self.attempts.get(message.id, 0) + 1
+        if failures >= self.max_attempts:
+            self.attempts.pop(message.id, None)
+            self.dead_letters.append(message)
+            self.stats['dead_lettered'] += 1
+            logger.warning("Message %s dead-lettered after %d attempts", message.id, failures)
+            return False
+
+        self.attempts[message.id] = failures
+        due = asyncio.get_running_loop().time() + self.backoff(failures)
+        if not self._heap or due < self._heap[0][0]:
+            self._wakeup.set() #new earliest deadline
+        heapq.heappush(self._heap, (due, next(self._sequence), message))
+        self._idle.clear()
+        self.stats['retried'] += 1
+        return True
+
+    def record_success(self, message: Message = None):
+        """
+        Count a successful send as first-attempt or after-retry
+
+        Args:
+            message (Message): The message that was sent, None for rows of a MessageBatch (always first attempts).
+        """
+        if message is not None and self.attempts.pop(message.id, None) is not None:
+            self.stats['retry_sent'] += 1
+        else:
+            self.stats['first_attempt_sent'] += 1
+
+    async def run(self):
+        """
+        Timer loop: sleeps until the earliest retry is due, then moves every due message back to the queue
+        """
+        loop = asyncio.get_running_loop()
+        resolution = time.get_clock_info('monotonic').resolution #same tolerance asyncio uses for its own timers
+        while True:
+            if not self._heap:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - loop.time()
+            if delay > resolution:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, message = heapq.heappop(self._heap)
+            self._in_transit += 1
+            try:
+                await self.queue.put(message)
+                if getattr(message, 'enqueued_at', None) is not None: #queue wait of the retry starts now, not at the failure
+                    message.enqueued_at = loop.time()
+            finally:
+                self._in_transit -= 1
+
+    async def wait_idle(self):
+        """
+        Wait until every scheduled retry has been put back on the queue
+        """
+        while self.pending:
+            await self._idle.wait()
+            if self.pending:
+                await asyncio.sleep(0) #a retry is on its way to the queue
@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+import numpy as np
+from dataclasses import fields
+from datetime import datetime
+from config import config, Config
+from .producer_model import ProducerModel, MessageBatch, MAX_MESSAGE_LENGTH
+from .sender_model import SenderModel
+from .shm_ring_model import ShmRing, RingConsumerGroup, MESSAGE_DTYPE, COMPLETION_DTYPE
+from .simulation_model import new_stats
+from .shard_runner_model import shard_configs
+from .display_monitor_model import format_stats, format_stages, format_queue, STAGES
+from .latency_histogram_model import LatencyHistogram
+from .rate_limiter_model import build_rate_limiters
+from .health_dispatch_model import build_sender_profiles
+from .rng_model import RandomStreams, PRODUCER, SENDER
+from .virtual_clock_model import run_virtual
+from .logging_model import configure_logging
+
+logger = logging.getLogger(__name__)
+
+COMPLETION_CAPACITY = 65536
+PRODUCER_BLOCK = 1024
+
+def message_records(batch: MessageBatch, created_at: float) -> np.ndarray:
+    """
+    Lay out a MessageBatch as fixed-size ring records, content padded to MAX_MESSAGE_LENGTH bytes
+
+    Args:
+        batch (MessageBatch): Messages with contiguous content.
+        created_at (float): time.monotonic() when the messages were created.
+
+    Returns:
+        np.ndarray: one MESSAGE_DTYPE record per message
+    """
+    records = np.zeros(len(batch), dtype = MESSAGE_DTYPE)
+    records['id'] = batch.ids
+    records['length'] = batch.lengths
+    records['created_at'] = created_at
+    padded = np.zeros((len(batch), MAX_MESSAGE_LENGTH), dtype = np.uint8)
+    padded[np.arange(MAX_MESSAGE_LENGTH) < batch.lengths[:, None]] = np.frombuffer(batch.content, dtype = np.uint8)
+    records['content'] = padded.view(f"S{MAX_MESSAGE_LENGTH}").ravel()
+    return records
+
+def record_completions(stats: dict, completions: np.ndarray) -> int:
+    """
+    Add completion records to the stats. Send latency and stage samples are per chunk: the chunk's mean send time,
+    and the stamps of its first message, weighted by its size.
+
+    Returns:
+        int: number of messages completed
+    """
+    stats['sent'] += int(completions['sent'].sum())
+    stats['failed'] += int(completions['failed'].sum())
+    stats['total_time'] += float(completions['send_time'].sum())
+    timed = 'total_latency' in stats
+    for row in completions.tolist():
+        _, count, sent, _, _, send_time, created_at, enqueued_at, dequeued_at, completed_at = row
+        if sent:
+            stats['latency'].record(send_time / sent, sent)
+        if timed:
+            stats['producer_time'].record(enqueued_at - created_at, count)
+            stats['queue_wait'].record(dequeued_at - enqueued_at, count)
+            stats['service_time'].record((completed_at - dequeued_at) / count, count)
+            stats['total_latency'].record(completed_at - created_at, count)
+    return int(completions['count'].sum())
+
+def _apply_config(shard: Config, logging_disabled: int):
+    for field in fields(Config): #each process has its own copy of the global config
+        setattr(config, field.name, getattr(shard, field.name))
+    log_writer = configure_logging(config.log_level)
+    logging.disable(logging_disabled)
+    return log_writer
+
+def _run_producer(ring: ShmRing, shard: Config, logging_disabled: int, poll_interval: float = 0.0005):
+    """
+    Producer process entry point: generates config.total_messages messages a block at a time and writes them to the
+    ring, waiting while it is full, then closes it
+
+    Args:
+        ring (ShmRing): Ring of MESSAGE_DTYPE records.
+        shard (Config): Configuration of the run.
+        logging_disabled (int): Logging level disabled in the parent process.
+        poll_interval (float): Time between attempts to write to a full ring.
+    """
+    log_writer = _apply_config(shard, logging_disabled)
+    try:
+        producer = ProducerModel(None, rng = RandomStreams(config.seed).generator(PRODUCER, 0))
+        while producer.messages_produced < config.total_messages:
+            batch = producer.generate_message_batch(min(PRODUCER_BLOCK, config.total_messages - producer.messages_produced))
+            records = message_records(batch, time.monotonic())
+            written = 0
+            while written < len(records):
+                records['enqueued_at'][written:] = time.monotonic()
+                count = ring.write(records[written:])
+                written += count
+                if not count: #full, senders are behind
+                    time.sleep(poll_interval)
+        logger.info("Ring producer wrote %d messages", producer.messages_produced)
+    finally:
+        ring.close()
+        ring.dispose()
+        log_writer.stop()
+
+def _run_worker(index: int, shard: Config, ring: ShmRing, completions: ShmRing, first_sender: int, prefix: str,
+                logging_disabled: int):
+    """
+    Sender worker process entry point: runs shard.num_senders senders that take messages from the ring until it is
+    drained, and writes a completion record per chunk to the completion ring
+
+    Args:
+        index (int): Position of the worker.
+        shard (Config): Configuration of this worker, num_senders is its share.
+        ring (ShmRing): Ring of MESSAGE_DTYPE records.
+        completions (ShmRing): Ring of COMPLETION_DTYPE records.
+        first_sender (int): ID of this worker's first sender, also the ring cursor it reads with.
+        prefix (str): ID prefix of the messages.
+        logging_disabled (int): Logging level disabled in the parent process.
+    """
+    log_writer = _apply_config(shard, logging_disabled)
+
+    async def worker_main():
+        group = RingConsumerGroup(ring, completions, index, config.ring_claim_size, prefix)
+        poller = asyncio.create_task(group.run())
+        streams = RandomStreams(config.seed)
+        rate_limiters = build_rate_limiters(config.num_senders, config.sender_rate_limit, config.sender_rate_burst,
+                                            config.carrier_pools)
+        profiles = build_sender_profiles(config.num_senders, config.sender_failure, config.sender_mean_time, config.sender_pools)
+        senders = []
+        for i in range(config.num_senders):
+            stats = {'sent': 0, 'failed': 0, 'total_time': 0.0} #reported per chunk through the completion ring
+            reader = group.reader(first_sender + i, stats)
+            senders.append(SenderModel(first_sender + i, reader, stats, *profiles[i],
+                                       config.sender_batch_size, config.sender_batch_linger, config.sender_batch_base_time,
+                                       config.sender_batch_message_time, None, rate_limiters[i],
+                                       streams.buffered(SENDER, first_sender + i)))
+        await asyncio.gather(*(sender.run() for sender in senders))
+        await group.drain()
+        poller.cancel()
+
+    try:
+        if config.fast_forward: #send delays take no time, the run measures the transport
+            run_virtual(worker_main())
+        else:
+            asyncio.run(worker_main())
+    finally:
+        ring.dispose()
+        completions.dispose()
+        log_writer.stop()
+
+def run_ring_pipeline(num_workers: int) -> tuple:
+    """
+    Runs the configured simulation as a producer process and num_workers sender worker processes connected by a
+    shared-memory ring of message records, one logical queue that every sender reads from. Completion records come
+    back through a second ring, from which this process keeps the stats and prints one monitor line per interval.
+    No message is pickled.
+
+    Args:
+        num_workers (int): Number of sender worker processes, each running its share of config.num_senders.
+
+    Returns:
+        tuple: stats dictionary and elapsed (real) time until the last message completed
+
+    Raises:
+        ValueError: for modes that put messages back on the queue or need a queue per process
+        RuntimeError: if a process fails or the workers exit before every message was sent
+    """
+    if (config.retry_max_attempts > 1 or config.autoscale or config.dispatch != "central" or config.pull_source
+            or config.arrival_process or config.trace_replay_path or config.trace_record_path or config.gateway_transport):
+        raise ValueError("ring_transport does not support retries, autoscale, work_stealing or health dispatch, pull_source, "
+                         "arrival processes, traces or gateway_transport")
+    shards = shard_configs(config, num_workers)
+    first_senders = [sum(shard.num_senders for shard in shards[:i]) for i in range(len(shards))]
+    ring = ShmRing(MESSAGE_DTYPE, config.ring_capacity, consumers = config.num_senders)
+    completions = ShmRing(COMPLETION_DTYPE, COMPLETION_CAPACITY)
+    prefix = f"MSG_{int(datetime.now().timestamp())}_"
+    logging_disabled = logging.root.manager.disable
+    processes = [multiprocessing.Process(target = _run_producer, args = (ring, config, logging_disabled), daemon = True)]
+    processes += [
+        multiprocessing.Process(target = _run_worker, args = (i, shard, ring, completions, first_senders[i], prefix,
+                                                              logging_disabled), daemon = True)
+        for i, shard in enumerate(shards)
+    ]
+
+    stats = new_stats()
+    if config.stage_timing:
+        for stage in STAGES:
+            stats[stage] = LatencyHistogram()
+    completed = 0
+    last_completion = start_time = time.monotonic()
+    counter = 0
+    try:
+        for process in processes:
+            process.start()
+        logger.info(f"Started a ring producer and {len(shards)} sender workers")
+        while completed < config.total_messages:
+            #checked before claiming: once every worker has exited, its last completion records are already in the ring
+            finished = all(process.exitcode is not None for process in processes[1:])
+            claimed = completions.claim(0, COMPLETION_CAPACITY)
+            if claimed is not None:
+                _, rows = claimed
+                completed += record_completions(stats, rows)
+                last_completion = max(last_completion, float(rows['completed_at'].max()))
+                del rows #release the view before the slots are reused
+                completions.release(0)
+            elif any(process.exitcode for process in processes):
+                raise RuntimeError("A ring process failed before every message was sent")
+            elif finished:
+                raise RuntimeError(f"The ring workers exited after {completed} of {config.total_messages} messages")
+            else:
+                time.sleep(0.001)
+            if time.monotonic() - start_time >= (counter + 1) * config.monitor_interval:
+                counter += 1
+                current_time = counter * config.monitor_interval
+                print(f"[Monitor] {current_time}s, {format_stats(stats)}, {format_queue(len(ring), ring.capacity)}")
+                stages = format_stages(stats)
+                if stages:
+                    print(f"[Stages] {current_time}s, {stages}")
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        ring.dispose()
+        completions.dispose()
+    return stats, last_completion - start_time
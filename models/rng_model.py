@@ -0,0 +1,100 @@
+import random
+import numpy as np
+
+#Kinds of component drawing random numbers. The kind is part of every stream's spawn key,
+#so the streams of different components never overlap even when they share an index.
+PRODUCER, SENDER, RETRY, DISPATCH, GATEWAY = range(5)
+
+class BufferedRandom:
+    """
+    Stands in for the random module where senders and the retry scheduler use it, but draws from its own
+    NumPy generator in blocks. Every draw takes the next value of a pre-sampled block instead of calling
+    into the interpreter-wide generator, and the values only depend on this stream's seed and on how many
+    draws came before, not on what other senders did in between. Blocks start small and double on every
+    refill up to block_size, so thousands of lightly used streams stay cheap.
+
+    Attributes:
+        generator (np.random.Generator): Source of the blocks.
+        block_size (int): Largest number of values sampled per refill of each buffer.
+    """
+    __slots__ = ('generator', 'block_size', '_exponentials', '_uniforms', '_exponential_block', '_uniform_block')
+
+    def __init__(self, generator: np.random.Generator, block_size: int = 256):
+        self.generator = generator
+        self.block_size = block_size
+        self._exponentials = iter(())
+        self._uniforms = iter(())
+        self._exponential_block = self._uniform_block = min(16, block_size)
+
+    def expovariate(self, lambd: float) -> float:
+        """
+        Returns:
+            float: exponentially distributed value with rate lambd, as random.expovariate
+        """
+        try:
+            return next(self._exponentials) / lambd
+        except StopIteration:
+            self._exponentials = iter(self.generator.standard_exponential(self._exponential_block).tolist())
+            self._exponential_block = min(self._exponential_block * 2, self.block_size)
+            return next(self._exponentials) / lambd
+
+    def random(self) -> float:
+        """
+        Returns:
+            float: uniform value in [0, 1), as random.random
+        """
+        try:
+            return next(self._uniforms)
+        except StopIteration:
+            self._uniforms = iter(self.generator.random(self._uniform_block).tolist())
+            self._uniform_block = min(self._uniform_block * 2, self.block_size)
+            return next(self._uniforms)
+
+    def uniform(self, a: float, b: float) -> float:
+        return a + (b - a) * self.random()
+
+class RandomStreams:
+    """
+    Independent random streams derived from one seed. Streams are addressed by the kind of component and its
+    index (such as a sender ID) rather than by creation order, so a component gets the same stream however
+    many others exist, and asking again for the same component gives the next, distinct stream.
+
+    Attributes:
+        seed_sequence (np.random.SeedSequence): Root of all streams; its entropy reproduces an unseeded run.
+        block_size (int): Block size of the BufferedRandom streams.
+    """
+
+    def __init__(self, seed: int = None, block_size: int = 256):
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.block_size = block_size
+        self._generations = {}
+
+    @property
+    def entropy(self) -> int:
+        return self.seed_sequence.entropy
+
+    def _child(self, kind: int, index: int) -> np.random.SeedSequence:
+        generation = self._generations.get((kind, index), 0)
+        self._generations[kind, index] = generation + 1
+        return np.random.SeedSequence(self.seed_sequence.entropy, spawn_key = (kind, index, generation))
+
+    def generator(self, kind: int, index: int = 0) -> np.random.Generator:
+        """
+        Returns:
+            np.random.Generator: next stream of the component, for vectorized draws
+        """
+        return np.random.Generator(np.random.PCG64(self._child(kind, index)))
+
+    def buffered(self, kind: int, index: int = 0) -> BufferedRandom:
+        """
+        Returns:
+            BufferedRandom: next stream of the component, for scalar draws
+        """
+        return BufferedRandom(self.generator(kind, index), self.block_size)
+
+    def python(self, kind: int, index: int = 0) -> random.Random:
+        """
+        Returns:
+            random.Random: next stream of the component, for the random.Random methods NumPy lacks (such as sample)
+        """
+        return random.Random(int.from_bytes(self._child(kind, index).generate_state(4).tobytes(), 'little'))
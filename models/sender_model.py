@@ -1,13 +1,14 @@
 import logging
 import random
 import asyncio
-import time
-from .producer_model import Message
+from .producer_model import Message, MessageBatch
+from .rate_limiter_model import acquire
+from .logging_model import LogSampler
+from .counters_model import StatsDictCounters
 from config import config
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level = logging.INFO)
 
 class SenderModel:
     """
@@ -16,20 +17,62 @@ class SenderModel:
     Attributes:
         id (int): unique ID of sender.
         running (boolean): status of sender.
-        queue (aysncio.Queue): message queue to be processed.
+        idle (boolean): True while the sender is waiting on the queue for work.
+        queue (aysncio.Queue): message queue to be processed, or a MessageSource for run_source.
         stats (dict): Information about message success, failure, and time.
+        counters (SenderCounters): This sender's own counters from the CounterRegistry in stats['senders'],
+            or a StatsDictCounters writing into stats directly if there is none.
+        latency (LatencyHistogram): Histogram of successful send times, if stats has a 'latency' entry.
+        queue_wait (LatencyHistogram): Histogram of the time messages waited from being put on the queue until a
+            sender took them, if stats has a 'queue_wait' entry. Only messages stamped with enqueued_at count,
+            once per attempt.
+        service_time (LatencyHistogram): Histogram of the time from taking a message until its attempt finished,
+            successful or not and including rate limit waits, if stats has a 'service_time' entry.
+        total_latency (LatencyHistogram): Histogram of the time from a message's creation until it was sent or
+            given up on, retries included, if stats has a 'total_latency' entry. Only messages stamped with
+            created_at count.
         failure_rate (float): Chance of sender failing to send a message.
-        mean_time (float): Average time it takes for sender to send message in an exp. distirbution.
+        mean_time (float): Average time it takes for sender to send message in an exp. distirbution, 0 for no delay.
+        batch_size (int): Maximum number of messages submitted together, 1 disables batching.
+        batch_linger (float): Time to wait for more messages when a batch is not full.
+        batch_base_time (float): Average delay of one batch request in an exp. distribution.
+        batch_message_time (float): Extra delay added to a batch request for each message in it.
+        retry_scheduler (RetryScheduler): Receives failed messages for a later retry, None to drop them.
+        rate_limiters (list): TokenBuckets every send has to pass, such as the sender's own and its carrier pool's.
+        success_sampler (LogSampler): Picks which successful sends are logged, failures are always logged.
+        rng: Source of send delays and failures, the random module or a BufferedRandom stream of this sender.
+        transport (GatewayPool): Sends each message as a real request to a gateway, which decides its delay and
+            outcome, None to simulate them.
     """
 
-    def __init__(self, id: int, queue: asyncio.Queue, stats: dict, failure_rate: float = config.sender_failure, mean_time: float = config.sender_mean_time):
+    def __init__(self, id: int, queue: asyncio.Queue, stats: dict, failure_rate: float = config.sender_failure, mean_time: float = config.sender_mean_time,
+                 batch_size: int = 1, batch_linger: float = 0.0, batch_base_time: float = config.sender_mean_time, batch_message_time: float = 0.0,
+                 retry_scheduler = None, rate_limiters: list = None, rng = None, transport = None):
         self.id = id
         self.running = False
+        self.idle = False
         self.queue = queue
         self.stats = stats
         self.failure_rate = failure_rate
         self.mean_time = mean_time
-        logger.info(f"Initialized sender with SenderID:{id}")
+        self.batch_size = batch_size
+        self.batch_linger = batch_linger
+        self.batch_base_time = batch_base_time
+        self.batch_message_time = batch_message_time
+        self.retry_scheduler = retry_scheduler
+        self.rate_limiters = rate_limiters or []
+        if self.rate_limiters:
+            stats.setdefault('throttle_time', 0.0)
+        registry = stats.get('senders')
+        self.counters = registry.counters_for(id) if registry is not None else StatsDictCounters(stats)
+        self.latency = stats.get('latency')
+        self.queue_wait = stats.get('queue_wait')
+        self.service_time = stats.get('service_time')
+        self.total_latency = stats.get('total_latency')
+        self.success_sampler = LogSampler(config.log_success_sample)
+        self.rng = rng if rng is not None else random
+        self.transport = transport
+        logger.debug("Initialized sender with SenderID:%d", id)
     
     async def send_message(self, message: Message):
         """
@@ -38,60 +81,286 @@ class SenderModel:
         Args:
             message (Message): The message to send.
         """
-        start_time = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        taken = loop.time()
+        if self.queue_wait is not None:
+            self._record_wait(message, taken)
+        finished = True #sent, or failed without a retry
+        if await self._attempt_send(message.content):
+            if self.success_sampler.sample() and logger.isEnabledFor(logging.INFO): #sampled, arguments formatted lazily
+                logger.info("Sender %d: sent message %s successfully", self.id, message.id)
+            if self.retry_scheduler is not None:
+                self.retry_scheduler.record_success(message)
+        else:
+            logger.warning("Sender %d: failed to send message %s", self.id, message.id)
+            if self.retry_scheduler is not None:
+                finished = not self.retry_scheduler.schedule(message)
+        if self.service_time is not None:
+            self._record_service(message, taken, loop.time(), int(finished))
+
+    async def send_message_batch(self, batch: MessageBatch):
+        """
+        Simulate sending every message of a columnar MessageBatch one after another,
+        without materializing Message objects.
+
+        Args:
+            batch (MessageBatch): The messages to send.
+        """
+        loop = asyncio.get_running_loop()
+        taken = loop.time()
+        if self.queue_wait is not None:
+            self._record_wait(batch, taken)
+        for i in range(len(batch)):
+            finished = True
+            if await self._attempt_send(batch.content_at(i) if self.transport is not None else None):
+                if self.success_sampler.sample() and logger.isEnabledFor(logging.INFO):
+                    logger.info("Sender %d: sent message %s%d successfully", self.id, batch.prefix, batch.ids[i])
+                if self.retry_scheduler is not None:
+                    self.retry_scheduler.record_success()
+            else:
+                logger.warning("Sender %d: failed to send message %s%d", self.id, batch.prefix, batch.ids[i])
+                if self.retry_scheduler is not None:
+                    finished = not self.retry_scheduler.schedule(batch.message(i)) #only failed rows become Message objects
+            if self.service_time is not None: #each row is served after the rows before it
+                done = loop.time()
+                self._record_service(batch, taken, done, int(finished))
+                taken = done
+
+    async def send_batch(self, items: list) -> int:
+        """
+        Simulate submitting several messages as one request. The request takes a base delay plus
+        a cost per message, and each message in it can fail independently.
+
+        Args:
+            items (list): Messages and MessageBatch chunks to submit together.
+
+        Returns:
+            int: number of messages sent successfully
+        """
+        loop = asyncio.get_running_loop()
+        size = sum(len(item) if isinstance(item, MessageBatch) else 1 for item in items)
+        taken = loop.time()
+        if self.queue_wait is not None:
+            for item in items:
+                self._record_wait(item, taken)
+        if self.rate_limiters: #wait for carrier capacity before the request, not counted as send latency
+            self.counters.throttle_time += await acquire(self.rate_limiters, size)
+        start_time = loop.time()
 
         try:
-            delay = random.expovariate(1.0/self.mean_time) #exponential distribution 
-            await asyncio.sleep(delay) #simulate message delay
+            delay = self.rng.expovariate(1.0/self.batch_base_time) + size * self.batch_message_time
+            await asyncio.sleep(delay) #simulate one batch request
+            done = loop.time()
+
+            failed = 0
+            for item in items:
+                is_batch = isinstance(item, MessageBatch)
+                count = len(item) if is_batch else 1
+                finished = count #sent, or failed without a retry
+                for i in range(count):
+                    if self.rng.random() < self.failure_rate: #simulate failure of one message in the batch
+                        failed += 1
+                        logger.warning("Sender %d: failed to send message in batch", self.id)
+                        if self.retry_scheduler is not None and self.retry_scheduler.schedule(item.message(i) if is_batch else item):
+                            finished -= 1
+                    elif self.retry_scheduler is not None:
+                        self.retry_scheduler.record_success(None if is_batch else item)
+                if self.service_time is not None:
+                    self._record_service(item, taken, done, finished, count)
+            sent = size - failed
+            elapsed_time = done - start_time
+            counters = self.counters
+            counters.failed += failed
+            counters.sent += sent
+            counters.total_time += elapsed_time * sent
+            if self.latency is not None and sent:
+                self.latency.record(elapsed_time, sent)
+            if self.success_sampler.sample() and logger.isEnabledFor(logging.INFO):
+                logger.info("Sender %d: sent %d of %d messages in batch", self.id, sent, size)
+            return sent
+
+        except Exception as e:
+            logger.error("Failed to send batch: %s", e)
+            self.counters.failed += size
+            raise
+
+    async def _collect_batch(self, first) -> tuple:
+        """
+        Drain up to batch_size messages from the queue, waiting batch_linger once if the batch is not full
+
+        Args:
+            first: Item already taken from the queue.
+
+        Returns:
+            tuple: items in the batch and whether a sentinel was received
+        """
+        items = [first]
+        size = len(first) if isinstance(first, MessageBatch) else 1
+        lingered = self.batch_linger <= 0
+        while size < self.batch_size:
+            try:
+                item = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                if lingered:
+                    break
+                lingered = True
+                await asyncio.sleep(self.batch_linger) #give more messages a chance to arrive
+                continue
+            if item is None:
+                self.queue.task_done()
+                return items, True
+            items.append(item)
+            size += len(item) if isinstance(item, MessageBatch) else 1
+        return items, False
+
+    def _record_wait(self, item, taken: float):
+        """
+        Record how long a message, or every message of a MessageBatch, waited on the queue before it was taken
+        """
+        enqueued_at = getattr(item, 'enqueued_at', None)
+        if enqueued_at is not None:
+            self.queue_wait.record(taken - enqueued_at, len(item) if isinstance(item, MessageBatch) else 1)
+
+    def _record_service(self, item, taken: float, done: float, finished: int, attempts: int = 1):
+        """
+        Record the service time of attempts at an item, and the end-to-end latency of those of its messages that
+        are finished, sent or given up on, rather than scheduled for a retry
 
-            if random.random() < self.failure_rate: #simulate failure
-                self.stats['failed'] += 1
-                logger.warning(f"Sender {self.id}: failed to send message")
+        Args:
+            item (Message | MessageBatch): Item the attempts were for.
+            taken (float): Loop time the attempts started.
+            done (float): Loop time the attempts finished.
+            finished (int): Number of the messages that are finished.
+            attempts (int): Number of messages attempted.
+        """
+        self.service_time.record(done - taken, attempts)
+        created_at = getattr(item, 'created_at', None)
+        if finished and created_at is not None and self.total_latency is not None:
+            self.total_latency.record(done - created_at, finished)
+
+    async def _attempt_send(self, content: str = None) -> bool:
+        """
+        Simulate the network delay and failure of one send, or make the request with the transport if there is one,
+        and record the outcome in stats.
+
+        Args:
+            content (str): Text of the message, only needed by a transport.
+
+        Returns:
+            bool: True if the message was sent successfully
+        """
+        loop = asyncio.get_running_loop() #loop clock so that simulated (virtual) time is measured too
+        if self.rate_limiters: #wait for carrier capacity before the send, not counted as send latency
+            self.counters.throttle_time += await acquire(self.rate_limiters)
+        start_time = loop.time()
+
+        try:
+            if self.transport is not None: #a real request, the gateway decides the delay and the outcome
+                failed = not await self.transport.send(content)
             else:
-                self.stats['sent'] +=1
-                elapsed_time = time.perf_counter() - start_time
-                self.stats['total_time'] += elapsed_time
-                logger.info(f"Sender {self.id}: sent message = {message.content} successfully")
-                #print(f"Sender {self.id}: sent message = {message.content} successfully")
+                delay = self.rng.expovariate(1.0/self.mean_time) if self.mean_time > 0 else 0.0 #exponential distribution, 0 = no delay
+                await asyncio.sleep(delay) #simulate message delay
+                failed = self.rng.random() < self.failure_rate #simulate failure
+
+            if failed:
+                self.counters.failed += 1
+                return False
+            self.counters.sent += 1
+            elapsed_time = loop.time() - start_time
+            self.counters.total_time += elapsed_time
+            if self.latency is not None:
+                self.latency.record(elapsed_time)
+            return True
 
         except Exception as e:
-            logger.error(f"Failed to send message: {e}")
-            self.stats['failed'] +=1
+            logger.error("Failed to send message: %s", e)
+            self.counters.failed += 1
             raise
 
     async def run(self):
         """
         Main loop that continuously processes messages from the queue asynchronously.
-        Stops when a sentinel value of None is received.
+        Queue items can be single messages or columnar MessageBatch chunks.
+        With batch_size above 1, messages are drained and submitted in batches.
+        Stops when a sentinel value of None is received, or after the current send once running is cleared.
         """
         self.running = True
-        logger.info(f"Sender {self.id}: starting message processing")
+        self.counters.active = True
+        logger.debug("Sender %d: starting message processing", self.id)
 
         try:
             while self.running:
-                message = await self.queue.get()
+                self.idle = True #safe to cancel, nothing has been taken from the queue yet
+                try:
+                    message = await self.queue.get()
+                finally:
+                    self.idle = False
                 if message is None:  # Sentinel value received
-                    logger.info(f"Sender {self.id}: recieved sentinel")
+                    logger.debug("Sender %d: recieved sentinel", self.id)
                     self.queue.task_done()
                     break
-                await self.send_message(message)
+                if self.batch_size > 1:
+                    items, sentinel = await self._collect_batch(message)
+                    await self.send_batch(items)
+                    for _ in items:
+                        self.queue.task_done()
+                    if sentinel:
+                        logger.debug("Sender %d: recieved sentinel", self.id)
+                        break
+                    continue
+                if isinstance(message, MessageBatch):
+                    await self.send_message_batch(message)
+                else:
+                    await self.send_message(message)
                 self.queue.task_done()
 
         
         except Exception as e:
-            logger.error(f"Error in loop: {e}")
+            logger.error("Error in loop: %s", e)
             self.running = False
             raise
 
 
         finally:
             self.running = False
+            self.counters.active = False
 
-    
-
-
+    async def run_source(self):
+        """
+        Pull-based loop for a queue that is a MessageSource: takes one item (or a batch of items) at a time
+        as it becomes free and marks each done after sending it, including scheduling any retry.
+        Stops once the source is exhausted, or after the current send once running is cleared.
+        """
+        self.running = True
+        self.counters.active = True
+        logger.debug("Sender %d: pulling messages from source", self.id)
 
+        try:
+            while self.running:
+                self.idle = True
+                try:
+                    message = await self.queue.get()
+                except StopAsyncIteration: #source exhausted, nothing more will arrive
+                    break
+                finally:
+                    self.idle = False
+                if self.batch_size > 1:
+                    items, _ = await self._collect_batch(message)
+                    await self.send_batch(items)
+                    for _ in items:
+                        self.queue.task_done()
+                    continue
+                if isinstance(message, MessageBatch):
+                    await self.send_message_batch(message)
+                else:
+                    await self.send_message(message)
+                self.queue.task_done()
 
-        
+        except Exception as e:
+            logger.error("Error in loop: %s", e)
+            self.running = False
+            raise
 
-    
+        finally:
+            self.running = False
+            self.counters.active = False
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import traceback
+from dataclasses import replace, fields
+from config import config, Config
+from .simulation_model import new_stats, run_simulation
+from .display_monitor_model import format_stats, format_stages, format_queue, format_senders
+from .counters_model import CounterRegistry, collect_counters, sender_summary
+from .virtual_clock_model import run_virtual
+from .logging_model import configure_logging
+from .arrival_model import scale_arrivals
+
+logger = logging.getLogger(__name__)
+
+def split_evenly(total: int, parts: int) -> list:
+    """
+    Splits total into parts integers that differ by at most one
+
+    Returns:
+        list: share of each part, larger shares first
+    """
+    share, remainder = divmod(total, parts)
+    return [share + 1 if i < remainder else share for i in range(parts)]
+
+def shard_configs(base: Config, num_workers: int) -> list:
+    """
+    Splits total_messages, num_senders, the queue bound, autoscaler limits, carrier pools and sender pools of a config across worker processes.
+    Carrier pool rates are divided in proportion to the pool members each shard gets, arrival rates in proportion to its messages,
+    and each shard serves metrics on its own port. A replayed trace is dealt across the shards record by record, and each shard
+    records its own trace, the record path with a ".<shard index>" suffix.
+    Every shard keeps at least one sender, so there are never more shards than senders.
+
+    Args:
+        base (Config): Configuration of the whole simulation.
+        num_workers (int): Requested number of worker processes.
+
+    Returns:
+        list: one Config per shard
+    """
+    num_shards = max(1, min(num_workers, base.num_senders))
+    messages = split_evenly(base.total_messages, num_shards)
+    senders = split_evenly(base.num_senders, num_shards)
+    queue_sizes = [max(1, q) if base.queue_maxsize > 0 else 0 for q in split_evenly(base.queue_maxsize, num_shards)]
+    pools = [{} for _ in range(num_shards)]
+    for name, pool in base.carrier_pools.items(): #each shard gets a share of the pool's members and rate
+        for shard_pool, pool_senders in zip(pools, split_evenly(pool['senders'], num_shards)):
+            if pool_senders:
+                shard_pool[name] = dict(pool, senders = pool_senders, rate = pool['rate'] * pool_senders / pool['senders'])
+    sender_pools = [{} for _ in range(num_shards)]
+    for name, pool in base.sender_pools.items(): #each shard gets a share of the pool's members
+        for shard_pool, pool_senders in zip(sender_pools, split_evenly(pool['senders'], num_shards)):
+            if pool_senders:
+                shard_pool[name] = dict(pool, senders = pool_senders)
+    max_senders = [max(1, n) for n in split_evenly(base.autoscale_max_senders, num_shards)]
+    min_senders = [max(1, n) for n in split_evenly(base.autoscale_min_senders, num_shards)]
+    arrivals = [scale_arrivals(base.arrival_rate, base.arrival_params, m / base.total_messages if base.total_messages else 1.0)
+                for m in messages]
+    return [replace(base, total_messages = m, num_senders = s, queue_maxsize = q, carrier_pools = p, sender_pools = sp,
+                    autoscale_min_senders = lo, autoscale_max_senders = hi, num_workers = 1,
+                    arrival_rate = rate, arrival_params = params,
+                    metrics_port = base.metrics_port + i if base.metrics_port else 0,
+                    trace_record_path = f"{base.trace_record_path}.{i}" if base.trace_record_path and num_shards > 1 else base.trace_record_path,
+                    trace_replay_shard = i, trace_replay_shards = num_shards)
+            for i, (m, s, q, p, sp, lo, hi, (rate, params)) in enumerate(zip(messages, senders, queue_sizes, pools, sender_pools,
+                                                                             min_senders, max_senders, arrivals))]
+
+def merge_stats(snapshots: list) -> dict:
+    """
+    Combines stats dictionaries from several shards. Numbers are summed and objects
+    providing a merge method (such as latency histograms) are merged.
+
+    Args:
+        snapshots (list): stats dictionaries to combine
+
+    Returns:
+        dict: combined stats
+    """
+    merged = new_stats()
+    for snapshot in snapshots:
+        for key, value in snapshot.items():
+            if key not in merged:
+                merged[key] = value.copy() if hasattr(value, 'merge') else value
+            elif hasattr(value, 'merge'):
+                merged[key].merge(value)
+            else:
+                merged[key] += value
+    return merged
+
+def _run_shard(index: int, shard: Config, results, logging_disabled: int, first_sender: int = 0):
+    """
+    Worker process entry point: runs one shard and reports stats snapshots back to the parent, or the traceback if
+    the shard fails
+
+    Args:
+        index (int): Position of the shard.
+        shard (Config): Configuration of this shard.
+        results (multiprocessing.Queue): Channel back to the runner.
+        logging_disabled (int): Logging level disabled in the parent process.
+        first_sender (int): Offset of this shard's sender IDs in the merged per-sender counters.
+    """
+    for field in fields(Config): #each process has its own copy of the global config
+        setattr(config, field.name, getattr(shard, field.name))
+    log_writer = configure_logging(config.log_level)
+    logging.disable(logging_disabled)
+
+    async def report_progress(stats: dict, queue: asyncio.Queue):
+        while True:
+            await asyncio.sleep(config.monitor_interval)
+            collect_counters(stats)
+            snapshot = {key: value.copy() if hasattr(value, 'merge') else value for key, value in stats.items()} #pickled later by a feeder thread
+            results.put(('tick', index, snapshot, queue.qsize()))
+
+    async def shard_main():
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        stats = new_stats()
+        stats['senders'] = CounterRegistry(first_sender)
+        await run_simulation(stats, monitor = report_progress)
+        results.put(('done', index, stats, loop.time() - start_time))
+
+    try:
+        if config.fast_forward:
+            run_virtual(shard_main())
+        elif config.seed is not None:
+            run_virtual(shard_main(), paced = True)
+        else:
+            asyncio.run(shard_main())
+    except Exception:
+        results.put(('error', index, traceback.format_exc()))
+    finally:
+        log_writer.stop()
+
+def run_sharded(num_workers: int) -> tuple:
+    """
+    Runs the configured simulation split across worker processes, printing one merged
+    monitor line per interval
+
+    Args:
+        num_workers (int): Number of worker processes to start.
+
+    Returns:
+        tuple: merged stats dictionary and elapsed (simulated) time of the slowest shard
+
+    Raises:
+        RuntimeError: if a shard fails, with the shard's traceback
+    """
+    shards = shard_configs(config, num_workers)
+    pool_sizes = [shard.autoscale_max_senders if shard.autoscale else shard.num_senders for shard in shards]
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target = _run_shard, args = (i, shard, results, logging.root.manager.disable, sum(pool_sizes[:i])),
+                                daemon = True)
+        for i, shard in enumerate(shards)
+    ]
+    for worker in workers:
+        worker.start()
+    logger.info(f"Started {len(workers)} shard workers")
+
+    ticks = [[] for _ in shards] #(stats, queue depth) snapshots not yet printed, per shard
+    final = [None] * len(shards)
+    elapsed = [0.0] * len(shards)
+    counter = 0
+    previous_counts = {} #merged per-sender sent counts at the last printed interval
+    try:
+        while any(result is None for result in final):
+            try:
+                message = results.get(timeout = 1.0)
+            except queue.Empty: #a shard killed outright cannot report its error
+                for i, worker in enumerate(workers):
+                    if worker.exitcode and final[i] is None:
+                        raise RuntimeError(f"Shard {i} exited with code {worker.exitcode}")
+                continue
+            if message[0] == 'error':
+                raise RuntimeError(f"Shard {message[1]} failed:\n{message[2]}")
+            if message[0] == 'tick':
+                ticks[message[1]].append(message[2:])
+            else:
+                _, index, stats, elapsed[index] = message
+                final[index] = stats
+
+            #print a line once every running shard has reported the next interval
+            while any(ticks) and all(ticks[i] or final[i] is not None for i in range(len(shards))):
+                counter += 1
+                snapshot = [ticks[i].pop(0) if ticks[i] else (final[i], 0) for i in range(len(shards))]
+                stats = merge_stats([shard_stats for shard_stats, _ in snapshot])
+                depth = sum(shard_depth for _, shard_depth in snapshot)
+                current_time = counter * config.monitor_interval
+                print(f"[Monitor] {current_time}s, {format_stats(stats)}, {format_queue(depth, config.queue_maxsize)}")
+                stages = format_stages(stats)
+                if stages:
+                    print(f"[Stages] {current_time}s, {stages}")
+                registry = stats['senders']
+                print(f"[Senders] {current_time}s, {format_senders(sender_summary(registry, previous_counts, config.monitor_interval))}")
+                previous_counts = registry.sent_counts()
+    except BaseException:
+        for worker in workers: #the other shards' results are no longer needed
+            if worker.is_alive():
+                worker.terminate()
+        raise
+    finally:
+        for worker in workers:
+            worker.join()
+    return merge_stats(final), max(elapsed)
@@ -0,0 +1,330 @@
+import asyncio
+import collections
+import logging
+import multiprocessing
+import os
+import time
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from .producer_model import MessageBatch, MAX_MESSAGE_LENGTH
+
+logger = logging.getLogger(__name__)
+
+#Shared memory layout: int64 header of published writes, claimed reads, closed flag and one cursor per reader,
+#followed by the record slots. Indices only grow, a record's slot is its index modulo the capacity.
+WRITTEN, CLAIMED, CLOSED = range(3)
+HEADER_FIELDS = 3
+IDLE = -1 #cursor of a reader holding no records
+
+MESSAGE_DTYPE = np.dtype([('id', '<i8'), ('created_at', '<f8'), ('enqueued_at', '<f8'), ('length', '<u2'),
+                          ('content', f"S{MAX_MESSAGE_LENGTH}")])
+COMPLETION_DTYPE = np.dtype([('first_id', '<i8'), ('count', '<u4'), ('sent', '<u4'), ('failed', '<u4'),
+                             ('worker', '<u2'), ('send_time', '<f8'), ('created_at', '<f8'), ('enqueued_at', '<f8'),
+                             ('dequeued_at', '<f8'), ('completed_at', '<f8')])
+
+class ShmRing:
+    """
+    Ring buffer of fixed-size NumPy records in shared memory, passed between processes without pickling. Writers copy
+    blocks of records in; readers claim runs of records and view them in place until they release them, so a slot
+    is only reused once the reader holding it is done. The indices and reader cursors are updated under one
+    process-shared lock, taken once per block or run rather than per record. Pass the ring to a child process as a
+    Process argument and it attaches to the same memory.
+
+    Attributes:
+        dtype (np.dtype): Record layout.
+        capacity (int): Number of record slots.
+        consumers (int): Number of readers, each with its own cursor.
+        lock (multiprocessing.Lock): Guards the header.
+        name (str): Name of the shared memory block.
+        owner_pid (int): Process that created the block and unlinks it, None where the ring was attached by name.
+        records (np.ndarray): Every slot, viewed in the shared memory.
+        raw (np.ndarray): The same slots as bytes.
+    """
+
+    def __init__(self, dtype: np.dtype, capacity: int, consumers: int = 1, lock = None, name: str = None):
+        self.dtype = np.dtype(dtype)
+        self.capacity = capacity
+        self.consumers = consumers
+        self.lock = lock if lock is not None else multiprocessing.Lock()
+        self.owner_pid = os.getpid() if name is None else None
+        header_bytes = 8 * (HEADER_FIELDS + consumers)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create = True, size = header_bytes + self.dtype.itemsize * capacity)
+        else:
+            self.shm = shared_memory.SharedMemory(name = name)
+            resource_tracker.unregister(self.shm._name, "shared_memory") #only the creating process unlinks it
+        self.name = self.shm.name
+        self._header = np.ndarray(HEADER_FIELDS + consumers, dtype = np.int64, buffer = self.shm.buf)
+        self._cursors = self._header[HEADER_FIELDS:]
+        self.records = np.ndarray(capacity, dtype = self.dtype, buffer = self.shm.buf, offset = header_bytes)
+        self.raw = np.ndarray(capacity * self.dtype.itemsize, dtype = np.uint8, buffer = self.shm.buf, offset = header_bytes)
+        if name is None:
+            self._header[:HEADER_FIELDS] = 0
+            self._cursors[:] = IDLE
+
+    def __getstate__(self):
+        return (self.dtype, self.capacity, self.consumers, self.lock, self.name)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __len__(self) -> int:
+        """
+        Returns:
+            int: records written and not yet claimed
+        """
+        return int(self._header[WRITTEN] - self._header[CLAIMED])
+
+    def write(self, records: np.ndarray) -> int:
+        """
+        Copy as many records as there are free slots for, in order
+
+        Args:
+            records (np.ndarray): Records of the ring's dtype.
+
+        Returns:
+            int: number of records written, 0 while the ring is full
+        """
+        with self.lock:
+            written, claimed = int(self._header[WRITTEN]), int(self._header[CLAIMED])
+            held = self._cursors[self._cursors != IDLE]
+            oldest = min(claimed, int(held.min())) if len(held) else claimed #slots up to here can be reused
+            count = min(len(records), oldest + self.capacity - written)
+            if count <= 0:
+                return 0
+            start = written % self.capacity
+            first = min(count, self.capacity - start)
+            self.records[start:start + first] = records[:first]
+            self.records[:count - first] = records[first:count] #wraps around
+            self._header[WRITTEN] = written + count
+        return count
+
+    def claim(self, consumer: int, count: int) -> tuple:
+        """
+        Claim up to count unclaimed records for a reader, never past the end of the slots so they stay contiguous
+
+        Args:
+            consumer (int): Index of the reader.
+            count (int): Most records to claim.
+
+        Returns:
+            tuple: index of the first record and a view of the records, None if there are none
+        """
+        with self.lock:
+            written, claimed = int(self._header[WRITTEN]), int(self._header[CLAIMED])
+            start = claimed % self.capacity
+            count = min(count, written - claimed, self.capacity - start)
+            if count <= 0:
+                return None
+            if self._cursors[consumer] == IDLE:
+                self._cursors[consumer] = claimed
+            self._header[CLAIMED] = claimed + count
+        return claimed, self.records[start:start + count]
+
+    def release(self, consumer: int, next_held: int = IDLE):
+        """
+        Release the oldest records a reader holds
+
+        Args:
+            consumer (int): Index of the reader.
+            next_held (int): Index of the oldest record the reader still holds, IDLE if none.
+        """
+        with self.lock:
+            self._cursors[consumer] = next_held
+
+    def close(self):
+        """
+        Mark that nothing more will be written
+        """
+        with self.lock:
+            self._header[CLOSED] = 1
+
+    def exhausted(self) -> bool:
+        """
+        Returns:
+            bool: True once the ring is closed and every record has been claimed
+        """
+        with self.lock:
+            return bool(self._header[CLOSED]) and self._header[CLAIMED] == self._header[WRITTEN]
+
+    def dispose(self):
+        """
+        Detach from the shared memory, and remove it in the process that created it
+        """
+        self._header = self._cursors = self.records = self.raw = None #views must go before the buffer
+        self.shm.close()
+        if self.owner_pid == os.getpid(): #forked children inherit the ring without owning it
+            self.shm.unlink()
+
+class RingReader:
+    """
+    Queue-like handle through which one sender takes messages from a shared ShmRing, in place of the asyncio.Queue.
+    Each get claims up to claim_size records and wraps them in a MessageBatch viewing the ring's memory, and
+    task_done releases the oldest chunk taken and reports its completion. Once the ring is closed and drained, get
+    returns the sentinel None so the sender stops.
+
+    Attributes:
+        group (RingConsumerGroup): Readers of this worker process.
+        consumer (int): Index of this reader's cursor in the ring.
+        stats (dict): The sender's own stats, whose sent, failed and total_time deltas are reported per chunk.
+        maxsize (int): Always 0, the ring's capacity bounds it instead.
+    """
+    maxsize = 0
+
+    def __init__(self, group: "RingConsumerGroup", consumer: int, stats: dict = None):
+        self.group = group
+        self.consumer = consumer
+        self.stats = stats
+        self._held = collections.deque() #(index, records, dequeued_at) of chunks taken and not yet done
+        self._reported = (0, 0, 0.0)
+
+    def qsize(self) -> int:
+        return len(self.group.ring)
+
+    def get_nowait(self) -> MessageBatch:
+        """
+        Take the next chunk of records without waiting
+
+        Raises:
+            asyncio.QueueEmpty: if no record is waiting
+        """
+        ring = self.group.ring
+        claimed = ring.claim(self.consumer, self.group.claim_size)
+        if claimed is None:
+            raise asyncio.QueueEmpty
+        index, records = claimed
+        self._held.append((index, records, time.monotonic()))
+        return self.group.batch(index % ring.capacity, records)
+
+    async def get(self):
+        """
+        Take the next chunk of records, waiting for the producer if the ring is empty
+
+        Returns:
+            MessageBatch: the chunk, None once the ring is closed and drained
+        """
+        while True:
+            try:
+                return self.get_nowait()
+            except asyncio.QueueEmpty:
+                if self.group.ring.exhausted():
+                    return None
+                await self.group.wait()
+
+    def task_done(self):
+        """
+        Mark the oldest chunk taken as sent, report it and free its slots. Called for the sentinel too, which holds none
+        """
+        if not self._held:
+            return
+        _, records, dequeued_at = self._held.popleft()
+        sent, failed, total_time = self.stats['sent'], self.stats['failed'], self.stats['total_time']
+        previous_sent, previous_failed, previous_time = self._reported
+        self._reported = (sent, failed, total_time)
+        self.group.complete(records, sent - previous_sent, failed - previous_failed, total_time - previous_time,
+                            dequeued_at)
+        self.group.ring.release(self.consumer, self._held[0][0] if self._held else IDLE)
+
+class RingConsumerGroup:
+    """
+    The readers of one worker process. Waiting readers are woken by one poller task that checks the ring every
+    poll_interval, rather than each polling on its own, and completion records are buffered and written to the
+    completion ring in blocks. The poller only runs while a reader waits or records are buffered, so it does not
+    hold the virtual clock to poll_interval steps while every sender is busy.
+
+    Attributes:
+        ring (ShmRing): Ring of MESSAGE_DTYPE records.
+        completions (ShmRing): Ring of COMPLETION_DTYPE records read by the parent.
+        worker (int): Index of this worker process.
+        claim_size (int): Most records one get takes.
+        prefix (str): ID prefix of the messages.
+        poll_interval (float): Time between checks of an empty ring.
+    """
+
+    def __init__(self, ring: ShmRing, completions: ShmRing, worker: int, claim_size: int, prefix: str,
+                 poll_interval: float = 0.0005):
+        self.ring = ring
+        self.completions = completions
+        self.worker = worker
+        self.claim_size = claim_size
+        self.prefix = prefix
+        self.poll_interval = poll_interval
+        self._waiters = []
+        self._pending = [] #completion rows not yet written
+        self._work = asyncio.Event() #set when a reader starts waiting or a row is buffered
+        self._content_offset = ring.dtype.fields['content'][1]
+
+    def reader(self, consumer: int, stats: dict = None) -> RingReader:
+        """
+        Returns:
+            RingReader: handle for the sender reading with the given cursor
+        """
+        return RingReader(self, consumer, stats)
+
+    def batch(self, slot: int, records: np.ndarray) -> MessageBatch:
+        """
+        Returns:
+            MessageBatch: the claimed records, with IDs, lengths and content viewed in the ring rather than copied
+        """
+        itemsize = self.ring.dtype.itemsize
+        offsets = np.arange(len(records), dtype = np.int64) * itemsize + self._content_offset
+        content = memoryview(self.ring.raw[slot * itemsize:(slot + len(records)) * itemsize])
+        return MessageBatch(self.prefix, records['id'], records['length'], offsets, content,
+                            float(records['created_at'][0]), float(records['enqueued_at'][0]))
+
+    def complete(self, records: np.ndarray, sent: int, failed: int, send_time: float, dequeued_at: float):
+        """
+        Buffer the completion record of a chunk
+        """
+        self._pending.append((int(records['id'][0]), len(records), sent, failed, self.worker, send_time,
+                              float(records['created_at'][0]), float(records['enqueued_at'][0]), dequeued_at,
+                              time.monotonic()))
+        if len(self._pending) >= 256:
+            self.flush()
+        self._work.set()
+
+    def flush(self) -> bool:
+        """
+        Write buffered completion records to the completion ring, as many as fit
+
+        Returns:
+            bool: True if nothing is left buffered
+        """
+        if self._pending:
+            rows = np.array(self._pending, dtype = COMPLETION_DTYPE)
+            written = self.completions.write(rows)
+            del self._pending[:written]
+        return not self._pending
+
+    async def wait(self):
+        """
+        Wait until the poller sees records in the ring or the ring exhausted
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._work.set()
+        await waiter
+
+    async def run(self):
+        """
+        Poller: flushes completions and wakes waiting readers once there is something to take
+        """
+        while True:
+            self.flush()
+            if self._waiters and (len(self.ring) or self.ring.exhausted()):
+                waiters, self._waiters = self._waiters, []
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(None)
+            if self._waiters or self._pending:
+                await asyncio.sleep(self.poll_interval)
+            else:
+                self._work.clear()
+                await self._work.wait()
+
+    async def drain(self):
+        """
+        Wait until every completion record has been written
+        """
+        while not self.flush():
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+from .producer_model import ProducerModel
+from .sender_model import SenderModel
+from .display_monitor_model import monitor_progress, STAGES
+from .latency_histogram_model import LatencyHistogram
+from .retry_scheduler_model import RetryScheduler
+from .work_stealing_model import WorkStealingDispatcher
+from .health_dispatch_model import HealthAwareDispatcher, build_sender_profiles
+from .trace_model import TraceRecorder, TraceReplayProducer
+from .rate_limiter_model import build_rate_limiters
+from .autoscaler_model import Autoscaler
+from .counters_model import CounterRegistry, collect_counters
+from .metrics_exporter_model import MetricsExporter
+from .message_source_model import MessageSource
+from .arrival_model import ArrivalProducer, build_arrivals
+from .gateway_model import GatewayServer, GatewayPool
+from .rng_model import RandomStreams, PRODUCER, SENDER, RETRY, DISPATCH, GATEWAY
+from config import config
+
+logger = logging.getLogger(__name__)
+
+def new_stats() -> dict:
+    """
+    Returns:
+        dict: empty stats dictionary shared between senders and the monitor
+    """
+    return {
+        'sent': 0,
+        'failed': 0,
+        'total_time': 0.0,
+        'latency': LatencyHistogram()
+    }
+
+async def run_simulation(stats: dict, monitor = monitor_progress):
+    """
+    Runs one producer, config.num_senders senders and a monitor on a shared queue until every message is processed.
+    With config.pull_source the senders pull messages from a lazy MessageSource instead, and stop once it is exhausted.
+
+    Args:
+        stats (dict): Stats dictionary updated by the senders.
+        monitor (coroutine function): Called with stats and the queue, cancelled once the simulation is done.
+    """
+    registry = stats.setdefault('senders', CounterRegistry()) #per-sender counters, folded into the totals when reported
+    #one random stream per component, indexed by global sender ID so shards of a run draw from distinct streams
+    streams = RandomStreams(config.seed)
+    first_sender = registry.offset
+    logger.info("Random stream entropy: %d", streams.entropy)
+    pool_size = config.autoscale_max_senders if config.autoscale else config.num_senders #largest number of senders at once
+    pull = config.pull_source
+    if pull and (config.autoscale or config.dispatch != "central" or config.trace_replay_path or config.arrival_process):
+        raise ValueError("pull_source does not support autoscale, work_stealing or health dispatch, trace replay or arrival processes")
+    if config.dispatch == "health" and config.autoscale:
+        raise ValueError("health dispatch routes to a fixed pool of senders, it does not support autoscale")
+    if config.gateway_transport and (config.fast_forward or config.sender_batch_size > 1):
+        raise ValueError("gateway_transport makes real requests one message at a time, it does not support fast_forward "
+                         "or sender batching")
+    if config.stage_timing: #latency of each stage from a message's creation to its completion
+        for stage in STAGES:
+            stats.setdefault(stage, LatencyHistogram())
+    elif config.arrival_process: #open-loop arrivals, queue wait is measured apart from send time
+        stats.setdefault('queue_wait', LatencyHistogram())
+    recorder = None
+    if config.trace_record_path and not config.trace_replay_path:
+        recorder = TraceRecorder(config.trace_record_path, config.trace_record_content)
+
+    if pull: #senders take messages from the producer as they need them, nothing is queued up front
+        producer = ProducerModel(None, vectorized = config.vectorized_producer, chunk_size = config.message_chunk_size,
+                                 recorder = recorder, rng = streams.generator(PRODUCER, first_sender), stats = stats)
+        queue = MessageSource(producer.messages())
+    elif config.dispatch == "work_stealing": #per-sender deques instead of one contended queue
+        queue = WorkStealingDispatcher(pool_size, rng = streams.python(DISPATCH, first_sender))
+    elif config.dispatch == "health": #routed to the healthiest senders, per-sender circuit breakers
+        depth = max(config.dispatch_depth, config.sender_batch_size) #room to fill a batch
+        queue = HealthAwareDispatcher(pool_size, registry, depth, config.breaker_window, config.breaker_failure_threshold,
+                                      config.breaker_cooldown, stats, rng = streams.python(DISPATCH, first_sender))
+    else:
+        queue = asyncio.Queue(maxsize = config.queue_maxsize) # main datastructure to handle messages
+
+    background_tasks = []
+
+    #initialize retry scheduler, retries go back on the queue so sentinels are added only once they are done
+    retry_scheduler = None
+    if config.retry_max_attempts > 1:
+        retry_scheduler = RetryScheduler(queue, stats, config.retry_max_attempts, config.retry_base_delay, config.retry_max_delay,
+                                         rng = streams.buffered(RETRY, first_sender))
+        background_tasks.append(asyncio.create_task(retry_scheduler.run()))
+        if pull: #retries keep the source open until they are sent or dead-lettered
+            queue.retry_scheduler = retry_scheduler
+
+    #initialize producer (s), replaying a recorded trace if one is configured
+    producer_task = None
+    if config.trace_replay_path:
+        producer = TraceReplayProducer(queue, config.trace_replay_path, config.trace_replay_speed, chunk_size = config.message_chunk_size,
+                                       shard = config.trace_replay_shard, num_shards = config.trace_replay_shards,
+                                       rng = streams.generator(PRODUCER, first_sender), stats = stats)
+    elif config.arrival_process:
+        arrivals = build_arrivals(config.arrival_process, config.arrival_rate, config.arrival_params,
+                                  streams.generator(PRODUCER, first_sender))
+        producer = ArrivalProducer(queue, arrivals, config.arrival_slot, stats, vectorized = config.vectorized_producer,
+                                   recorder = recorder, rng = streams.generator(PRODUCER, first_sender))
+    elif not pull: #a pull source already wraps its producer
+        producer = ProducerModel(queue, vectorized = config.vectorized_producer, chunk_size = config.message_chunk_size,
+                                 recorder = recorder, rng = streams.generator(PRODUCER, first_sender), stats = stats)
+    if not pull:
+        #sentinels are only added by the producer when nothing else puts messages on the queue or stops the senders
+        add_sentinels = retry_scheduler is None and not config.autoscale
+        producer_task = asyncio.create_task(producer.produce_messages(add_sentinels = add_sentinels))
+
+    rate_limiters = build_rate_limiters(pool_size, config.sender_rate_limit, config.sender_rate_burst, config.carrier_pools)
+    profiles = build_sender_profiles(pool_size, config.sender_failure, config.sender_mean_time, config.sender_pools)
+
+    #initialize the gateway connection pool, and the bundled gateway stub unless a running gateway is configured
+    gateway = transport = None
+    if config.gateway_transport:
+        port = config.gateway_port
+        if not port:
+            gateway = GatewayServer(config.sender_mean_time, config.sender_failure, config.gateway_connect_time,
+                                    rng = streams.buffered(GATEWAY, first_sender))
+            port = await gateway.start()
+        transport = GatewayPool("127.0.0.1", port, config.gateway_pool_size, config.gateway_pipeline_depth)
+
+    def create_sender(i: int) -> SenderModel:
+        sender_queue = queue.queue_for(i) if isinstance(queue, (WorkStealingDispatcher, HealthAwareDispatcher)) else queue
+        failure_rate, mean_time = profiles[i]
+        return SenderModel(i, sender_queue, stats, failure_rate, mean_time,
+                           config.sender_batch_size, config.sender_batch_linger,
+                           config.sender_batch_base_time, config.sender_batch_message_time, retry_scheduler,
+                           rate_limiters[i], streams.buffered(SENDER, first_sender + i), transport)
+
+    sender_tasks = []
+    autoscaler = None
+    #initialize senders, either a fixed pool or one resized by the autoscaler
+    if config.autoscale:
+        autoscaler = Autoscaler(queue, stats, create_sender, config.autoscale_min_senders, config.autoscale_max_senders,
+                                config.autoscale_target_latency, config.autoscale_interval, config.autoscale_scale_down_step)
+        autoscaler.scale_to(config.num_senders)
+        autoscaler_task = asyncio.create_task(autoscaler.run())
+    else:
+        for i in range(config.num_senders):
+            sender = create_sender(i)
+            new_task = asyncio.create_task(sender.run_source() if pull else sender.run())
+            sender_tasks.append(new_task)
+
+    #initialize monitor, and the metrics endpoint if one is configured
+    background_tasks.append(asyncio.create_task(monitor(stats, queue)))
+    exporter = None
+    if config.metrics_port:
+        exporter = MetricsExporter(stats, queue, producer)
+        await exporter.start(port = config.metrics_port)
+
+    #==============================Await Async Tasks==============================
+
+    try:
+        if pull: #senders stop by themselves once the source is exhausted
+            await asyncio.gather(*sender_tasks)
+        else:
+            await producer_task
+    finally:
+        if recorder is not None:
+            recorder.close()
+    if not pull:
+        await queue.join() #wait for senders to finish process all messages in queue
+    if retry_scheduler is not None and not pull:
+        while retry_scheduler.pending: #wait for retries, which may fail and schedule more retries
+            await retry_scheduler.wait_idle()
+            await queue.join()
+        if autoscaler is None:
+            await producer.add_sentinel_vals()
+    if autoscaler is not None: #all work is done, retire the pool
+        autoscaler_task.cancel()
+        try:
+            await autoscaler_task
+        except asyncio.CancelledError:
+            pass
+        await autoscaler.stop()
+    for task in sender_tasks: #extra check to make sure that tasks have also finished
+        await task
+
+    for task in background_tasks: #manully cancel monitor and retry tasks
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    if exporter is not None:
+        await exporter.stop()
+    if transport is not None:
+        await transport.close()
+    if gateway is not None:
+        await gateway.stop()
+    collect_counters(stats)
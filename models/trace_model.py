@@ -0,0 +1,326 @@
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import numpy as np
+from .producer_model import ProducerModel, Message, MessageBatch, MAX_MESSAGE_LENGTH, CHARACTER_CODES
+
+logger = logging.getLogger(__name__)
+
+#File layout: a 64 byte header followed by fixed-size little-endian records, so any chunk of the file
+#can be viewed as a NumPy structured array straight from the memory map without parsing or copying.
+TRACE_MAGIC = b"SMSTRACE"
+TRACE_VERSION = 1
+FLAG_CONTENT = 1
+HEADER = struct.Struct("<8sHHHHQ32s8x") #magic, version, flags, content width, prefix length, record count, ID prefix
+MAX_PREFIX_LENGTH = 32
+
+def record_dtype(content_width: int = 0) -> np.dtype:
+    """
+    Returns:
+        np.dtype: packed record of arrival time (seconds from the start of the trace), ID number,
+        content length and, if content_width is above 0, the content padded to content_width bytes
+    """
+    record_fields = [('timestamp', '<f8'), ('id', '<u8'), ('length', '<u2')]
+    if content_width:
+        record_fields.append(('content', f"S{content_width}"))
+    return np.dtype(record_fields)
+
+class TraceRecorder:
+    """
+    Records message arrivals to a trace file. Records are buffered and appended in blocks, and the
+    header's record count is updated on every flush so a trace cut short is still readable.
+
+    Attributes:
+        path (str): Location of the trace file.
+        content_width (int): Bytes of content stored per message, 0 to store lengths only.
+        prefix (str): ID prefix of the recorded messages, taken from the first message.
+        count (int): Number of records written or buffered.
+        flush_size (int): Number of buffered records that triggers a write.
+    """
+
+    def __init__(self, path: str, record_content: bool = False, flush_size: int = 65536):
+        self.path = path
+        self.content_width = MAX_MESSAGE_LENGTH if record_content else 0
+        self.dtype = record_dtype(self.content_width)
+        self.prefix = None
+        self.count = 0
+        self.flush_size = flush_size
+        self._written = 0
+        self._buffer = []
+        self._buffered = 0
+        self._start_time = None
+        self._file = open(path, "wb")
+        self._write_header()
+
+    def record(self, item, timestamp: float = None):
+        """
+        Add the arrival of a Message or every row of a MessageBatch
+
+        Args:
+            item (Message | MessageBatch): What was put on the queue.
+            timestamp (float): Arrival time, the running loop's clock if None.
+        """
+        if timestamp is None:
+            timestamp = asyncio.get_running_loop().time()
+        if self._start_time is None:
+            self._start_time = timestamp
+
+        if isinstance(item, MessageBatch):
+            rows = self._batch_records(item)
+        else:
+            rows = self._message_records(item)
+        rows['timestamp'] = timestamp - self._start_time
+        self._buffer.append(rows)
+        self._buffered += len(rows)
+        self.count += len(rows)
+        if self._buffered >= self.flush_size:
+            self.flush()
+
+    def _message_records(self, message: Message) -> np.ndarray:
+        prefix, _, number = message.id.rpartition('_')
+        self._set_prefix(prefix + '_' if number.isdigit() else '')
+        rows = np.zeros(1, dtype = self.dtype)
+        rows['id'] = int(number) if number.isdigit() else self.count #IDs without a sequence number are renumbered
+        rows['length'] = len(message.content)
+        if self.content_width:
+            rows['content'] = message.content.encode('ascii')[:self.content_width]
+        return rows
+
+    def _batch_records(self, batch: MessageBatch) -> np.ndarray:
+        self._set_prefix(batch.prefix)
+        rows = np.zeros(len(batch), dtype = self.dtype)
+        rows['id'] = batch.ids
+        rows['length'] = batch.lengths
+        if self.content_width:
+            #scatter each row's slice of the batch buffer into its fixed-width slot
+            columns = np.arange(self.content_width)
+            mask = columns < np.minimum(batch.lengths, self.content_width)[:, None]
+            source = np.frombuffer(batch.content, dtype = np.uint8)
+            padded = np.zeros((len(batch), self.content_width), dtype = np.uint8)
+            padded[mask] = source[(batch.offsets[:, None] + columns)[mask]]
+            rows['content'] = padded.view(f"S{self.content_width}").ravel()
+        return rows
+
+    def _set_prefix(self, prefix: str):
+        if self.prefix is None:
+            if len(prefix.encode('ascii')) > MAX_PREFIX_LENGTH:
+                raise ValueError(f"ID prefix longer than {MAX_PREFIX_LENGTH} bytes: {prefix}")
+            self.prefix = prefix
+
+    def flush(self):
+        """
+        Append buffered records to the file and update the record count in the header
+        """
+        if self._buffer:
+            self._file.seek(HEADER.size + self._written * self.dtype.itemsize)
+            for rows in self._buffer:
+                self._file.write(rows.tobytes())
+            self._written += self._buffered
+            self._buffer = []
+            self._buffered = 0
+        self._write_header()
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+            logger.info(f"Recorded {self.count} messages to {self.path}")
+
+    def _write_header(self):
+        prefix = (self.prefix or '').encode('ascii')
+        self._file.seek(0)
+        self._file.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION, FLAG_CONTENT if self.content_width else 0,
+                                     self.content_width, len(prefix), self._written, prefix))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class TraceReader:
+    """
+    Reads a trace file through a read-only memory map. Chunks are NumPy views into the map, and pages
+    of chunks already consumed are handed back to the OS, so traces larger than memory can be streamed.
+
+    Attributes:
+        path (str): Location of the trace file.
+        content_width (int): Bytes of content stored per message, 0 if the trace has lengths only.
+        prefix (str): ID prefix of the recorded messages.
+        count (int): Number of records in the trace.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            self._file.close()
+            raise ValueError(f"Not a message trace: {path}")
+        magic, version, flags, content_width, prefix_length, count, prefix = HEADER.unpack(self._file.read(HEADER.size))
+        if magic != TRACE_MAGIC or version != TRACE_VERSION:
+            self._file.close()
+            raise ValueError(f"Not a version {TRACE_VERSION} message trace: {path}")
+
+        self.content_width = content_width if flags & FLAG_CONTENT else 0
+        self.prefix = prefix[:prefix_length].decode('ascii')
+        self.dtype = record_dtype(self.content_width)
+        self.count = min(count, (size - HEADER.size) // self.dtype.itemsize)
+        self._map = mmap.mmap(self._file.fileno(), 0, access = mmap.ACCESS_READ) if self.count else None
+        if self._map is not None and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            self._map.madvise(mmap.MADV_SEQUENTIAL) #read ahead aggressively, the trace is consumed front to back
+
+    def __len__(self) -> int:
+        return self.count
+
+    def chunks(self, chunk_records: int = 65536):
+        """
+        Yield the records in order, chunk_records at a time. Each chunk is a view into the memory map
+        and is only valid until the next chunk is requested.
+
+        Args:
+            chunk_records (int): Number of records per chunk.
+        """
+        released = 0 #file offset up to which pages were released
+        for start in range(0, self.count, chunk_records):
+            stop = min(start + chunk_records, self.count)
+            yield np.frombuffer(self._map, dtype = self.dtype, count = stop - start,
+                                offset = HEADER.size + start * self.dtype.itemsize)
+            released = self._release(released, HEADER.size + stop * self.dtype.itemsize)
+
+    def _release(self, start: int, end: int) -> int:
+        """
+        Drop the cached pages between start and end (rounded down to whole pages) from this process
+
+        Returns:
+            int: offset up to which pages have now been released
+        """
+        end -= end % mmap.PAGESIZE
+        if end > start and hasattr(mmap, 'MADV_DONTNEED'):
+            self._map.madvise(mmap.MADV_DONTNEED, start, end - start) #read-only file pages are simply reloaded if touched again
+            return end
+        return start
+
+    def close(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass #a chunk view is still referenced, the map is unmapped once it is garbage collected
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class TraceReplayProducer(ProducerModel):
+    """
+    Producer that replays a recorded trace instead of generating random messages. Arrivals keep their
+    recorded spacing (scaled by speed), IDs and lengths; content is replayed if the trace stored it and
+    generated randomly otherwise. Queue watermarks and sentinels work as in ProducerModel. A shard of a
+    sharded run replays every num_shards-th record, so the shards together replay the trace once.
+
+    Attributes:
+        path (str): Location of the trace file.
+        speed (float): Replay speed relative to the recording, 0 to enqueue as fast as possible.
+        chunk_records (int): Number of records read from the memory map at a time.
+        shard (int): Index of the records replayed modulo num_shards.
+        num_shards (int): Number of shards the records are dealt across.
+    """
+
+    def __init__(self, queue: asyncio.Queue, path: str, speed: float = 1.0, chunk_size: int = 0,
+                 chunk_records: int = 65536, shard: int = 0, num_shards: int = 1, **kwargs):
+        super().__init__(queue, chunk_size = chunk_size, **kwargs)
+        self.path = path
+        self.speed = speed
+        self.chunk_records = chunk_records
+        self.shard = shard
+        self.num_shards = max(1, num_shards)
+
+    def trace_batch(self, records: np.ndarray, prefix: str, content_width: int) -> MessageBatch:
+        """
+        Build a MessageBatch from a chunk of trace records
+
+        Args:
+            records (np.ndarray): Structured records viewed from the trace.
+            prefix (str): ID prefix of the trace.
+            content_width (int): Stored content width, 0 to generate random content.
+
+        Returns:
+            MessageBatch: messages with the recorded IDs, lengths and (if stored) content
+        """
+        lengths = records['length'].astype(np.int32)
+        if content_width:
+            offsets = np.arange(len(records), dtype = np.int64) * content_width
+            content = records['content'].tobytes() #rows stay padded, lengths mark where each message ends
+        else:
+            offsets = np.cumsum(lengths) - lengths
+            content = CHARACTER_CODES[self.rng.integers(0, len(CHARACTER_CODES), size = int(lengths.sum()))].tobytes()
+        return MessageBatch(prefix, records['id'].astype(np.int64), lengths, offsets, content)
+
+    async def produce_messages(self, add_sentinels: bool = True):
+        """
+        Stream the trace into the queue, chunk by chunk
+
+        Args:
+            add_sentinels (boolean): Add sentinel values once the trace has been replayed.
+        """
+        try:
+            self.running = True
+            loop = asyncio.get_running_loop()
+            start_time = loop.time()
+            with TraceReader(self.path) as reader:
+                logger.info(f"Replaying {len(reader)} messages from {self.path}")
+                start = 0 #index of the chunk's first record in the trace
+                for records in reader.chunks(self.chunk_records):
+                    if not self.running:
+                        break
+                    if self.num_shards > 1: #this shard's records, by their index in the whole trace
+                        chunk_length = len(records)
+                        records = records[(self.shard - start) % self.num_shards::self.num_shards]
+                        start += chunk_length
+                        if not len(records):
+                            continue
+                    batch = self.trace_batch(records, reader.prefix, reader.content_width)
+                    due_times = (start_time + records['timestamp'] / self.speed).tolist() if self.speed > 0 else None
+                    del records #release the view so the memory map can be closed
+                    timed = self.producer_time is not None
+                    if self.chunk_size > 0:
+                        starts = range(0, len(batch), self.chunk_size)
+                        items = [batch.slice(i, i + self.chunk_size) for i in starts]
+                    else:
+                        starts = range(len(batch))
+                        items = batch.to_messages(loop.time() if timed else None)
+
+                    for first, item in zip(starts, items):
+                        if due_times is not None and due_times[first] > loop.time():
+                            await asyncio.sleep(due_times[first] - loop.time()) #keep the recorded arrival spacing
+                        if timed:
+                            if due_times is not None: #created at its recorded arrival
+                                item.created_at = due_times[first]
+                            elif self.chunk_size > 0:
+                                item.created_at = loop.time()
+                        await self.queue.put(item)
+                        if timed:
+                            self.stamp_enqueued(item, loop.time())
+                        self.messages_produced += len(item) if self.chunk_size > 0 else 1
+                        if self.high_watermark and self.queue.qsize() >= self.high_watermark:
+                            await self.wait_for_drain()
+                    await asyncio.sleep(0) #let consumers catch up between chunks
+
+            if add_sentinels:
+                await self.add_sentinel_vals()
+            logger.info("Trace replay completed")
+
+        except Exception as e:
+            logger.error(f"Failed trace replay: {e}")
+            raise
+
+        finally:
+            self.running = False
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import random
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+class LocalQueue:
+    """
+    One sender's view of a WorkStealingDispatcher. Offers the parts of the asyncio.Queue
+    interface that SenderModel uses, so senders run unchanged.
+
+    Attributes:
+        dispatcher (WorkStealingDispatcher): The dispatcher owning the per-sender deques.
+        index (int): Position of this sender's deque.
+    """
+
+    def __init__(self, dispatcher: "WorkStealingDispatcher", index: int):
+        self.dispatcher = dispatcher
+        self.index = index
+
+    async def get(self):
+        return await self.dispatcher.get(self.index)
+
+    def get_nowait(self):
+        return self.dispatcher.get_nowait(self.index)
+
+    def task_done(self):
+        self.dispatcher.task_done()
+
+    def qsize(self) -> int:
+        return len(self.dispatcher.shards[self.index])
+
+    def empty(self) -> bool:
+        return self.dispatcher.empty()
+
+
+class WorkStealingDispatcher:
+    """
+    Replaces the single central queue with one deque per sender. The producer's items are dealt round-robin
+    across the deques; a sender takes from its own deque first and, when that is empty, steals half of a
+    busy peer's deque. Only one waiting sender is woken per item, and never more than needed.
+    Sentinel values (None) are held back until every deque is empty.
+
+    Attributes:
+        shards (list): Per-sender deques of pending items.
+        maxsize (int): Always 0, the dispatcher is unbounded.
+        wakeups (int): Number of times a waiting sender was woken.
+        steals (int): Number of times a sender took work from a peer.
+        steal_samples (int): Number of random peers compared when choosing whom to steal from.
+        rng (random.Random): Picks the peers to compare, the random module if none is given.
+    """
+
+    def __init__(self, num_shards: int, steal_samples: int = 4, rng: random.Random = None):
+        self.shards = [deque() for _ in range(num_shards)]
+        self.steal_samples = steal_samples
+        self.rng = rng if rng is not None else random
+        self.maxsize = 0
+        self.wakeups = 0
+        self.steals = 0
+        self._size = 0
+        self._sentinels = 0
+        self._next_shard = 0
+        self._waiters = {} #shard index -> future of a sender waiting for work
+        self._unfinished = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+    def queue_for(self, index: int) -> LocalQueue:
+        """
+        Returns:
+            LocalQueue: queue-like view for the sender owning deque index
+        """
+        return LocalQueue(self, index)
+
+    def qsize(self) -> int:
+        return self._size + self._sentinels
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def put_nowait(self, item):
+        """
+        Deal an item to the next deque, or hold a sentinel until all work is taken
+
+        Args:
+            item: Message, MessageBatch or None sentinel.
+        """
+        self._unfinished += 1
+        self._finished.clear()
+        if item is None:
+            self._sentinels += 1
+            self._wake(None)
+            return
+        index = self._next_shard
+        self._next_shard = (index + 1) % len(self.shards)
+        self.shards[index].append(item)
+        self._size += 1
+        self._wake(index)
+
+    async def put(self, item):
+        self.put_nowait(item)
+
+    def get_nowait(self, index: int):
+        """
+        Take work for a sender: its own deque first, then a steal, then a sentinel
+
+        Args:
+            index (int): Deque of the sender asking for work.
+        """
+        own = self.shards[index]
+        if not own and self._size:
+            self._steal(index)
+        if own:
+            self._size -= 1
+            return own.popleft()
+        if self._sentinels:
+            self._sentinels -= 1
+            return None
+        raise asyncio.QueueEmpty
+
+    async def get(self, index: int):
+        """
+        Take work for a sender, waiting if there is none anywhere
+
+        Args:
+            index (int): Deque of the sender asking for work.
+        """
+        while True:
+            try:
+                return self.get_nowait(index)
+            except asyncio.QueueEmpty:
+                pass
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters[index] = waiter
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._wake(None) #pass the wakeup on so the work is not stranded
+                raise
+            finally:
+                if self._waiters.get(index) is waiter:
+                    del self._waiters[index]
+
+    def task_done(self):
+        if self._unfinished <= 0:
+            raise ValueError('task_done() called too many times')
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._finished.set()
+
+    async def join(self):
+        await self._finished.wait()
+
+    def _steal(self, index: int):
+        """
+        Move the newer half of the busiest peer's deque into this sender's empty deque, keeping their order.
+        The busiest of a few random peers is used, with a full scan only if they are all empty.
+        """
+        victim = max(self.rng.sample(self.shards, min(self.steal_samples, len(self.shards))), key = len)
+        if not victim:
+            victim = max(self.shards, key = len)
+        own = self.shards[index]
+        for _ in range((len(victim) + 1) // 2):
+            own.appendleft(victim.pop())
+        self.steals += 1
+
+    def _wake(self, index):
+        """
+        Wake the owner of the deque that received work, or else any one waiting sender so it can steal
+        """
+        waiter = self._waiters.pop(index, None) if index is not None else None
+        if waiter is None and self._waiters:
+            _, waiter = self._waiters.popitem()
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+            self.wakeups += 1
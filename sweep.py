@@ -0,0 +1,307 @@
+# Parameter sweep runner for capacity planning.
+# To run a sweep, use the command: python3 sweep.py --grid num_senders=10,50,100 --grid sender_failure=0.1,0.2 --seeds 3
+# Points run in parallel in a process pool and results are cached in .sweep_cache, so re-running a sweep
+# only simulates the points that were added. The results table is written as CSV.
+# With --analytic the points are predicted from queueing theory instead of simulated, and with --validate
+# they are simulated and compared against the prediction.
+
+import argparse
+import asyncio
+import contextlib
+import csv
+import hashlib
+import io
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, fields, replace
+from models.simulation_model import new_stats, run_simulation
+from models.shard_runner_model import run_sharded
+from models.ring_pipeline_model import run_ring_pipeline
+from models.virtual_clock_model import run_virtual
+from models.analytic_model import predict, deviation, COMPARED
+from config import config, Config
+
+CACHE_DIR = ".sweep_cache"
+CACHE_VERSION = 3 #bump when the simulation or the result columns change, so stale results are not reused
+RESULT_COLUMNS = ('sent', 'failed', 'elapsed', 'throughput', 'avg_time', 'latency_p50', 'latency_p99', 'latency_max', 'wall_time')
+WAIT_COLUMNS = ('mean_wait', 'wait_p99') #added for open-loop arrivals and stage timing
+STAGE_COLUMNS = ('mean_producer', 'mean_service', 'mean_total', 'total_p99') #added for stage timing
+
+def parse_value(name: str, text: str):
+    """
+    Convert a command line value to the type of the Config field it is for
+
+    Args:
+        name (str): Config field name.
+        text (str): Value as typed.
+
+    Returns:
+        the value as int, float, bool, str or dict (given as JSON)
+    """
+    types = {field.name: field.type for field in fields(Config)}
+    if name not in types:
+        raise ValueError(f"Unknown config field: {name}")
+    kind = types[name]
+    if kind is bool:
+        if text.lower() not in ("true", "false", "1", "0"):
+            raise ValueError(f"Expected true or false for {name}: {text}")
+        return text.lower() in ("true", "1")
+    if kind is dict:
+        return json.loads(text)
+    return kind(text)
+
+def expand_grid(grid: dict) -> list:
+    """
+    Returns:
+        list: one dict of overrides per combination of the grid's values, in the order the values were given
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def config_key(point: Config, seed: int) -> str:
+    """
+    Returns:
+        str: hash of every config field, the seed and the cache version, used as the cache file name
+    """
+    payload = json.dumps({'config': asdict(point), 'seed': seed, 'version': CACHE_VERSION}, sort_keys = True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def overrides_of(variant, base: Config) -> dict:
+    """
+    Returns:
+        dict: the fields a variant sets, for a dict of overrides or the fields that differ from base for a Config
+    """
+    if isinstance(variant, Config):
+        return {field.name: getattr(variant, field.name) for field in fields(Config)
+                if getattr(variant, field.name) != getattr(base, field.name)}
+    return dict(variant)
+
+async def _no_monitor(stats: dict, queue: asyncio.Queue):
+    pass #sweeps only report final results
+
+def run_point(point: Config, seed: int) -> dict:
+    """
+    Worker process entry point: run the simulation once with the given config and seed
+
+    Args:
+        point (Config): Configuration of this point of the sweep.
+        seed (int): Seed of the run's random streams, replacing config.seed.
+
+    Returns:
+        dict: final results, see RESULT_COLUMNS, WAIT_COLUMNS and STAGE_COLUMNS
+    """
+    for field in fields(Config): #each process has its own copy of the global config
+        setattr(config, field.name, getattr(point, field.name))
+    config.seed = seed
+    logging.disable(logging.CRITICAL)
+
+    async def point_main():
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        stats = new_stats()
+        await run_simulation(stats, monitor = _no_monitor)
+        return stats, loop.time() - start_time
+
+    wall_start = time.perf_counter()
+    if config.ring_transport:
+        with contextlib.redirect_stdout(io.StringIO()): #monitor lines of the parent process
+            stats, elapsed = run_ring_pipeline(config.num_workers)
+    elif config.num_workers > 1:
+        with contextlib.redirect_stdout(io.StringIO()): #merged monitor lines of the shards
+            stats, elapsed = run_sharded(config.num_workers)
+    elif config.fast_forward:
+        stats, elapsed = run_virtual(point_main())
+    elif config.seed is not None:
+        stats, elapsed = run_virtual(point_main(), paced = True)
+    else:
+        stats, elapsed = asyncio.run(point_main())
+
+    sent, failed, latency = stats['sent'], stats['failed'], stats['latency']
+    result = {
+        'sent': sent,
+        'failed': failed,
+        'elapsed': elapsed,
+        'throughput': (sent + failed) / elapsed if elapsed > 0 else 0.0,
+        'avg_time': stats['total_time'] / sent if sent else 0.0,
+        'latency_p50': latency.percentile(50),
+        'latency_p99': latency.percentile(99),
+        'latency_max': latency.max,
+        'wall_time': time.perf_counter() - wall_start,
+    }
+    queue_wait = stats.get('queue_wait')
+    if queue_wait is not None:
+        result.update(mean_wait = queue_wait.mean(), wait_p99 = queue_wait.percentile(99))
+    if 'total_latency' in stats:
+        result.update(mean_producer = stats['producer_time'].mean(), mean_service = stats['service_time'].mean(),
+                      mean_total = stats['total_latency'].mean(), total_p99 = stats['total_latency'].percentile(99))
+    return result
+
+def _load_cached(path: str):
+    try:
+        with open(path) as f:
+            return json.load(f)['result']
+    except (OSError, ValueError, KeyError):
+        return None #missing or unreadable entries are simply recomputed
+
+def _store_cached(path: str, overrides: dict, seed: int, result: dict):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump({'overrides': overrides, 'seed': seed, 'result': result}, f, sort_keys = True)
+    os.replace(temp_path, path) #readers never see a partly written entry
+
+def predict_sweep(variants: list, base: Config = None) -> list:
+    """
+    Predict every variant analytically, without running the simulation
+
+    Args:
+        variants (list): Dicts of config overrides or whole Config objects.
+        base (Config): Configuration the overrides apply to, the current config if None.
+
+    Returns:
+        list: one row per variant holding the overrides and the predicted results
+    """
+    base = replace(base if base is not None else config)
+    rows = []
+    for variant in variants:
+        overrides = overrides_of(variant, base)
+        prediction = asdict(predict(replace(base, **overrides)))
+        prediction['notes'] = "; ".join(prediction['notes'])
+        rows.append(dict(overrides, **prediction))
+    return rows
+
+def run_sweep(variants: list, seeds = (0,), workers: int = None, cache_dir: str = CACHE_DIR, base: Config = None,
+              validate: bool = False) -> list:
+    """
+    Run every variant with every seed, reusing cached results
+
+    Args:
+        variants (list): Dicts of config overrides or whole Config objects.
+        seeds (list): Seeds each variant is run with.
+        workers (int): Size of the process pool, the number of CPUs if None.
+        cache_dir (str): Directory of cached results, None to disable the cache.
+        base (Config): Configuration the overrides apply to, the current config if None.
+        validate (boolean): Add the predicted value and relative deviation (predicted_<name> and <name>_error)
+            of every result the analytic model predicts.
+
+    Returns:
+        list: one row per variant and seed, in order, holding the overrides, the seed, the results and whether they were cached
+    """
+    base = replace(base if base is not None else config)
+    rows, points, pending = [], [], {}
+    for variant in variants:
+        overrides = overrides_of(variant, base)
+        point = replace(base, **overrides)
+        for seed in seeds:
+            row = dict(overrides, seed = seed)
+            path = os.path.join(cache_dir, f"{config_key(point, seed)}.json") if cache_dir else None
+            result = _load_cached(path) if path else None
+            row['cached'] = result is not None
+            if result is not None:
+                row.update(result)
+            else:
+                pending[len(rows)] = (point, seed, overrides, path)
+            rows.append(row)
+            points.append(point)
+
+    if pending:
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok = True)
+        with ProcessPoolExecutor(max_workers = min(workers or os.cpu_count() or 1, len(pending))) as executor:
+            futures = {executor.submit(run_point, point, seed): index for index, (point, seed, _, _) in pending.items()}
+            for future in as_completed(futures):
+                index = futures[future]
+                result = future.result()
+                rows[index].update(result)
+                _, seed, overrides, path = pending[index]
+                if path: #stored as soon as it is done, so an interrupted sweep keeps its finished points
+                    _store_cached(path, overrides, seed, result)
+
+    if validate:
+        for row, point in zip(rows, points):
+            prediction = predict(point)
+            errors = deviation(prediction, row)
+            for name in COMPARED:
+                row[f"predicted_{name}"] = getattr(prediction, name)
+                row[f"{name}_error"] = errors.get(name)
+    return rows
+
+def write_csv(rows: list, path: str):
+    """
+    Write the results table with the config override columns first, then the other columns in the order they appear
+    """
+    config_names = {field.name for field in fields(Config)}
+    columns = []
+    for row in rows:
+        columns += [key for key in row if key in config_names and key not in columns]
+    for row in rows:
+        columns += [key for key in row if key not in columns and key != 'cached']
+    if any('cached' in row for row in rows):
+        columns.append('cached')
+    with open(path, "w", newline = "") as f:
+        writer = csv.DictWriter(f, fieldnames = columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({key: json.dumps(value) if isinstance(value, dict) else value for key, value in row.items()})
+
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(description = "Run the simulation over a grid of config values.")
+    parser.add_argument("--grid", action = "append", default = [], metavar = "FIELD=V1,V2,...",
+                        help = "config field and the values to sweep it over, may be repeated")
+    parser.add_argument("--set", action = "append", default = [], metavar = "FIELD=VALUE",
+                        help = "config field fixed for every point, may be repeated")
+    parser.add_argument("--variants", help = "JSON file with a list of config override objects, crossed with the grid"
+                        " (use it for dict fields such as carrier_pools)")
+    parser.add_argument("--seeds", type = int, default = 1, help = "number of seeds (0, 1, ...) to run each point with")
+    parser.add_argument("--workers", type = int, default = None, help = "size of the process pool (default: CPU count)")
+    parser.add_argument("--output", default = "sweep_results.csv", help = "where to write the results table")
+    parser.add_argument("--cache-dir", default = CACHE_DIR, help = "directory of cached results")
+    parser.add_argument("--no-cache", action = "store_true", help = "recompute every point and leave the cache alone")
+    parser.add_argument("--real-time", action = "store_true", help = "run in real time instead of fast-forward")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--analytic", action = "store_true", help = "predict every point from queueing theory without simulating")
+    mode.add_argument("--validate", action = "store_true", help = "simulate and report the deviation from the prediction")
+    args = parser.parse_args(argv)
+
+    try:
+        grid = {}
+        for option in args.grid:
+            name, _, values = option.partition("=")
+            grid[name] = [parse_value(name, value) for value in values.split(",")]
+        fixed = {}
+        for option in args.set:
+            name, _, value = option.partition("=")
+            fixed[name] = parse_value(name, value)
+    except ValueError as e:
+        parser.error(str(e))
+
+    variants = [{}]
+    if args.variants:
+        with open(args.variants) as f:
+            variants = json.load(f)
+    points = [{**variant, **fixed, **overrides} for variant in variants for overrides in expand_grid(grid)]
+    base = replace(config, fast_forward = not args.real_time)
+
+    start = time.perf_counter()
+    if args.analytic:
+        rows = predict_sweep(points, base)
+        write_csv(rows, args.output)
+        print(f"{len(rows)} points predicted in {time.perf_counter() - start:.3f}s, results written to {args.output}")
+        return 0
+
+    rows = run_sweep(points, range(args.seeds), args.workers, None if args.no_cache else args.cache_dir, base, args.validate)
+    write_csv(rows, args.output)
+    cached = sum(row['cached'] for row in rows)
+    print(f"{len(rows)} runs ({cached} cached) in {time.perf_counter() - start:.1f}s, results written to {args.output}")
+    if args.validate: #mean absolute deviation of each predicted result
+        errors = {name: [abs(row[f"{name}_error"]) for row in rows if row[f"{name}_error"] is not None] for name in COMPARED}
+        print("Deviation from prediction: " + ", ".join(f"{name} {sum(values) / len(values):.1%}"
+                                                         for name, values in errors.items() if values))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,16 @@
+# Helpers shared by the test modules, imported with: from conftest import simulate, no_monitor
+
+from models.simulation_model import new_stats, run_simulation
+from models.virtual_clock_model import run_virtual
+
+async def no_monitor(stats, queue):
+    """Monitor that prints nothing, for runs that only check the final stats."""
+    pass
+
+def simulate(runner = run_virtual, **kwargs) -> dict:
+    """Run the configured simulation without monitor output and return its stats, on the virtual clock by default."""
+    async def main():
+        stats = new_stats()
+        await run_simulation(stats, monitor = no_monitor)
+        return stats
+    return runner(main(), **kwargs)
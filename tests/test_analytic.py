@@ -0,0 +1,157 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_analytic.py
+
+import pytest
+import asyncio
+import math
+from dataclasses import replace
+from models.analytic_model import (harmonic, erlang_c, mmc, predict, deviation, sender_mix, mixture_percentile,
+                                   expected_longest)
+from models.simulation_model import new_stats, run_simulation
+from models.virtual_clock_model import run_virtual
+from config import config, Config
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def base():
+    """Configuration with a backlog ten times the pool size."""
+    return Config(total_messages = 500, num_senders = 50, sender_failure = 0.2, sender_mean_time = 2.0)
+
+##########################################################
+# Queueing Formula Tests
+##########################################################
+
+def test_harmonic():
+    """Test exact and asymptotic harmonic numbers."""
+    assert harmonic(0) == 0.0
+    assert harmonic(4) == pytest.approx(1 + 1/2 + 1/3 + 1/4)
+    assert harmonic(1000) == pytest.approx(sum(1 / k for k in range(1, 1001)), rel = 1e-9)
+
+def test_expected_longest():
+    """Test the expected longest of exponential times against mean * H(n) and a two-way mix."""
+    assert expected_longest([2.0] * 50) == pytest.approx(2.0 * harmonic(50), rel = 1e-4)
+    assert expected_longest([1.0, 4.0]) == pytest.approx(1.0 + 4.0 - 1 / (1 / 1.0 + 1 / 4.0), rel = 1e-4)
+
+def test_erlang_c():
+    """Test Erlang C against closed forms."""
+    assert erlang_c(1, 0.5) == pytest.approx(0.5), "M/M/1 waits with probability rho"
+    assert erlang_c(2, 1.0) == pytest.approx(1 / 3)
+    assert erlang_c(2, 2.0) == 1.0
+    assert 0 < erlang_c(5000, 4900.0) < 1, "Should stay finite for large pools"
+
+def test_mmc():
+    """Test M/M/1 waits and unstable queues."""
+    queue = mmc(arrival_rate = 0.5, mean_time = 1.0, servers = 1)
+    assert queue['utilization'] == pytest.approx(0.5)
+    assert queue['mean_wait'] == pytest.approx(1.0)
+    assert queue['mean_response'] == pytest.approx(2.0)
+    assert math.isinf(mmc(3.0, 1.0, 2)['mean_wait'])
+
+##########################################################
+# Prediction Tests
+##########################################################
+
+def test_predict_backlog(base):
+    """Test the backlog drain time and the failure split."""
+    prediction = predict(base)
+    assert prediction.elapsed == pytest.approx(450 * 2.0 / 50 + 2.0 * harmonic(50))
+    assert (prediction.sent, prediction.failed) == pytest.approx((400, 100))
+    assert prediction.throughput == pytest.approx(500 / prediction.elapsed)
+    assert prediction.latency_p50 == pytest.approx(2.0 * math.log(2))
+    assert 0 < prediction.utilization < 1
+    assert prediction.notes == []
+
+def test_predict_small_backlog(base):
+    """Test that fewer messages than senders finish after the longest single send."""
+    assert predict(replace(base, total_messages = 10)).elapsed == pytest.approx(2.0 * harmonic(10))
+
+def test_predict_retries(base):
+    """Test that retries add attempts and reduce lost messages."""
+    prediction = predict(replace(base, retry_max_attempts = 3))
+    assert prediction.attempts == pytest.approx(500 * (1 + 0.2 + 0.04))
+    assert prediction.sent == pytest.approx(500 * (1 - 0.2 ** 3))
+    assert prediction.notes
+
+def test_predict_rate_limit(base):
+    """Test that the combined rate limit bounds the run."""
+    limited = replace(base, sender_rate_limit = 0.1, carrier_pools = {'a': {'rate': 1.0, 'senders': 20}})
+    prediction = predict(limited)
+    assert prediction.elapsed == pytest.approx(500 / (1.0 + 30 * 0.1))
+    assert "rate limited" in prediction.notes[-1]
+
+def test_predict_arrivals(base):
+    """Test open arrivals below and above capacity."""
+    light = predict(base, arrival_rate = 5.0)
+    assert light.elapsed == pytest.approx(500 / 5.0 + mmc(5.0, 2.0, 50)['mean_response'])
+    heavy = predict(base, arrival_rate = 1000.0)
+    assert heavy.elapsed == pytest.approx(predict(base).elapsed)
+    assert heavy.notes
+
+def test_deviation(base):
+    """Test relative deviations of simulated results."""
+    prediction = predict(base)
+    errors = deviation(prediction, {'sent': 440, 'elapsed': prediction.elapsed * 0.9, 'latency_max': 30.0})
+    assert errors == pytest.approx({'sent': 0.1, 'elapsed': -0.1})
+
+##########################################################
+# Validation Tests
+def test_sender_mix():
+    """Test that busy senders share the attempts in proportion to their send rates."""
+    mix = sender_mix([(0.1, 1.0)] * 2 + [(0.5, 4.0)] * 2)
+    assert mix == pytest.approx([(0.8, 0.1, 1.0), (0.2, 0.5, 4.0)])
+    assert sender_mix([(0.1, 1.0), (0.5, 4.0)], by_speed = False) == pytest.approx([(0.5, 0.1, 1.0), (0.5, 0.5, 4.0)])
+    assert sender_mix([(0.1, 0.0), (0.5, 4.0)]) == [(1.0, 0.1, 0.0)], "Senders with no send time take everything"
+    assert mixture_percentile([(1.0, 0.0, 2.0)], 50) == pytest.approx(2.0 * math.log(2))
+    p99 = mixture_percentile(mix, 99)
+    assert 0.8 * math.exp(-p99) + 0.2 * math.exp(-p99 / 4.0) == pytest.approx(0.01)
+
+def test_predict_sender_pools(base):
+    """Test that sender pools change the failure rate and send time instead of being ignored."""
+    pools = replace(base, sender_pools = {"flaky": {"senders": 25, "failure": 0.8}, "slow": {"senders": 5, "mean_time": 8.0}})
+    prediction = predict(pools)
+    assert prediction.failed > predict(base).failed * 2
+    assert prediction.elapsed > predict(base).elapsed
+    assert prediction.latency_p99 > predict(base).latency_p99
+    assert prediction.notes
+
+##########################################################
+
+def test_prediction_matches_simulation(mocker):
+    """Test that a simulated backlog lands close to the prediction."""
+    for name, value in [("total_messages", 5000), ("num_senders", 50), ("sender_failure", 0.15),
+                        ("sender_mean_time", 2.0), ("monitor_interval", 1e6), ("seed", 1)]:
+        mocker.patch.object(config, name, value)
+    stats = new_stats()
+
+    async def timed_run():
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        await run_simulation(stats)
+        return loop.time() - start_time
+    elapsed = run_virtual(timed_run())
+
+    prediction = predict(config)
+    errors = deviation(prediction, {'sent': stats['sent'], 'elapsed': elapsed, 'avg_time': stats['total_time'] / stats['sent']})
+    assert all(abs(error) < 0.05 for error in errors.values()), errors
+
+def test_prediction_matches_simulation_with_pools(mocker):
+    """Test that a simulated run over unlike sender pools lands close to the prediction."""
+    for name, value in [("total_messages", 5000), ("num_senders", 50), ("sender_failure", 0.1),
+                        ("sender_mean_time", 1.0), ("monitor_interval", 1e6), ("seed", 4),
+                        ("sender_pools", {"flaky": {"senders": 10, "failure": 0.8}, "slow": {"senders": 10, "mean_time": 4.0}})]:
+        mocker.patch.object(config, name, value)
+    stats = new_stats()
+
+    async def timed_run():
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        await run_simulation(stats)
+        return loop.time() - start_time
+    elapsed = run_virtual(timed_run())
+
+    prediction = predict(config)
+    errors = deviation(prediction, {'failed': stats['failed'], 'elapsed': elapsed, 'avg_time': stats['total_time'] / stats['sent']})
+    assert all(abs(error) < 0.1 for error in errors.values()), errors
@@ -0,0 +1,202 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_arrival.py
+
+import pytest
+import asyncio
+import gc
+import numpy as np
+from models.arrival_model import (PoissonArrivals, MMPPArrivals, ArrivalProducer, diurnal, steps, build_arrivals,
+                                  scale_arrivals, RateCurveArrivals)
+from models.display_monitor_model import format_stats, format_stages
+from models.latency_histogram_model import LatencyHistogram
+from models.shard_runner_model import shard_configs
+from models.analytic_model import predict
+from models.virtual_clock_model import run_virtual
+from config import config, Config
+from conftest import simulate
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def rng():
+    """Fixture to create a seeded generator for arrival times."""
+    return np.random.default_rng(11)
+
+@pytest.fixture
+def mock_config(mocker):
+    """Mock configuration settings for an open-loop fast-forward run."""
+    mocker.patch.object(config, "total_messages", 20000)
+    mocker.patch.object(config, "num_senders", 20)
+    mocker.patch.object(config, "sender_failure", 0.0)
+    mocker.patch.object(config, "sender_mean_time", 0.01)
+    mocker.patch.object(config, "monitor_interval", 1000.0)
+    mocker.patch.object(config, "arrival_process", "poisson")
+    mocker.patch.object(config, "arrival_rate", 1600.0)
+    mocker.patch.object(config, "arrival_slot", 0.0)
+    mocker.patch.object(config, "seed", 5)
+
+def arrival_times(process, count: int) -> np.ndarray:
+    times, blocks = [], process.blocks(1000)
+    while sum(map(len, times)) < count:
+        times.append(next(blocks))
+    return np.concatenate(times)[:count]
+
+def produce(process, total: int, slot: float, queue: asyncio.Queue = None, mocker = None) -> tuple:
+    """Run an ArrivalProducer on the virtual clock and return it with the release time of every message."""
+    queue = queue if queue is not None else asyncio.Queue()
+    released = []
+
+    async def main():
+        producer = ArrivalProducer(queue, process, slot)
+        loop = asyncio.get_running_loop()
+        put_nowait = queue.put_nowait
+
+        def timed_put(message): #note when each message reaches the queue
+            put_nowait(message)
+            released.append((message.created_at, loop.time()))
+        queue.put_nowait = timed_put
+        await producer.produce_messages(add_sentinels = False)
+        return producer
+    mocker.patch.object(config, "total_messages", total)
+    return run_virtual(main()), released
+
+##########################################################
+# Arrival Process Tests
+##########################################################
+
+def test_poisson_rate(rng):
+    """Test that Poisson arrivals are increasing with exponential gaps at the target rate."""
+    times = arrival_times(PoissonArrivals(500.0, rng), 50000)
+    gaps = np.diff(times)
+    assert (gaps > 0).all()
+    assert len(times) / times[-1] == pytest.approx(500.0, rel = 0.02)
+    assert gaps.std() / gaps.mean() == pytest.approx(1.0, rel = 0.03), "Exponential gaps have a CV of 1"
+
+def test_mmpp_bursty(rng):
+    """Test that MMPP arrivals reach the time-weighted mean rate and are burstier than Poisson."""
+    process = MMPPArrivals([100.0, 1000.0], [1.0, 0.25], rng)
+    assert process.rate == pytest.approx(280.0)
+    times = arrival_times(process, 100000)
+    assert len(times) / times[-1] == pytest.approx(280.0, rel = 0.1)
+    counts = np.bincount(times.astype(int))
+    assert counts.var() / counts.mean() > 10, "Counts per second should be overdispersed"
+
+def test_diurnal_curve(rng):
+    """Test that a diurnal curve keeps its mean and peaks where the sine does."""
+    times = arrival_times(diurnal(1000.0, amplitude = 0.8, period = 10.0, rng = rng), 100000)
+    assert len(times) / times[-1] == pytest.approx(1000.0, rel = 0.05)
+    phase = times % 10.0
+    rising, falling = np.sum(phase < 5.0), np.sum(phase >= 5.0)
+    assert rising / falling == pytest.approx((1 + 0.8 * 2 / np.pi) / (1 - 0.8 * 2 / np.pi), rel = 0.05)
+
+def test_step_changes(rng):
+    """Test that step changes switch the rate at the given times."""
+    times = arrival_times(steps(100.0, [[10.0, 1000.0], [20.0, 0.0], [30.0, 200.0]], rng), 16000)
+    counts = np.histogram(times, bins = [0, 10, 20, 30, 40])[0]
+    assert counts[0] == pytest.approx(1000, rel = 0.1)
+    assert counts[1] == pytest.approx(10000, rel = 0.05)
+    assert counts[2] == 0
+    assert counts[3] > 0
+
+def test_zero_rate_curve_raises(rng):
+    """Test that a curve which drops to zero for good raises instead of drawing candidates forever."""
+    with pytest.raises(ValueError):
+        steps(100.0, [[10.0, 0.0]], rng)
+    with pytest.raises(ValueError):
+        steps(100.0, [[10.0, -5.0], [20.0, 100.0]], rng)
+    with pytest.raises(ValueError):
+        RateCurveArrivals(lambda t: t, 0.0)
+    blocks = RateCurveArrivals(lambda t: np.where(t < 1.0, 100.0, 0.0), 100.0, rng, max_idle = 50.0).blocks(64)
+    with pytest.raises(ValueError):
+        for _ in range(1000):
+            next(blocks)
+
+def test_build_and_scale_arrivals(rng):
+    """Test building processes from config and splitting their rates across shards."""
+    assert isinstance(build_arrivals("poisson", 10.0), PoissonArrivals)
+    assert build_arrivals("mmpp", 10.0, {'burst_rate': 100.0}).rates == [10.0, 100.0]
+    with pytest.raises(ValueError):
+        build_arrivals("uniform", 10.0)
+
+    rate, params = scale_arrivals(1000.0, {'burst_rate': 5000.0, 'steps': [[1.0, 2000.0]]}, 0.25)
+    assert (rate, params['burst_rate'], params['steps']) == (250.0, 1250.0, [[1.0, 500.0]])
+    shards = shard_configs(Config(total_messages = 1000, num_senders = 10, arrival_rate = 800.0), 4)
+    assert sum(shard.arrival_rate for shard in shards) == pytest.approx(800.0)
+
+##########################################################
+# Arrival Producer Tests
+##########################################################
+
+def test_releases_batched_per_slot(rng, mocker):
+    """Test that high-rate arrivals are released once per slot, never early and at most a slot late."""
+    producer, released = produce(PoissonArrivals(50000.0, rng), 50000, 0.001, mocker = mocker)
+    assert len(released) == 50000
+    assert producer.releases < 1100, "About one release per slot over one second"
+    lags = [release - arrival for arrival, release in released]
+    assert min(lags) >= 0
+    assert max(lags) <= 0.001 + 1e-9
+    assert producer.max_lag == pytest.approx(max(lags))
+
+def test_exact_release_without_slots(rng, mocker):
+    """Test that a slot of 0 releases every arrival at its exact scheduled time."""
+    _, released = produce(PoissonArrivals(1000.0, rng), 2000, 0.0, mocker = mocker)
+    assert all(release == arrival for arrival, release in released)
+
+def test_full_queue_drops_arrivals(rng, mocker):
+    """Test that open-loop arrivals are dropped instead of waiting for room."""
+    producer, released = produce(PoissonArrivals(1000.0, rng), 500, 0.001, asyncio.Queue(maxsize = 100), mocker)
+    assert len(released) == 100
+    assert producer.dropped == 400
+    assert producer.messages_produced == 500
+
+@pytest.mark.asyncio
+async def test_real_time_rate(rng, mocker):
+    """Test that the real event loop keeps up with 50k arrivals per second over the run. Release lag per slot is
+    checked on the virtual clock (test_releases_batched_per_slot), a wall-clock bound would measure GC pauses."""
+    mocker.patch.object(config, "total_messages", 25000)
+    queue = asyncio.Queue()
+    producer = ArrivalProducer(queue, PoissonArrivals(50000.0, rng), 0.001)
+    loop = asyncio.get_running_loop()
+    gc.freeze() #keep the rest of the suite's heap out of the collections during the run
+    try:
+        start = loop.time()
+        await producer.produce_messages(add_sentinels = False)
+        elapsed = loop.time() - start
+    finally:
+        gc.unfreeze()
+    assert queue.qsize() == 25000
+    assert elapsed == pytest.approx(0.5, abs = 0.05), "Late wake-ups are caught up, the run keeps its length"
+
+##########################################################
+# Simulation Tests
+##########################################################
+
+def test_queue_wait_reported_separately(mock_config):
+    """Test that an open-loop run measures queue wait apart from send time."""
+    stats = simulate()
+    assert stats['sent'] == config.total_messages
+    assert stats['queue_wait'].count == config.total_messages
+    assert stats['latency'].mean() == pytest.approx(config.sender_mean_time, rel = 0.05)
+    assert "Queue wait mean:" in format_stages(stats)
+
+def test_queue_wait_matches_mmc(mock_config):
+    """Test that the simulated queue wait of Poisson arrivals matches the M/M/c prediction."""
+    stats = simulate() #load 16 of 20 senders
+    predicted = predict().mean_wait
+    assert stats['queue_wait'].mean() == pytest.approx(predicted, rel = 0.25)
+
+def test_overload_grows_queue_wait(mock_config, mocker):
+    """Test that arrivals beyond capacity build up queue wait while send time stays the same."""
+    mocker.patch.object(config, "arrival_rate", 4000.0) #twice what 20 senders can send
+    stats = simulate()
+    assert stats['queue_wait'].mean() > 1.0
+    assert stats['latency'].mean() == pytest.approx(config.sender_mean_time, rel = 0.05)
+
+def test_format_stats_dropped():
+    """Test that dropped arrivals are shown once there are any."""
+    stats = {'sent': 1, 'failed': 0, 'total_time': 1.0, 'queue_wait': LatencyHistogram(), 'dropped': 0}
+    assert "Dropped" not in format_stats(stats)
+    stats['dropped'] = 3
+    assert "Dropped: 3" in format_stats(stats)
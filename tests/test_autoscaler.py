@@ -0,0 +1,120 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_autoscaler.py
+
+import pytest
+import asyncio
+from models.autoscaler_model import Autoscaler, PoolHistory
+from models.sender_model import SenderModel
+from models.producer_model import Message
+from models.virtual_clock_model import run_virtual
+from models.simulation_model import new_stats, run_simulation
+from config import config
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def mock_config(mocker):
+    """Mock configuration settings for an autoscaled simulation run."""
+    mocker.patch.object(config, "total_messages", 2000)
+    mocker.patch.object(config, "num_senders", 2)
+    mocker.patch.object(config, "sender_failure", 0.1)
+    mocker.patch.object(config, "sender_mean_time", 1.0)
+    mocker.patch.object(config, "monitor_interval", 1000.0)
+    mocker.patch.object(config, "autoscale", True)
+    mocker.patch.object(config, "autoscale_max_senders", 100)
+    mocker.patch.object(config, "autoscale_target_latency", 5.0)
+
+def make_autoscaler(queue, stats, **kwargs) -> Autoscaler:
+    """Autoscaler whose senders take 10ms per message on average and never fail."""
+    return Autoscaler(queue, stats, lambda i: SenderModel(i, queue, stats, 0.0, 0.01), **kwargs)
+
+##########################################################
+# Pool History Tests
+##########################################################
+
+def test_pool_history_records_changes_only():
+    """Test that only size changes are stored."""
+    history = PoolHistory()
+    for when, size in [(0.0, 2), (1.0, 2), (2.0, 5), (2.0, 6), (4.0, 0)]:
+        history.record(when, size)
+    assert history.times == [0.0, 2.0, 4.0]
+    assert history.sizes == [2, 6, 0]
+    assert history.size_at(3.0) == 6
+    assert history.sender_seconds(4.0) == pytest.approx(2 * 2 + 6 * 2)
+
+def test_pool_history_merge():
+    """Test that merged histories add the pool sizes of each shard."""
+    first, second = PoolHistory(), PoolHistory()
+    first.record(0.0, 2); first.record(2.0, 4)
+    second.record(1.0, 3); second.record(2.0, 0)
+    merged = first.copy()
+    merged.merge(second)
+    assert list(zip(merged.times, merged.sizes)) == [(0.0, 2), (1.0, 5), (2.0, 4)]
+    assert first.sizes == [2, 4], "Merging a copy should leave the original unchanged"
+
+##########################################################
+# Controller Tests
+##########################################################
+
+def test_desired_size_follows_littles_law():
+    """Test that the pool is sized for arrivals plus clearing the backlog within the target."""
+    autoscaler = make_autoscaler(asyncio.Queue(), new_stats(), max_senders = 1000, target_latency = 10.0)
+    # 50 msgs/sec at 2s each needs 100 senders, plus 800 waiting cleared within 8s needs 200 more
+    assert autoscaler.desired_size(800, 50.0, 50.0, 2.0) == 300
+    assert autoscaler.desired_size(0, 50.0, 50.0, 2.0) == 100
+    assert autoscaler.desired_size(10, 0.0, 0.0, 12.0) == 1000, "An unreachable target should use every sender"
+
+@pytest.mark.asyncio
+async def test_scale_down_retires_idle_senders_without_sentinels():
+    """Test that idle senders are cancelled and remaining senders still process every message."""
+    queue = asyncio.Queue()
+    stats = new_stats()
+    autoscaler = make_autoscaler(queue, stats, max_senders = 10)
+    autoscaler.scale_to(6)
+    await asyncio.sleep(0)
+    tasks = [task for _, task in autoscaler.senders.values()]
+
+    autoscaler.scale_to(2)
+    await asyncio.sleep(0)
+    assert sum(task.cancelled() for task in tasks) == 4
+    assert stats['active_senders'] == 2
+
+    for i in range(4):
+        queue.put_nowait(Message(id = f"MSG_0_{i}", content = "x"))
+    await asyncio.wait_for(queue.join(), timeout = 10)
+    assert stats['sent'] == 4
+    await autoscaler.stop()
+    assert all(task.done() for task in tasks)
+
+@pytest.mark.asyncio
+async def test_busy_sender_finishes_current_send(mocker):
+    """Test that a sender retired mid-send completes that message first."""
+    mocker.patch('random.expovariate', return_value = 0.05)
+    queue = asyncio.Queue()
+    stats = new_stats()
+    autoscaler = make_autoscaler(queue, stats, max_senders = 2)
+    autoscaler.scale_to(1)
+    queue.put_nowait(Message(id = "MSG_0_1", content = "x"))
+    await asyncio.sleep(0.01) #sender is now sleeping in its send
+
+    await autoscaler.stop()
+    assert stats['sent'] == 1
+    assert queue.empty()
+
+##########################################################
+# Simulation Tests
+##########################################################
+
+def test_autoscaled_simulation(mock_config):
+    """Test that an autoscaled run grows the pool, processes every message and retires all senders."""
+    stats = new_stats()
+    run_virtual(run_simulation(stats))
+
+    assert stats['sent'] + stats['failed'] == config.total_messages
+    assert stats['active_senders'] == 0
+    history = stats['pool_history']
+    assert history.sizes[0] == 2, "Pool should start at num_senders"
+    assert max(history.sizes) == config.autoscale_max_senders
+    assert history.sizes[-1] == 0
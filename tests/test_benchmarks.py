@@ -0,0 +1,62 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_benchmarks.py
+
+import pytest
+import json
+from benchmarks import run_benchmarks
+from benchmarks.run_benchmarks import compare, main, median_results
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def baseline():
+    """Fixture with one rate and one memory figure."""
+    return {
+        'sender.drain': {'msgs_per_sec': 1000.0},
+        'end_to_end.1000x50': {'msgs_per_sec': 500.0, 'peak_rss_mb': 40.0},
+    }
+
+##########################################################
+# Comparison Tests
+##########################################################
+
+def test_compare_within_tolerance(baseline):
+    """Test that small changes in either direction are not regressions."""
+    results = {
+        'sender.drain': {'msgs_per_sec': 800.0},
+        'end_to_end.1000x50': {'msgs_per_sec': 900.0, 'peak_rss_mb': 48.0},
+    }
+    assert compare(results, baseline, tolerance = 0.25) == []
+
+def test_compare_detects_slowdown_and_memory_growth(baseline):
+    """Test that lower rates and higher memory beyond the tolerance are reported."""
+    results = {
+        'sender.drain': {'msgs_per_sec': 700.0},
+        'end_to_end.1000x50': {'msgs_per_sec': 500.0, 'peak_rss_mb': 60.0},
+    }
+    regressions = compare(results, baseline, tolerance = 0.25)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("sender.drain msgs_per_sec")
+    assert regressions[1].startswith("end_to_end.1000x50 peak_rss_mb")
+
+def test_compare_skips_new_benchmarks(baseline):
+    """Test that benchmarks without a baseline entry are ignored."""
+    assert compare({'producer.new': {'msgs_per_sec': 1.0}}, baseline) == []
+
+def test_median_results():
+    """Test that several runs combine into the median of each metric."""
+    runs = [{'sender.drain': {'msgs_per_sec': rate, 'peak_rss_mb': 40.0}} for rate in (70.0, 100.0, 80.0)]
+    assert median_results(runs) == {'sender.drain': {'msgs_per_sec': 80.0, 'peak_rss_mb': 40.0}}
+
+def test_main_exit_status(baseline, tmp_path, mocker):
+    """Test that the suite writes JSON results and exits nonzero on a regression."""
+    mocker.patch.object(run_benchmarks, "run_all", return_value = {'sender.drain': {'msgs_per_sec': 100.0}})
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps({'results': baseline}))
+    output_path = tmp_path / "results.json"
+
+    assert main(["--output", str(output_path), "--baseline", str(baseline_path)]) == 1
+    assert json.loads(output_path.read_text())['results']['sender.drain']['msgs_per_sec'] == 100.0
+    assert main(["--output", str(output_path), "--baseline", str(baseline_path), "--tolerance", "0.95"]) == 0
@@ -0,0 +1,160 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_counters.py
+
+import pytest
+import pickle
+from models.counters_model import (SenderCounters, StatsDictCounters, CounterRegistry, collect_counters,
+                                   find_outliers, sender_summary)
+from models.display_monitor_model import format_senders
+from models.sender_model import SenderModel
+from models.virtual_clock_model import run_virtual
+from models.simulation_model import new_stats, run_simulation
+from config import config
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def mock_config(mocker):
+    """Mock configuration settings for a small fast-forward run."""
+    mocker.patch.object(config, "total_messages", 500)
+    mocker.patch.object(config, "num_senders", 10)
+    mocker.patch.object(config, "sender_failure", 0.2)
+    mocker.patch.object(config, "sender_mean_time", 1.0)
+    mocker.patch.object(config, "monitor_interval", 10.0)
+
+def make_registry(sent_by_sender: dict, failed_by_sender: dict = None) -> CounterRegistry:
+    """Registry of active senders with the given counts."""
+    registry = CounterRegistry()
+    for sender_id, sent in sent_by_sender.items():
+        counters = registry.counters_for(sender_id)
+        counters.sent = sent
+        counters.failed = (failed_by_sender or {}).get(sender_id, 0)
+        counters.active = True
+    return registry
+
+##########################################################
+# Counter Tests
+##########################################################
+
+def test_sender_counters_merge_and_copy():
+    """Test that counters add up and copies are independent."""
+    first, second = SenderCounters(0), SenderCounters(0)
+    first.sent, first.failed, first.total_time = 3, 1, 1.5
+    second.sent, second.throttle_time = 2, 0.5
+    clone = first.copy()
+    first.merge(second)
+
+    assert (first.sent, first.failed, first.total_time, first.throttle_time) == (5, 1, 1.5, 0.5)
+    assert clone.sent == 3, "Copies should not change with the original"
+    assert first.failure_rate() == pytest.approx(1 / 6)
+    assert SenderCounters(1).failure_rate() == 0.0
+
+def test_counters_pickle():
+    """Test that registries survive the trip between processes."""
+    registry = make_registry({0: 4, 1: 6}, {1: 2})
+    restored = pickle.loads(pickle.dumps(registry))
+    assert restored.sent_counts() == {0: 4, 1: 6}
+    assert restored.counters_for(1).failed == 2
+    assert restored.counters_for(1).active
+
+def test_stats_dict_counters():
+    """Test that senders without a registry still update the shared stats dictionary."""
+    stats = {'sent': 0, 'failed': 0, 'total_time': 0.0}
+    counters = StatsDictCounters(stats)
+    counters.sent += 2
+    counters.total_time += 1.5
+    counters.throttle_time += 0.5
+    assert stats == {'sent': 2, 'failed': 0, 'total_time': 1.5, 'throttle_time': 0.5}
+
+def test_registry_collect():
+    """Test that collect writes the summed counters into the stats totals."""
+    registry = make_registry({0: 4, 1: 6}, {0: 1})
+    registry.counters_for(1).throttle_time = 2.0
+    stats = {'sent': 0, 'failed': 0, 'total_time': 0.0, 'senders': registry}
+    collect_counters(stats)
+    assert (stats['sent'], stats['failed']) == (10, 1)
+    assert 'throttle_time' not in stats, "Only stats that are tracked should be written"
+
+def test_registry_merge_with_offsets():
+    """Test that registries of different shards keep their senders apart when merged."""
+    first, second = CounterRegistry(), CounterRegistry(offset = 5)
+    first.counters_for(0).sent = 3
+    second.counters_for(0).sent = 7
+    merged = first.copy()
+    merged.merge(second)
+    merged.merge(second)
+
+    assert merged.sent_counts() == {0: 3, 5: 14}
+    assert first.sent_counts() == {0: 3}, "Inputs should not be modified"
+
+def test_sender_uses_registry():
+    """Test that a sender writes its own counters when the stats hold a registry."""
+    stats = new_stats()
+    stats['senders'] = CounterRegistry()
+    sender = SenderModel(3, None, stats)
+    assert sender.counters is stats['senders'].counters_for(3)
+
+##########################################################
+# Outlier Tests
+##########################################################
+
+def test_find_outliers():
+    """Test that values far from the median are flagged in the right direction."""
+    values = {i: 100.0 + i for i in range(10)}
+    values[10], values[11] = 10.0, 400.0
+    outliers = find_outliers(values)
+    assert set(outliers) == {10, 11}
+    assert outliers[10] < 0 < outliers[11]
+
+def test_find_outliers_uniform():
+    """Test that identical or too few values have no outliers."""
+    assert find_outliers({i: 5.0 for i in range(10)}) == {}
+    assert find_outliers({0: 1.0, 1: 100.0}) == {}
+
+def test_find_outliers_mostly_equal():
+    """Test the fallback when more than half the values are identical."""
+    values = {i: 0.1 for i in range(10)}
+    values[10] = 0.9
+    assert set(find_outliers(values)) == {10}
+
+def test_sender_summary_outliers():
+    """Test that slow and failing senders are reported."""
+    registry = make_registry({i: 100 for i in range(8)}, {i: 10 for i in range(8)})
+    registry.counters_for(2).sent, registry.counters_for(2).failed = 20, 2
+    registry.counters_for(5).failed = 90
+    summary = sender_summary(registry, {}, 10.0)
+
+    assert summary['throughput'][0] == 10.0
+    assert summary['outliers'] == {2: ['slow'], 5: ['failing']}
+    line = format_senders(summary)
+    assert line.startswith("8 senders, msgs/sec median 10.00 (min 2.00, max 10.00)")
+    assert "outliers: 2 (slow), 5 (failing)" in line
+
+def test_sender_summary_skips_inactive():
+    """Test that finished senders and senders with few attempts are left out."""
+    registry = make_registry({0: 100, 1: 100, 2: 5})
+    registry.counters_for(1).active = False
+    summary = sender_summary(registry, {0: 50}, 10.0)
+    assert summary['throughput'] == {0: 5.0, 2: 0.5}
+    assert list(summary['failure_rate']) == [0]
+    assert format_senders(sender_summary(CounterRegistry(), {}, 10.0)) == "No active senders"
+
+##########################################################
+# Simulation Tests
+##########################################################
+
+def test_simulation_totals_match_counters(mock_config, capsys):
+    """Test that the reported totals are the sum of the per-sender counters."""
+    stats = new_stats()
+    run_virtual(run_simulation(stats))
+    registry = stats['senders']
+
+    assert len(registry) == config.num_senders
+    assert sum(counters.sent for counters in registry) == stats['sent']
+    assert sum(counters.failed for counters in registry) == stats['failed']
+    assert stats['sent'] + stats['failed'] == config.total_messages
+    assert not any(counters.active for counters in registry), "Senders should be inactive once stopped"
+    captured = capsys.readouterr()
+    assert "[Senders] 10.0s, 10 senders" in captured.out
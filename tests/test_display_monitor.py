@@ -4,7 +4,9 @@
 import pytest
 from unittest.mock import patch
 import asyncio
-from models.display_monitor_model import monitor_progress
+from models.display_monitor_model import monitor_progress, format_stats, format_pool_history
+from models.latency_histogram_model import LatencyHistogram
+from models.autoscaler_model import PoolHistory
 from config import config
 
 ##########################################################
@@ -59,6 +61,54 @@ async def test_monitor_with_stats_update(stats_dict, mock_config, capsys):
     assert "Failed: 2" in captured.out
     assert "Avg Time: 0.5000" in captured.out  # 5.0/10
 
+@pytest.mark.asyncio
+async def test_monitor_latency_percentiles(stats_dict, mock_config, capsys):
+    """Test monitor output includes latency percentiles when a histogram is present."""
+    stats_dict['latency'] = LatencyHistogram()
+    for i in range(1, 1001):
+        stats_dict['latency'].record(i / 1000)
+    stats_dict['sent'] = 1000
+    stats_dict['total_time'] = 500.5
+
+    monitor_task = asyncio.create_task(monitor_progress(stats_dict))
+    await asyncio.sleep(0.15)  # Allow one output
+    monitor_task.cancel()
+
+    captured = capsys.readouterr()
+    for label in ("p50:", "p90:", "p99:", "p99.9:", "max: 1.0000"):
+        assert label in captured.out
+
+@pytest.mark.asyncio
+async def test_monitor_queue_occupancy(stats_dict, mock_config, capsys):
+    """Test monitor output includes queue depth and bound when given a queue."""
+    queue = asyncio.Queue(maxsize = 50)
+    for i in range(12):
+        queue.put_nowait(i)
+
+    monitor_task = asyncio.create_task(monitor_progress(stats_dict, queue))
+    await asyncio.sleep(0.15)  # Allow one output
+    monitor_task.cancel()
+
+    captured = capsys.readouterr()
+    assert "Queue: 12/50" in captured.out
+
+def test_format_stats_without_samples(stats_dict):
+    """Test that an empty histogram adds no percentile figures."""
+    stats_dict['latency'] = LatencyHistogram()
+    assert format_stats(stats_dict) == "Sent: 0, Failed: 0, Avg Time: 0.0000 seconds"
+
+def test_format_stats_throttle_time(stats_dict):
+    """Test that time spent rate limited is shown as its own figure."""
+    stats_dict['throttle_time'] = 12.5
+    assert format_stats(stats_dict).endswith(", Throttled: 12.5000 seconds")
+
+def test_format_pool_history():
+    """Test that the pool history lists each change with the mean size and cost."""
+    history = PoolHistory()
+    history.record(0.0, 2)
+    history.record(5.0, 6)
+    assert format_pool_history(history, 10.0) == "Pool size 0.0s: 2, 5.0s: 6; mean 4.0 senders, 40.0 sender-seconds"
+
 @pytest.mark.asyncio
 async def test_monitor_multiple_intervals(stats_dict, mock_config, capsys):
     """Test monitor output over multiple intervals."""
@@ -106,6 +156,14 @@ async def test_monitor_missing_stats(mock_config, capsys):
     with pytest.raises(ValueError, match="Missing required stats keys"):
         await monitor_progress(incomplete_stats)
 
+@pytest.mark.asyncio
+async def test_monitor_invalid_latency(stats_dict, mock_config):
+    """Test monitor error handling of a latency entry that is not a histogram."""
+    stats_dict['latency'] = [0.1, 0.2]
+
+    with pytest.raises(ValueError, match="LatencyHistogram"):
+        await monitor_progress(stats_dict)
+
 ##########################################################
 # Performance Tests
 ##########################################################
@@ -0,0 +1,149 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_gateway.py
+
+import pytest
+import asyncio
+import socket
+from models.gateway_model import GatewayServer, GatewayPool, parse_headers
+from models.sender_model import SenderModel
+from models.producer_model import Message
+from models.simulation_model import new_stats, run_simulation
+from config import config
+from conftest import simulate
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def stats_dict():
+    """Fixture to create a stats dictionary for senders."""
+    return {
+        'sent': 0,
+        'failed': 0,
+        'total_time': 0.0
+    }
+
+@pytest.fixture
+def mock_config(mocker):
+    """Mock configuration settings for a real-time run against the bundled gateway."""
+    mocker.patch.object(config, "total_messages", 500)
+    mocker.patch.object(config, "num_senders", 20)
+    mocker.patch.object(config, "sender_failure", 0.2)
+    mocker.patch.object(config, "sender_mean_time", 0.001)
+    mocker.patch.object(config, "monitor_interval", 1000.0)
+    mocker.patch.object(config, "gateway_transport", True)
+    mocker.patch.object(config, "gateway_pool_size", 4)
+    mocker.patch.object(config, "seed", 2)
+
+async def start_gateway(**kwargs) -> tuple:
+    """Start a gateway stub, by default one that answers after a fixed handshake and no delay per request."""
+    server = GatewayServer(**{'connect_time': 0.05, **kwargs})
+    return server, await server.start()
+
+async def request(port: int, data: bytes) -> bytes:
+    """Send raw bytes on a new connection and return everything the gateway answers."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    response = await reader.read()
+    writer.close()
+    return response
+
+##########################################################
+# Server Tests
+##########################################################
+
+@pytest.mark.asyncio
+async def test_send_and_unknown_path():
+    """Test that POST /send is accepted and other paths are not found."""
+    gateway, port = await start_gateway()
+    response = await request(port, b"POST /send HTTP/1.1\r\nContent-Length: 2\r\nConnection: close\r\n\r\nhi")
+    assert response.startswith(b"HTTP/1.1 200 OK")
+    response = await request(port, b"GET /status HTTP/1.1\r\nConnection: close\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 404")
+    await gateway.stop()
+
+@pytest.mark.asyncio
+async def test_pipelined_responses_in_order():
+    """Test that pipelined requests on one connection are served concurrently and answered in order."""
+    server, port = await start_gateway(mean_time = 0.02, failure_rate = 0.5, connect_time = 0.0)
+    requests = b"POST /send HTTP/1.1\r\nContent-Length: 0\r\n\r\n" * 19
+    requests += b"POST /nowhere HTTP/1.1\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    response = await request(port, requests)
+    await server.stop()
+    statuses = [line for line in response.split(b"\r\n") if line.startswith(b"HTTP/1.1")]
+    assert len(statuses) == 20
+    assert statuses[-1].startswith(b"HTTP/1.1 404"), "The last request is answered last"
+    assert 0 < sum(status.startswith(b"HTTP/1.1 503") for status in statuses) < 19
+    assert loop.time() - start < 19 * 0.02, "Delays overlap"
+
+def test_parse_headers():
+    """Test that the body length and connection close are read case-insensitively."""
+    assert parse_headers(b"HTTP/1.1 200 OK\r\ncontent-length: 12\r\nConnection: Close\r\n\r\n") == (12, True)
+    assert parse_headers(b"POST /send HTTP/1.1\r\n\r\n") == (0, False)
+
+##########################################################
+# Pool Tests
+##########################################################
+
+@pytest.mark.asyncio
+async def test_pool_reuses_connections():
+    """Test that a pool opens at most its size in connections and pipelines up to its depth on each."""
+    gateway, port = await start_gateway()
+    pool = GatewayPool("127.0.0.1", port, size = 2, pipeline_depth = 5)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    results = await asyncio.gather(*(pool.send("msg") for _ in range(10)))
+    assert all(results)
+    assert loop.time() - start < 2 * 0.05, "One handshake per connection, requests pipelined behind it"
+    await asyncio.gather(*(pool.send("msg") for _ in range(30)))
+    assert pool.opened == gateway.connections == 2
+    await pool.close()
+    await gateway.stop()
+
+@pytest.mark.asyncio
+async def test_no_pool_connects_per_request():
+    """Test that without a pool every request pays for its own connection."""
+    gateway, port = await start_gateway()
+    pool = GatewayPool("127.0.0.1", port, size = 0)
+    assert all(await asyncio.gather(*(pool.send("msg") for _ in range(5))))
+    assert pool.opened == gateway.connections == 5
+    await gateway.stop()
+
+@pytest.mark.asyncio
+async def test_unreachable_gateway_fails_send():
+    """Test that a request to a gateway that is not listening counts as a failed send."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1] #free port, nothing listens on it
+    pool = GatewayPool("127.0.0.1", port, size = 1)
+    assert await pool.send("msg") is False
+
+##########################################################
+# Sender and Simulation Tests
+##########################################################
+
+@pytest.mark.asyncio
+async def test_sender_uses_transport(stats_dict):
+    """Test that a sender with a transport counts the gateway's answers instead of simulating them."""
+    server, port = await start_gateway(failure_rate = 1.0, connect_time = 0.0)
+    pool = GatewayPool("127.0.0.1", port)
+    sender = SenderModel(1, asyncio.Queue(), stats_dict, failure_rate = 0.0, mean_time = 10.0, transport = pool)
+    await asyncio.wait_for(sender.send_message(Message("MSG_1", "test")), 1.0)
+    assert (stats_dict['sent'], stats_dict['failed']) == (0, 1)
+    await pool.close()
+    await server.stop()
+
+def test_simulation_over_gateway(mock_config):
+    """Test that a run over the bundled gateway sends every message and injects its failures."""
+    stats = simulate(asyncio.run)
+    assert stats['sent'] + stats['failed'] == config.total_messages
+    assert stats['failed'] == pytest.approx(0.2 * config.total_messages, rel = 0.35)
+
+def test_fast_forward_refused(mock_config, mocker):
+    """Test that real requests cannot run on the virtual clock."""
+    mocker.patch.object(config, "fast_forward", True)
+    with pytest.raises(ValueError):
+        asyncio.run(run_simulation(new_stats()))
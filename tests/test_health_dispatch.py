@@ -0,0 +1,180 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_health_dispatch.py
+
+import pytest
+import asyncio
+import random
+from models.health_dispatch_model import (HealthAwareDispatcher, CircuitBreaker, build_sender_profiles, CLOSED, OPEN,
+                                          HALF_OPEN)
+from models.counters_model import CounterRegistry, collect_counters
+from models.sender_model import SenderModel
+from models.producer_model import ProducerModel
+from models.display_monitor_model import format_stats
+from models.simulation_model import new_stats
+from models.shard_runner_model import shard_configs
+from models.virtual_clock_model import run_virtual
+from config import config, Config
+from conftest import simulate
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def stats():
+    """Fixture to create stats with per-sender counters."""
+    stats = new_stats()
+    stats['senders'] = CounterRegistry()
+    return stats
+
+@pytest.fixture
+def dispatcher(stats):
+    """Fixture to create a dispatcher over two senders holding two items each."""
+    return HealthAwareDispatcher(2, stats['senders'], depth = 2, window = 10, cooldown = 1.0, stats = stats,
+                                 rng = random.Random(1))
+
+@pytest.fixture
+def mock_config(mocker):
+    """Mock configuration settings for a fast-forward run with a flaky sender pool."""
+    mocker.patch.object(config, "total_messages", 5000)
+    mocker.patch.object(config, "num_senders", 20)
+    mocker.patch.object(config, "sender_failure", 0.05)
+    mocker.patch.object(config, "sender_mean_time", 0.1)
+    mocker.patch.object(config, "monitor_interval", 1000.0)
+    mocker.patch.object(config, "sender_pools", {"flaky": {"senders": 5, "failure": 0.8}})
+    mocker.patch.object(config, "seed", 8)
+
+##########################################################
+# Profile and Breaker Tests
+##########################################################
+
+def test_sender_profiles():
+    """Test that pools take senders in order and keep the defaults they leave out."""
+    pools = {"flaky": {"senders": 2, "failure": 0.8}, "slow": {"senders": 5, "mean_time": 4.0}}
+    profiles = build_sender_profiles(6, 0.1, 1.0, pools)
+    assert profiles == [(0.8, 1.0), (0.8, 1.0), (0.1, 4.0), (0.1, 4.0), (0.1, 4.0), (0.1, 4.0)]
+    assert build_sender_profiles(2, 0.1, 1.0) == [(0.1, 1.0), (0.1, 1.0)]
+
+def test_breaker_trips_on_full_window():
+    """Test that a breaker judges only a full window and opens above the threshold."""
+    breaker = CircuitBreaker(window = 10, threshold = 0.5, cooldown = 1.0)
+    assert not breaker.record(0, 9, 0.0), "Window not full yet"
+    assert breaker.record(4, 1, 0.0)
+    assert (breaker.state, breaker.trips) == (OPEN, 1)
+
+    breaker = CircuitBreaker(window = 10, threshold = 0.5)
+    assert not breaker.record(5, 5, 0.0), "Half failing is not above the threshold"
+    assert breaker.success_rate() == pytest.approx(0.5)
+
+def test_breaker_probes_after_cooldown():
+    """Test that an open breaker admits a single probe after its cooldown, which closes or reopens it."""
+    breaker = CircuitBreaker(window = 4, threshold = 0.5, cooldown = 1.0)
+    breaker.record(0, 4, 10.0)
+    assert not breaker.admits(10.5)
+    assert breaker.admits(11.0) and breaker.state == HALF_OPEN
+    breaker.probing = True
+    assert not breaker.admits(11.0), "One probe at a time"
+    assert breaker.record(0, 1, 11.2), "A failed probe opens it again"
+    assert not breaker.admits(12.0)
+    assert breaker.admits(12.2)
+    assert not breaker.record(1, 0, 12.3)
+    assert breaker.state == CLOSED and breaker.success_rate() == 0.5, "Judged afresh once recovered"
+
+##########################################################
+# Dispatch Tests
+##########################################################
+
+def test_routing_bounded_by_depth(dispatcher):
+    """Test that each sender holds at most depth items and the rest wait in the backlog."""
+    for i in range(6):
+        dispatcher.put_nowait(i)
+    assert [len(sender.queue) for sender in dispatcher.senders] == [2, 2]
+    assert list(dispatcher.backlog) == [4, 5]
+    assert dispatcher.qsize() == 6
+    first = dispatcher.get_nowait(0)
+    dispatcher.task_done(0)
+    assert len(dispatcher.senders[0].queue) == 2, "Freed room is refilled from the backlog"
+    assert dispatcher.qsize() == 5
+    assert first in (0, 1, 2, 3)
+
+def test_prefers_healthier_sender(dispatcher):
+    """Test that of two idle senders the one with more recent successes is chosen."""
+    dispatcher.senders[0].breaker.record(2, 3, 0.0)
+    dispatcher.senders[1].breaker.record(5, 0, 0.0)
+    assert dispatcher.cost(0) > dispatcher.cost(1)
+    dispatcher.put_nowait("a")
+    assert list(dispatcher.senders[1].queue) == ["a"]
+
+def test_trip_sheds_queued_items(dispatcher, stats):
+    """Test that a tripped sender's queued items go back to the backlog and then to healthy senders."""
+    for i in range(4):
+        dispatcher.put_nowait(i)
+    queued = list(dispatcher.senders[0].queue)
+    dispatcher.get_nowait(0)
+    stats['senders'].counters_for(0).failed += 10 #the sender failed a whole window of attempts
+    dispatcher.task_done(0)
+    assert dispatcher.senders[0].breaker.state == OPEN
+    assert not dispatcher.senders[0].queue
+    assert stats['breaker_trips'] == 1 and stats['shed'] == 1
+    assert dispatcher.backlog[0] == queued[1]
+    assert "Breaker Trips: 1, Shed: 1" in format_stats(stats)
+
+@pytest.mark.asyncio
+async def test_sentinel_wakes_tripped_sender(dispatcher):
+    """Test that a sender waiting behind an open breaker still gets its sentinel once the work is routed."""
+    dispatcher.senders[0].breaker.record(0, 10, asyncio.get_running_loop().time())
+    waiting = asyncio.create_task(dispatcher.get(0))
+    await asyncio.sleep(0)
+    dispatcher.put_nowait("a")
+    dispatcher.put_nowait(None)
+    dispatcher.put_nowait(None)
+    assert dispatcher.get_nowait(1) == "a"
+    assert await asyncio.wait_for(waiting, 1.0) is None
+    assert dispatcher.senders[0].stopped
+
+def test_failing_sender_gets_little_traffic(stats, mocker):
+    """Test that senders route around one that always fails, apart from a window and its probes."""
+    async def main():
+        dispatcher = HealthAwareDispatcher(4, stats['senders'], window = 10, cooldown = 5.0, stats = stats,
+                                           rng = random.Random(2))
+        producer = ProducerModel(dispatcher, vectorized = True)
+        senders = [SenderModel(i, dispatcher.queue_for(i), stats, 1.0 if i == 0 else 0.0, 0.1) for i in range(4)]
+        tasks = [asyncio.create_task(sender.run()) for sender in senders]
+        await producer.produce_messages()
+        await dispatcher.join()
+        await asyncio.gather(*tasks)
+    mocker.patch.object(config, "total_messages", 2000)
+    mocker.patch.object(config, "num_senders", 4)
+    run_virtual(main())
+    collect_counters(stats)
+    failing = stats['senders'].counters_for(0)
+    assert stats['sent'] + stats['failed'] == 2000
+    assert failing.attempts < 0.05 * 2000
+    assert stats['breaker_trips'] >= 2, "Probes failed and the breaker opened again"
+
+##########################################################
+# Simulation Tests
+##########################################################
+
+def test_health_dispatch_avoids_flaky_pool(mock_config, mocker):
+    """Test that health dispatch sends far less through a flaky pool than the central queue does."""
+    central = simulate()
+    mocker.patch.object(config, "dispatch", "health")
+    health = simulate()
+    flaky_attempts = lambda stats: sum(stats['senders'].counters_for(i).attempts for i in range(5))
+    assert health['sent'] + health['failed'] == config.total_messages
+    assert flaky_attempts(health) < flaky_attempts(central) / 3
+    assert health['failed'] < central['failed'] / 2
+
+def test_sender_pools_split_across_shards():
+    """Test that each shard gets its share of every sender pool."""
+    shards = shard_configs(Config(num_senders = 10, sender_pools = {"flaky": {"senders": 4, "failure": 0.8}}), 2)
+    assert [shard.sender_pools["flaky"]["senders"] for shard in shards] == [2, 2]
+    assert shards[0].sender_pools["flaky"]["failure"] == 0.8
+
+def test_autoscale_refused(mock_config, mocker):
+    """Test that health dispatch needs a fixed sender pool."""
+    mocker.patch.object(config, "dispatch", "health")
+    mocker.patch.object(config, "autoscale", True)
+    with pytest.raises(ValueError):
+        simulate()
@@ -0,0 +1,111 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_latency_histogram.py
+
+import pytest
+import pickle
+import random
+from models.latency_histogram_model import LatencyHistogram
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def histogram():
+    """Fixture to create an empty histogram for each test."""
+    return LatencyHistogram()
+
+@pytest.fixture
+def samples():
+    """Fixture with exponential latencies averaging 2 seconds."""
+    rng = random.Random(7)
+    return [rng.expovariate(0.5) for _ in range(100000)]
+
+##########################################################
+# Recording Tests
+##########################################################
+
+def test_empty_histogram(histogram):
+    """Test that an empty histogram reports zeros."""
+    assert histogram.count == 0
+    assert histogram.percentile(99) == 0.0
+    assert histogram.mean() == 0.0
+
+def test_record_counts(histogram):
+    """Test count, mean and max tracking."""
+    for value in (0.5, 1.0, 1.5):
+        histogram.record(value)
+    histogram.record(2.0, n = 3)
+
+    assert histogram.count == 6
+    assert histogram.mean() == pytest.approx(9.0 / 6)
+    assert histogram.max == 2.0
+
+def test_record_does_not_grow(histogram, samples):
+    """Test that memory stays fixed regardless of how many samples are recorded."""
+    buckets = len(histogram.counts)
+    for value in samples:
+        histogram.record(value)
+    assert len(histogram.counts) == buckets
+
+def test_out_of_range_values(histogram):
+    """Test that values outside the bucket range are clamped, not dropped."""
+    histogram.record(0.0)
+    histogram.record(1e9)
+    assert histogram.count == 2
+    assert histogram.counts[0] == 1
+    assert histogram.counts[-1] == 1
+    assert histogram.percentile(100) == 1e9
+
+##########################################################
+# Percentile Tests
+##########################################################
+
+def test_percentiles_match_exact(histogram, samples):
+    """Test that percentiles are within one bucket of the exact values."""
+    for value in samples:
+        histogram.record(value)
+    ordered = sorted(samples)
+    for q in (50, 90, 99, 99.9):
+        exact = ordered[int(len(ordered) * q / 100) - 1]
+        assert histogram.percentile(q) == pytest.approx(exact, rel = 0.03)
+    assert histogram.percentile(100) == max(samples)
+
+def test_count_at_or_below(histogram):
+    """Test cumulative counts used for bucketed exports."""
+    for value in (0.001, 0.01, 0.1, 1.0):
+        histogram.record(value)
+    assert histogram.count_at_or_below(0.05) == 2
+    assert histogram.count_at_or_below(10.0) == 4
+
+##########################################################
+# Merge Tests
+##########################################################
+
+def test_merge(samples):
+    """Test that merging two halves equals recording everything in one histogram."""
+    whole, left, right = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i, value in enumerate(samples):
+        whole.record(value)
+        (left if i % 2 else right).record(value)
+    left.merge(right)
+
+    assert left.counts == whole.counts
+    assert left.count == whole.count
+    assert left.max == whole.max
+
+def test_merge_different_layout(histogram):
+    """Test that histograms with different buckets cannot be merged."""
+    with pytest.raises(ValueError, match="different bucket layouts"):
+        histogram.merge(LatencyHistogram(buckets_per_octave = 8))
+
+def test_copy_and_pickle(histogram):
+    """Test that copies are independent and histograms survive pickling."""
+    histogram.record(1.0)
+    clone = histogram.copy()
+    clone.record(2.0)
+    restored = pickle.loads(pickle.dumps(histogram))
+
+    assert histogram.count == 1 and clone.count == 2
+    assert restored.counts == histogram.counts
+    assert restored.percentile(50) == histogram.percentile(50)
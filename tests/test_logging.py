@@ -0,0 +1,125 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_logging.py
+
+import pytest
+import io
+import logging
+import threading
+import time
+from models.logging_model import LogSampler, configure_logging
+from models.sender_model import SenderModel
+from models.producer_model import Message
+from models.simulation_model import new_stats
+from models.virtual_clock_model import run_virtual
+from config import config
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def restore_logging():
+    """Fixture that puts back the root logger's handlers and level after a test reconfigures them."""
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+@pytest.fixture
+def stream():
+    """Fixture for a stream the log writer writes to."""
+    return io.StringIO()
+
+##########################################################
+# Sampler Tests
+##########################################################
+
+def test_sampler_rates():
+    """Test that one in every N calls is sampled."""
+    every_tenth, every_call, never = LogSampler(10), LogSampler(1), LogSampler(0)
+    assert sum(every_tenth.sample() for _ in range(100)) == 10
+    assert all(every_call.sample() for _ in range(5))
+    assert not any(never.sample() for _ in range(5))
+
+##########################################################
+# Background Writer Tests
+##########################################################
+
+def test_records_written_by_background_thread(restore_logging, stream):
+    """Test that messages are formatted and written on the writer thread, not the caller's."""
+    formatted_on = []
+
+    class Probe:
+        def __str__(self):
+            formatted_on.append(threading.current_thread())
+            return "probe"
+
+    log_writer = configure_logging("INFO", stream)
+    logging.getLogger("test").info("value %s", Probe())
+    assert formatted_on == [], "Formatting should not happen when the record is logged"
+    log_writer.stop()
+
+    assert "INFO test: value probe" in stream.getvalue()
+    assert formatted_on and formatted_on[0] is not threading.current_thread()
+
+def test_errors_are_handed_over_at_once(restore_logging, stream):
+    """Test that an ERROR record does not wait for its block to fill."""
+    log_writer = configure_logging("INFO", stream, capacity = 1000, flush_interval = 60)
+    logging.getLogger("test").warning("first")
+    logging.getLogger("test").error("second")
+    try:
+        for _ in range(100): #the writer thread keeps running, give it a moment to catch up
+            if "second" in stream.getvalue():
+                break
+            time.sleep(0.01)
+        assert "first" in stream.getvalue() and "second" in stream.getvalue()
+    finally:
+        log_writer.stop()
+
+def test_lone_record_written_after_flush_interval(restore_logging, stream):
+    """Test that a record nothing else is logged after is still written once its block is flush_interval old."""
+    log_writer = configure_logging("INFO", stream, capacity = 1000, flush_interval = 0.05)
+    logging.getLogger("test").warning("lone")
+    try:
+        for _ in range(100):
+            if "lone" in stream.getvalue():
+                break
+            time.sleep(0.01)
+        assert "lone" in stream.getvalue()
+    finally:
+        log_writer.stop()
+
+def test_level_filters_records(restore_logging, stream):
+    """Test that records below the configured level are dropped."""
+    log_writer = configure_logging("WARNING", stream)
+    logging.getLogger("test").info("hidden")
+    logging.getLogger("test").warning("shown")
+    log_writer.stop()
+    assert "hidden" not in stream.getvalue()
+    assert "shown" in stream.getvalue()
+
+##########################################################
+# Sender Logging Tests
+##########################################################
+
+def test_sender_samples_successes_and_logs_failures(mocker, caplog):
+    """Test that successes are sampled while every failure is logged."""
+    mocker.patch.object(config, "log_success_sample", 10)
+    caplog.set_level(logging.INFO, logger = "models.sender_model")
+
+    async def send(failure_rate):
+        sender = SenderModel(0, None, new_stats(), failure_rate, 0.0)
+        for i in range(20):
+            await sender.send_message(Message(id = f"MSG_0_{i}", content = "secret"))
+
+    run_virtual(send(0.0))
+    run_virtual(send(1.0))
+    successes = [r for r in caplog.records if r.levelno == logging.INFO]
+    failures = [r for r in caplog.records if r.levelno == logging.WARNING]
+    assert len(successes) == 2
+    assert len(failures) == 20
+    assert all("secret" not in r.getMessage() for r in caplog.records), "Message content should not be logged"
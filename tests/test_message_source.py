@@ -0,0 +1,197 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_message_source.py
+
+import pytest
+import asyncio
+import tracemalloc
+from models.message_source_model import MessageSource
+from models.producer_model import ProducerModel, Message, MessageBatch
+from models.sender_model import SenderModel
+from models.retry_scheduler_model import RetryScheduler
+from config import config
+from conftest import simulate
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def stats_dict():
+    """Fixture to create a fresh stats dictionary for each test."""
+    return {
+        'sent': 0,
+        'failed': 0,
+        'total_time': 0.0
+    }
+
+@pytest.fixture
+def mock_config(mocker):
+    """Mock configuration settings for a fast-forward run pulling from a source."""
+    mocker.patch.object(config, "total_messages", 2000)
+    mocker.patch.object(config, "num_senders", 50)
+    mocker.patch.object(config, "sender_failure", 0.2)
+    mocker.patch.object(config, "sender_mean_time", 1.0)
+    mocker.patch.object(config, "monitor_interval", 1000.0)
+    mocker.patch.object(config, "pull_source", True)
+    mocker.patch.object(config, "seed", 3)
+
+class CountingItems:
+    """Iterator of numbered messages that records how many were created."""
+    def __init__(self, count: int):
+        self.count = count
+        self.created = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.created >= self.count:
+            raise StopIteration
+        self.created += 1
+        return Message(id = f"MSG_{self.created}", content = "test")
+
+##########################################################
+# Message Source Tests
+##########################################################
+
+@pytest.mark.asyncio
+async def test_items_created_on_demand():
+    """Test that the source creates an item only when it is taken."""
+    items = CountingItems(10**9)
+    source = MessageSource(items)
+    assert items.created == 0
+    first = await source.get()
+    assert first.id == "MSG_1"
+    assert items.created == 1
+    assert source.get_nowait().id == "MSG_2"
+    assert source.in_flight == 2
+    assert source.qsize() == 0, "Nothing should be buffered"
+
+@pytest.mark.asyncio
+async def test_exhaustion_waits_for_sends_in_flight():
+    """Test that the source ends only after every item taken has been marked done."""
+    source = MessageSource(CountingItems(1))
+    await source.get()
+    waiting = asyncio.create_task(source.get())
+    await asyncio.sleep(0)
+    assert not waiting.done(), "A send in flight may still come back as a retry"
+
+    source.task_done()
+    with pytest.raises(StopAsyncIteration):
+        await waiting
+    with pytest.raises(asyncio.QueueEmpty):
+        source.get_nowait()
+
+@pytest.mark.asyncio
+async def test_retries_keep_source_open(stats_dict):
+    """Test that scheduled retries are handed out before new items and delay the end of the source."""
+    source = MessageSource(CountingItems(1))
+    scheduler = RetryScheduler(source, stats_dict, max_attempts = 2, base_delay = 0.01, max_delay = 0.01)
+    source.retry_scheduler = scheduler
+    timer = asyncio.create_task(scheduler.run())
+
+    message = await source.get()
+    scheduler.schedule(message) #the send failed
+    source.task_done()
+    retry = await asyncio.wait_for(source.get(), 1.0)
+    assert retry is message
+    source.task_done()
+    with pytest.raises(StopAsyncIteration):
+        await source.get()
+    timer.cancel()
+
+@pytest.mark.asyncio
+async def test_async_iterator_source():
+    """Test that an async generator is pulled by one sender at a time and every item is handed out once."""
+    async def generate():
+        for i in range(100):
+            await asyncio.sleep(0) #suspends inside the generator
+            yield Message(id = f"MSG_{i}", content = "test")
+
+    source = MessageSource(generate())
+    taken = []
+
+    async def consume():
+        async for message in source:
+            taken.append(message.id)
+            source.task_done()
+
+    await asyncio.gather(*(consume() for _ in range(5)))
+    assert sorted(taken) == sorted(f"MSG_{i}" for i in range(100))
+
+##########################################################
+# Sender and Producer Tests
+##########################################################
+
+@pytest.mark.asyncio
+async def test_senders_stop_when_source_exhausted(stats_dict):
+    """Test that pulling senders send every message and stop without sentinels."""
+    source = MessageSource(CountingItems(200))
+    senders = [SenderModel(i, source, stats_dict, failure_rate = 0.0, mean_time = 0.001) for i in range(10)]
+    await asyncio.wait_for(asyncio.gather(*(sender.run_source() for sender in senders)), 5.0)
+    assert stats_dict['sent'] == 200
+    assert not any(sender.running for sender in senders)
+
+@pytest.mark.asyncio
+async def test_pulling_sender_batches(stats_dict):
+    """Test that a pulling sender fills batches straight from the source."""
+    source = MessageSource(CountingItems(25))
+    sender = SenderModel(1, source, stats_dict, failure_rate = 0.0, batch_size = 10, batch_base_time = 0.001,
+                         batch_message_time = 0.0)
+    await asyncio.wait_for(sender.run_source(), 5.0)
+    assert stats_dict['sent'] == 25
+    assert source.in_flight == 0
+
+def test_producer_messages_lazy(mocker):
+    """Test that the producer's lazy generator yields single messages or chunks without a queue."""
+    mocker.patch.object(config, "total_messages", 25)
+    producer = ProducerModel(None, vectorized = False)
+    messages = producer.messages()
+    next(messages)
+    assert producer.messages_produced == 1
+    assert len(list(messages)) == 24
+
+    chunked = ProducerModel(None, chunk_size = 10)
+    chunks = list(chunked.messages())
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert all(isinstance(chunk, MessageBatch) for chunk in chunks)
+
+##########################################################
+# Simulation Tests
+##########################################################
+
+def test_pull_simulation_matches_queue(mock_config, mocker):
+    """Test that a seeded pull run sends every message and matches the same run on the queue."""
+    pulled = simulate()
+    assert pulled['sent'] + pulled['failed'] == config.total_messages
+    mocker.patch.object(config, "pull_source", False)
+    queued = simulate()
+    assert (pulled['sent'], pulled['failed']) == (queued['sent'], queued['failed'])
+
+def test_pull_simulation_with_retries(mock_config, mocker):
+    """Test that retries are sent or dead-lettered before a pull run ends."""
+    mocker.patch.object(config, "retry_max_attempts", 3)
+    mocker.patch.object(config, "retry_base_delay", 1.0)
+    stats = simulate()
+    assert stats['first_attempt_sent'] + stats['retry_sent'] + stats['dead_lettered'] == config.total_messages
+    assert stats['retried'] > 0
+
+def test_pull_memory_flat(mock_config, mocker):
+    """Test that peak memory of a pull run does not grow with the number of messages."""
+    mocker.patch.object(config, "num_senders", 10)
+    mocker.patch.object(config, "sender_mean_time", 0.01)
+    mocker.patch.object(config, "sender_failure", 0.0) #captured failure logs would grow with the run
+    peaks = []
+    for total in (2000, 20000):
+        mocker.patch.object(config, "total_messages", total)
+        tracemalloc.start()
+        simulate()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    assert peaks[1] < peaks[0] * 1.5, "Ten times the messages should not need more memory"
+
+def test_pull_rejects_autoscale(mock_config, mocker):
+    """Test that pull_source refuses modes that need a queue."""
+    mocker.patch.object(config, "autoscale", True)
+    with pytest.raises(ValueError):
+        simulate()
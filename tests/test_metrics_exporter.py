@@ -0,0 +1,174 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_metrics_exporter.py
+
+import pytest
+import asyncio
+import socket
+from models.metrics_exporter_model import MetricsExporter, CONTENT_TYPE
+from models.latency_histogram_model import LatencyHistogram
+from models.producer_model import ProducerModel
+from models.simulation_model import new_stats, run_simulation
+from models.counters_model import CounterRegistry
+from config import config
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def stats():
+    """Fixture for stats with per-sender counters and a few latency samples."""
+    stats = new_stats()
+    stats['senders'] = CounterRegistry()
+    for sender_id, latency in enumerate([0.004, 0.2, 3.0]):
+        counters = stats['senders'].counters_for(sender_id)
+        counters.sent, counters.active = 1, True
+        stats['latency'].record(latency)
+    stats['senders'].counters_for(0).failed = 2
+    return stats
+
+async def scrape(port: int, request: bytes = b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n") -> tuple:
+    """Send one request and return the status line, headers and body."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(request)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    status, *headers = head.decode().split("\r\n")
+    return status, dict(header.split(": ", 1) for header in headers), body.decode()
+
+def parse_samples(body: str) -> dict:
+    """Sample name (with labels) -> value."""
+    samples = {}
+    for line in body.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+##########################################################
+# Rendering Tests
+##########################################################
+
+@pytest.mark.asyncio
+async def test_render_metrics(stats):
+    """Test that counters, histogram and gauges are exported."""
+    queue = asyncio.Queue()
+    queue.put_nowait("message")
+    body = MetricsExporter(stats, queue).render().decode()
+    samples = parse_samples(body)
+
+    assert body.endswith("# EOF\n")
+    assert samples['sms_messages_sent_total'] == 3
+    assert samples['sms_messages_failed_total'] == 2
+    assert samples['sms_queue_depth'] == 1
+    assert samples['sms_active_senders'] == 3
+    assert samples['sms_send_latency_seconds_bucket{le="0.005"}'] == 1
+    assert samples['sms_send_latency_seconds_bucket{le="0.25"}'] == 2
+    assert samples['sms_send_latency_seconds_bucket{le="5.0"}'] == 3
+    assert samples['sms_send_latency_seconds_bucket{le="+Inf"}'] == 3
+    assert samples['sms_send_latency_seconds_sum'] == pytest.approx(3.204)
+    assert "sms_producer_rate" not in body, "Producer metrics need a producer"
+
+@pytest.mark.asyncio
+async def test_render_cached_until_stats_change(stats):
+    """Test that the body is only rendered again once a stat changes."""
+    exporter = MetricsExporter(stats, max_age = 0.0)
+    first = exporter.render()
+    assert exporter.render() is first
+    assert exporter.renders == 1
+
+    stats['senders'].counters_for(1).sent += 1
+    assert b"sms_messages_sent_total 4" in exporter.render()
+    assert exporter.renders == 2
+
+@pytest.mark.asyncio
+async def test_render_max_age(stats):
+    """Test that scrapes close together reuse the body without checking the stats."""
+    exporter = MetricsExporter(stats, max_age = 60.0)
+    first = exporter.render()
+    stats['senders'].counters_for(1).sent += 1
+    assert exporter.render() is first
+    exporter.max_age = 0.0
+    assert b"sms_messages_sent_total 4" in exporter.render()
+
+@pytest.mark.asyncio
+async def test_producer_rate(stats):
+    """Test that the producer rate is measured over the rate window."""
+    producer = ProducerModel(asyncio.Queue())
+    exporter = MetricsExporter(stats, producer = producer, max_age = 0.0)
+    assert exporter.producer_rate(10.0) == 0.0
+    producer.messages_produced = 50
+    assert exporter.producer_rate(10.5) == 0.0, "Should wait for a full window"
+    assert exporter.producer_rate(12.0) == 25.0
+    assert parse_samples(exporter.render().decode())['sms_messages_produced_total'] == 50
+
+def test_cumulative_counts():
+    """Test that cumulative counts match counting each bound separately."""
+    histogram = LatencyHistogram()
+    for value in [0.001, 0.01, 0.1, 1.0, 10.0, 1e6]:
+        histogram.record(value)
+    bounds = [0.005, 0.05, 0.5, 5.0, 50.0]
+    assert histogram.cumulative_counts(bounds) == [histogram.count_at_or_below(b) for b in bounds] == [1, 2, 3, 4, 5]
+
+##########################################################
+# HTTP Tests
+##########################################################
+
+@pytest.mark.asyncio
+async def test_serve_scrape(stats):
+    """Test a scrape over HTTP."""
+    exporter = MetricsExporter(stats)
+    port = await exporter.start()
+    try:
+        status, headers, body = await scrape(port)
+    finally:
+        await exporter.stop()
+
+    assert status == "HTTP/1.1 200 OK"
+    assert headers['Content-Type'] == CONTENT_TYPE
+    assert int(headers['Content-Length']) == len(body.encode())
+    assert parse_samples(body)['sms_messages_sent_total'] == 3
+
+@pytest.mark.asyncio
+async def test_serve_errors(stats):
+    """Test unknown paths, other methods and broken requests."""
+    exporter = MetricsExporter(stats)
+    port = await exporter.start()
+    try:
+        assert (await scrape(port, b"GET / HTTP/1.1\r\n\r\n"))[0] == "HTTP/1.1 404 Not Found"
+        assert (await scrape(port, b"POST /metrics HTTP/1.1\r\n\r\n"))[0] == "HTTP/1.1 405 Method Not Allowed"
+        status, _, body = await scrape(port, b"HEAD /metrics HTTP/1.1\r\n\r\n")
+        assert status == "HTTP/1.1 200 OK" and body == ""
+        _, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metr") #client hangs up mid-request
+        writer.close()
+        assert (await scrape(port))[0] == "HTTP/1.1 200 OK", "Server should keep serving"
+    finally:
+        await exporter.stop()
+
+@pytest.mark.asyncio
+async def test_simulation_serves_metrics(mocker):
+    """Test scraping a running simulation."""
+    with socket.socket() as probe: #find a free port
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    mocker.patch.object(config, "total_messages", 200)
+    mocker.patch.object(config, "num_senders", 20)
+    mocker.patch.object(config, "sender_mean_time", 0.05)
+    mocker.patch.object(config, "monitor_interval", 1000.0)
+    mocker.patch.object(config, "metrics_port", port)
+
+    stats = new_stats()
+    simulation = asyncio.create_task(run_simulation(stats))
+    await asyncio.sleep(0.2)
+    _, _, body = await scrape(port)
+    samples = parse_samples(body)
+    assert samples['sms_messages_produced_total'] == 200
+    assert samples['sms_active_senders'] == 20
+    assert 0 < samples['sms_messages_sent_total'] + samples['sms_messages_failed_total'] < 200
+    await simulation
+
+    with pytest.raises(OSError):
+        await scrape(port) #endpoint closes with the simulation
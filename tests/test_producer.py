@@ -6,7 +6,8 @@ import pytest
 from unittest.mock import patch
 import asyncio
 import string
-from models.producer_model import ProducerModel, Message
+import numpy as np
+from models.producer_model import ProducerModel, Message, MessageBatch
 from config import config
 
 ##########################################################
@@ -86,6 +87,87 @@ def test_generate_message_million(producer_model):
             "Content should only contain letters, numbers, and spaces"
     assert producer_model.messages_produced == 1000000
 
+##########################################################
+# Batch Generation Tests
+##########################################################
+
+def test_generate_batch_structure(producer_model):
+    """Test that a generated batch contains well-formed messages with unique IDs."""
+    messages = producer_model.generate_batch(500)
+
+    assert len(messages) == 500, "Should generate the requested number of messages"
+    assert all(isinstance(m, Message) for m in messages), "Should return Message objects"
+    assert all(m.id.startswith("MSG_") for m in messages), "Message IDs should start with MSG_"
+    assert len({m.id for m in messages}) == 500, "Message IDs should be unique"
+    assert producer_model.messages_produced == 500, "Should increment messages_produced counter"
+
+def test_generate_batch_content(producer_model):
+    """Test that batch content follows the same length and alphabet constraints."""
+    messages = producer_model.generate_batch(10000)
+    alphabet = set(string.ascii_letters + string.digits + ' ')
+    lengths = [len(m.content) for m in messages]
+
+    assert min(lengths) >= 1 and max(lengths) <= 100, "Content length should be between 1 and 100"
+    assert all(set(m.content) <= alphabet for m in messages), \
+        "Content should only contain letters, numbers, and spaces"
+    assert 45 < sum(lengths) / len(lengths) < 56, "Lengths should be uniform over 1-100"
+    assert set(''.join(m.content for m in messages)) == alphabet, "Every character should be reachable"
+
+def test_generate_batch_continues_ids(producer_model):
+    """Test that batch IDs continue from single-message generation."""
+    producer_model.generate_message()
+    messages = producer_model.generate_batch(3)
+
+    assert [m.id.rsplit("_", 1)[1] for m in messages] == ["1", "2", "3"]
+    assert producer_model.messages_produced == 4
+
+def test_generate_batch_empty(producer_model):
+    """Test that an empty batch is handled."""
+    assert producer_model.generate_batch(0) == []
+    assert producer_model.messages_produced == 0
+
+def test_generate_message_batch_uncounted(producer_model):
+    """Test that a batch left for the caller to count does not move messages_produced."""
+    batch = producer_model.generate_message_batch(5, count = False)
+    assert batch.ids.tolist() == list(range(5))
+    assert producer_model.messages_produced == 0
+
+def test_message_has_no_dict():
+    """Test that messages are slotted and carry no per-instance __dict__."""
+    message = Message(id="TEST_MSG_1", content="abc")
+    assert not hasattr(message, "__dict__"), "Message should use __slots__"
+    assert message == Message(id="TEST_MSG_1", content="abc"), "Dataclass equality should still work"
+
+def test_generate_message_batch_columns(producer_model):
+    """Test the columnar layout of a generated MessageBatch."""
+    batch = producer_model.generate_message_batch(1000)
+
+    assert isinstance(batch, MessageBatch)
+    assert len(batch) == 1000
+    assert batch.ids.tolist() == list(range(1000)), "IDs should be sequential integers"
+    assert len(batch.content) == int(batch.lengths.sum()), "Content should be one contiguous buffer"
+    assert np.array_equal(batch.offsets[1:], np.cumsum(batch.lengths)[:-1]), "Offsets should follow lengths"
+    assert batch.message_id(5).startswith("MSG_") and batch.message_id(5).endswith("_5")
+    assert producer_model.messages_produced == 1000
+
+def test_message_batch_rows_match_messages(producer_model):
+    """Test that row accessors, iteration and to_messages agree."""
+    batch = producer_model.generate_message_batch(50)
+    messages = batch.to_messages()
+
+    assert messages == list(batch), "Iteration should materialize the same messages"
+    assert all(batch.content_at(i) == messages[i].content for i in range(50))
+    assert all(1 <= len(m.content) <= 100 for m in messages)
+
+def test_message_batch_slice_shares_buffer(producer_model):
+    """Test that slicing a batch is a view over the same content buffer."""
+    batch = producer_model.generate_message_batch(100)
+    part = batch.slice(10, 20)
+
+    assert len(part) == 10
+    assert part.content is batch.content, "Slices should not copy the content buffer"
+    assert part.to_messages() == batch.to_messages()[10:20]
+
 ##########################################################
 # Message Production Tests
 ##########################################################
@@ -122,6 +204,32 @@ async def test_produce_messages_completion_million(producer_model, mock_config_m
     assert producer_model.queue.qsize() == config.total_messages + config.num_senders, \
         "Queue should contain messages plus sentinel values"
 
+@pytest.mark.asyncio
+async def test_produce_messages_vectorized(mock_config_thousand):
+    """Test that vectorized production enqueues the configured number of messages."""
+    queue = asyncio.Queue()
+    producer = ProducerModel(queue, batch_size = 300, vectorized = True)
+    await producer.produce_messages()
+
+    assert producer.messages_produced == config.total_messages, \
+        "Should produce configured number of messages across partial batches"
+    assert queue.qsize() == config.total_messages + config.num_senders, \
+        "Queue should contain messages plus sentinel values"
+
+@pytest.mark.asyncio
+async def test_produce_messages_chunked(mock_config_thousand):
+    """Test that chunked production enqueues MessageBatch chunks covering every message."""
+    queue = asyncio.Queue()
+    producer = ProducerModel(queue, batch_size = 300, chunk_size = 64)
+    await producer.produce_messages()
+
+    items = [queue.get_nowait() for _ in range(queue.qsize())]
+    chunks = [item for item in items if item is not None]
+    assert all(isinstance(chunk, MessageBatch) for chunk in chunks)
+    assert max(len(chunk) for chunk in chunks) == 64
+    assert sum(len(chunk) for chunk in chunks) == config.total_messages
+    assert len(items) - len(chunks) == config.num_senders, "Should still add sentinel values"
+
 @pytest.mark.asyncio
 async def test_produce_messages_sentinel_values(producer_model, mock_config_five):
     """Test if correct number of sentinel values are added."""
@@ -161,6 +269,60 @@ async def test_queue_operations(producer_model):
     assert len(messages) == 3, "Should retrieve expected number of messages"
     assert all(isinstance(m, Message) for m in messages), "All items should be Message objects"
 
+##########################################################
+# Backpressure Tests
+##########################################################
+
+def test_watermarks_from_queue_size():
+    """Test that watermarks are derived from the queue bound."""
+    assert ProducerModel(asyncio.Queue()).high_watermark == 0, "Unbounded queues should not pace"
+    producer = ProducerModel(asyncio.Queue(maxsize = 100), high_watermark = 0.8, low_watermark = 0.5)
+    assert (producer.high_watermark, producer.low_watermark) == (80, 50)
+
+@pytest.mark.asyncio
+async def test_bounded_queue_backpressure(mock_config_thousand):
+    """Test that the producer pauses at the high watermark and learns the drain rate."""
+    queue = asyncio.Queue(maxsize = 100)
+    producer = ProducerModel(queue, batch_size = 50, vectorized = True)
+    peak = 0
+
+    async def consumer():
+        nonlocal peak
+        while True:
+            peak = max(peak, queue.qsize())
+            item = await queue.get()
+            queue.task_done()
+            if item is None:
+                return
+            await asyncio.sleep(0.0005)
+
+    consumers = [asyncio.create_task(consumer()) for _ in range(config.num_senders)]
+    await producer.produce_messages()
+    await asyncio.gather(*consumers)
+
+    assert producer.messages_produced == config.total_messages
+    assert peak <= 100, "Queue depth should never exceed its bound"
+    assert producer.paused_time > 0, "Producer should pause at the high watermark"
+    assert producer.drain_rate > 0, "Producer should observe the consumer drain rate"
+
+@pytest.mark.asyncio
+async def test_wait_for_drain_resumes_at_low_watermark():
+    """Test that a paused producer resumes once the queue drains to the low watermark."""
+    queue = asyncio.Queue(maxsize = 10)
+    producer = ProducerModel(queue, high_watermark = 0.8, low_watermark = 0.3)
+    for i in range(8):
+        queue.put_nowait(i)
+
+    async def drain():
+        while not queue.empty():
+            await asyncio.sleep(0.002)
+            queue.get_nowait()
+
+    drain_task = asyncio.create_task(drain())
+    await producer.wait_for_drain()
+    assert queue.qsize() <= producer.low_watermark
+    drain_task.cancel()
+
 ##########################################################
 # State Management Tests
 ##########################################################
@@ -0,0 +1,101 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_rate_limiter.py
+
+import pytest
+import asyncio
+from models.rate_limiter_model import TokenBucket, acquire, build_rate_limiters
+from models.sender_model import SenderModel
+from models.producer_model import Message
+from models.virtual_clock_model import run_virtual
+from models.simulation_model import new_stats, run_simulation
+from config import config
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def mock_config(mocker):
+    """Mock configuration settings for a rate limited simulation run."""
+    mocker.patch.object(config, "total_messages", 200)
+    mocker.patch.object(config, "num_senders", 20)
+    mocker.patch.object(config, "sender_failure", 0.0)
+    mocker.patch.object(config, "sender_mean_time", 0.01)
+    mocker.patch.object(config, "monitor_interval", 1000.0)
+
+##########################################################
+# Token Bucket Tests
+##########################################################
+
+def test_bucket_allows_burst_then_throttles():
+    """Test that a full bucket admits a burst and then spaces sends at the rate."""
+    bucket = TokenBucket(rate = 10.0, capacity = 3)
+    assert [bucket.reserve(now = 0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve(now = 0.0) == pytest.approx(0.1)
+    assert bucket.reserve(now = 0.0) == pytest.approx(0.2), "Reservations queue up behind each other"
+    assert bucket.throttle_time == pytest.approx(0.3)
+
+def test_bucket_refills_up_to_capacity():
+    """Test that tokens refill over time but never beyond the burst size."""
+    bucket = TokenBucket(rate = 10.0, capacity = 2)
+    bucket.reserve(2, now = 0.0)
+    assert bucket.reserve(now = 0.1) == 0.0
+    assert bucket.reserve(now = 100.0) == 0.0
+    assert bucket.tokens == pytest.approx(1.0)
+
+def test_invalid_rate_raises():
+    """Test that a bucket needs a positive rate."""
+    with pytest.raises(ValueError):
+        TokenBucket(rate = 0)
+
+def test_acquire_waits_for_slowest_bucket():
+    """Test that a send sleeps once, until every bucket admits it."""
+    async def run():
+        own, pool = TokenBucket(100.0), TokenBucket(2.0)
+        await acquire([own, pool])
+        waited = await acquire([own, pool])
+        return waited, asyncio.get_running_loop().time()
+
+    waited, now = run_virtual(run())
+    assert waited == pytest.approx(0.5)
+    assert now == pytest.approx(0.5)
+
+def test_build_rate_limiters_assigns_pools():
+    """Test that senders get their own bucket and their pool's shared bucket."""
+    limiters = build_rate_limiters(5, 10.0, 2.0, {'a': {'rate': 50.0, 'senders': 2}, 'b': {'rate': 20.0, 'senders': 2}})
+    assert [len(buckets) for buckets in limiters] == [2, 2, 2, 2, 1]
+    assert limiters[0][1] is limiters[1][1], "Pool members share one bucket"
+    assert limiters[2][1].name == 'b'
+    assert build_rate_limiters(3) == [[], [], []]
+
+##########################################################
+# Sender Tests
+##########################################################
+
+def test_sender_records_throttle_time():
+    """Test that time waiting on a bucket is recorded apart from send latency."""
+    async def run():
+        stats = new_stats()
+        sender = SenderModel(0, asyncio.Queue(), stats, 0.0, 0.0, rate_limiters = [TokenBucket(4.0)])
+        for i in range(5):
+            await sender.send_message(Message(id = f"MSG_0_{i}", content = "x"))
+        return stats
+
+    stats = run_virtual(run())
+    assert stats['sent'] == 5
+    assert stats['throttle_time'] == pytest.approx(0.25 + 0.25 + 0.25 + 0.25)
+    assert stats['latency'].max == 0.0, "Throttling should not count as send latency"
+
+def test_carrier_pool_caps_simulation_throughput(mock_config, mocker):
+    """Test that a carrier pool limits the throughput of all its senders together."""
+    mocker.patch.object(config, "carrier_pools", {'carrier': {'rate': 20.0, 'burst': 1, 'senders': 20}})
+
+    async def run():
+        stats = new_stats()
+        await run_simulation(stats)
+        return stats, asyncio.get_running_loop().time()
+
+    stats, elapsed = run_virtual(run())
+    assert stats['sent'] == 200
+    assert elapsed == pytest.approx(200 / 20.0, rel = 0.05), "20 senders should share 20 msgs/sec"
+    assert stats['throttle_time'] > 0
@@ -0,0 +1,146 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_retry_scheduler.py
+
+import pytest
+import asyncio
+from models.retry_scheduler_model import RetryScheduler
+from models.producer_model import Message
+from models.simulation_model import new_stats, run_simulation
+from models.virtual_clock_model import run_virtual
+from config import config
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def stats_dict():
+    """Fixture to create a fresh stats dictionary for each test."""
+    return {
+        'sent': 0,
+        'failed': 0,
+        'total_time': 0.0
+    }
+
+@pytest.fixture
+def scheduler(stats_dict):
+    """Fixture to create a scheduler allowing three attempts."""
+    return RetryScheduler(asyncio.Queue(), stats_dict, max_attempts = 3, base_delay = 1.0, max_delay = 3.0)
+
+@pytest.fixture
+def test_message():
+    """Fixture to create a test message."""
+    return Message(id="TEST_MSG_1", content="This is a test message")
+
+@pytest.fixture
+def mock_config(mocker):
+    """Mock configuration settings for a fast-forward run with retries."""
+    mocker.patch.object(config, "total_messages", 2000)
+    mocker.patch.object(config, "num_senders", 50)
+    mocker.patch.object(config, "sender_failure", 0.3)
+    mocker.patch.object(config, "sender_mean_time", 1.0)
+    mocker.patch.object(config, "monitor_interval", 1000.0)
+    mocker.patch.object(config, "retry_max_attempts", 3)
+
+##########################################################
+# Scheduling Tests
+##########################################################
+
+def test_stats_keys_added(scheduler, stats_dict):
+    """Test that the scheduler adds its stats keys."""
+    for key in ('first_attempt_sent', 'retry_sent', 'retried', 'dead_lettered'):
+        assert stats_dict[key] == 0
+
+def test_backoff_grows_with_jitter(scheduler):
+    """Test exponential backoff bounds, including the cap."""
+    for failures, full_delay in ((1, 1.0), (2, 2.0), (3, 3.0), (10, 3.0)):
+        for _ in range(100):
+            assert full_delay / 2 <= scheduler.backoff(failures) <= full_delay
+
+@pytest.mark.asyncio
+async def test_schedule_until_dead_letter(scheduler, stats_dict, test_message):
+    """Test attempt counting and dead-lettering after max_attempts failures."""
+    assert scheduler.schedule(test_message)
+    assert scheduler.schedule(test_message)
+    assert scheduler.attempts[test_message.id] == 2
+    assert not scheduler.schedule(test_message), "Third failure should dead-letter the message"
+
+    assert scheduler.dead_letters == [test_message]
+    assert test_message.id not in scheduler.attempts
+    assert stats_dict['retried'] == 2
+    assert stats_dict['dead_lettered'] == 1
+
+@pytest.mark.asyncio
+async def test_record_success_split(scheduler, stats_dict, test_message):
+    """Test that successes are split into first-attempt and after-retry."""
+    scheduler.record_success(Message(id="OTHER", content="x"))
+    scheduler.record_success()
+    scheduler.schedule(test_message)
+    scheduler.record_success(test_message)
+
+    assert stats_dict['first_attempt_sent'] == 2
+    assert stats_dict['retry_sent'] == 1
+    assert test_message.id not in scheduler.attempts
+
+##########################################################
+# Timer Loop Tests
+##########################################################
+
+def test_run_requeues_in_due_order(stats_dict, mocker):
+    """Test that retries come back on the queue in backoff order from one timer task."""
+    mocker.patch('random.uniform', return_value=0.0)
+
+    async def main():
+        queue = asyncio.Queue()
+        scheduler = RetryScheduler(queue, stats_dict, max_attempts = 5, base_delay = 2.0, max_delay = 100.0)
+        runner = asyncio.create_task(scheduler.run())
+        slow = Message(id="SLOW", content="x")
+        scheduler.schedule(slow) #backoff 1.0
+        scheduler.schedule(slow) #attempt 2, backoff 2.0
+        fast = Message(id="FAST", content="y")
+        scheduler.schedule(fast) #backoff 1.0
+
+        loop = asyncio.get_running_loop()
+        arrivals = []
+        for _ in range(3):
+            message = await queue.get()
+            arrivals.append((message.id, loop.time()))
+        await scheduler.wait_idle()
+        runner.cancel()
+        return arrivals, scheduler.pending
+
+    arrivals, pending = run_virtual(main())
+    assert [message_id for message_id, _ in arrivals] == ["SLOW", "FAST", "SLOW"]
+    assert [when for _, when in arrivals] == pytest.approx([1.0, 1.0, 2.0])
+    assert pending == 0
+
+def test_many_pending_retries(stats_dict):
+    """Test that 100k pending retries are served by the single timer task."""
+    async def main():
+        queue = asyncio.Queue()
+        scheduler = RetryScheduler(queue, stats_dict, max_attempts = 2, base_delay = 10.0)
+        runner = asyncio.create_task(scheduler.run())
+        for i in range(100000):
+            scheduler.schedule(Message(id=f"MSG_{i}", content="x"))
+        tasks_while_pending = len(asyncio.all_tasks())
+        await scheduler.wait_idle()
+        runner.cancel()
+        return tasks_while_pending, queue.qsize()
+
+    tasks_while_pending, queued = run_virtual(main())
+    assert tasks_while_pending == 2, "Only the main task and the timer task should exist"
+    assert queued == 100000
+
+##########################################################
+# Simulation Tests
+##########################################################
+
+def test_simulation_with_retries(mock_config):
+    """Test that every message ends up sent or dead-lettered."""
+    stats = new_stats()
+    run_virtual(run_simulation(stats))
+
+    assert stats['sent'] + stats['dead_lettered'] == config.total_messages
+    assert stats['sent'] == stats['first_attempt_sent'] + stats['retry_sent']
+    assert stats['retry_sent'] > 0
+    assert stats['failed'] == stats['retried'] + stats['dead_lettered'], "Every failed attempt is retried or dead-lettered"
@@ -0,0 +1,127 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_rng.py
+
+import pytest
+import asyncio
+import statistics
+import numpy as np
+from models.rng_model import BufferedRandom, RandomStreams, PRODUCER, SENDER, RETRY
+from models.simulation_model import new_stats, run_simulation
+from models.virtual_clock_model import run_virtual
+from config import config
+from conftest import no_monitor
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def mock_config(mocker):
+    """Mock configuration settings for a short seeded run."""
+    mocker.patch.object(config, "total_messages", 500)
+    mocker.patch.object(config, "num_senders", 20)
+    mocker.patch.object(config, "sender_failure", 0.2)
+    mocker.patch.object(config, "sender_mean_time", 0.01)
+    mocker.patch.object(config, "retry_max_attempts", 3)
+    mocker.patch.object(config, "retry_base_delay", 0.01)
+    mocker.patch.object(config, "monitor_interval", 1e6)
+    mocker.patch.object(config, "seed", 42)
+
+def seeded_run(paced: bool = False) -> tuple:
+    """Run the simulation on a virtual clock and return what it depends on the random streams for."""
+    async def main():
+        stats = new_stats()
+        await run_simulation(stats, monitor = no_monitor)
+        return stats['sent'], stats['failed'], stats['total_time'], asyncio.get_running_loop().time()
+    return run_virtual(main(), paced = paced)
+
+def draws(stream: BufferedRandom, count: int = 50) -> list:
+    return [stream.random() for _ in range(count)]
+
+##########################################################
+# Random Stream Tests
+##########################################################
+
+def test_same_seed_same_streams():
+    """Test that streams of the same component repeat across RandomStreams with one seed."""
+    first, second = RandomStreams(5), RandomStreams(5)
+    assert draws(first.buffered(SENDER, 3)) == draws(second.buffered(SENDER, 3))
+    assert first.generator(PRODUCER).random(10).tolist() == second.generator(PRODUCER).random(10).tolist()
+    assert first.python(RETRY).random() == second.python(RETRY).random()
+
+def test_components_get_distinct_streams():
+    """Test that kinds and indexes address different streams, regardless of creation order."""
+    streams = RandomStreams(5)
+    sender_one = draws(streams.buffered(SENDER, 1))
+    assert sender_one != draws(streams.buffered(SENDER, 2))
+    assert sender_one != draws(streams.buffered(RETRY, 1))
+
+    reordered = RandomStreams(5)
+    reordered.buffered(SENDER, 2)
+    assert draws(reordered.buffered(SENDER, 1)) == sender_one, "A stream should not depend on other components"
+
+def test_repeated_request_gives_next_stream():
+    """Test that asking again for the same component gives a new stream, the same one on every run."""
+    streams, again = RandomStreams(5), RandomStreams(5)
+    first = draws(streams.buffered(SENDER, 0))
+    second = draws(streams.buffered(SENDER, 0))
+    assert first != second
+    again.buffered(SENDER, 0)
+    assert draws(again.buffered(SENDER, 0)) == second
+
+def test_unseeded_entropy_reproduces_run():
+    """Test that an unseeded run can be repeated from its logged entropy."""
+    fresh = RandomStreams()
+    replay = RandomStreams(fresh.entropy)
+    assert draws(fresh.buffered(SENDER, 0)) == draws(replay.buffered(SENDER, 0))
+    assert RandomStreams().entropy != fresh.entropy
+
+##########################################################
+# Buffered Random Tests
+##########################################################
+
+def test_buffered_distributions():
+    """Test that buffered draws follow the distributions of the random module functions they replace."""
+    stream = RandomStreams(1).buffered(SENDER)
+    exponentials = [stream.expovariate(4.0) for _ in range(20000)]
+    uniforms = [stream.uniform(2.0, 3.0) for _ in range(20000)]
+    assert statistics.mean(exponentials) == pytest.approx(0.25, rel = 0.05)
+    assert min(exponentials) >= 0
+    assert statistics.mean(uniforms) == pytest.approx(2.5, rel = 0.01)
+    assert 2.0 <= min(uniforms) and max(uniforms) < 3.0
+
+def test_blocks_grow_to_block_size():
+    """Test that lightly used streams sample small blocks and busy ones reach the full block size."""
+    stream = BufferedRandom(np.random.default_rng(0), block_size = 64)
+    stream.random()
+    assert stream._uniform_block == 32, "First refill should be small"
+    for _ in range(500):
+        stream.random()
+    assert stream._uniform_block == 64
+    assert stream._exponential_block == 16, "Buffers should grow independently"
+
+def test_buffered_matches_generator():
+    """Test that buffering does not change the values, only when they are sampled."""
+    stream = BufferedRandom(np.random.default_rng(3), block_size = 8)
+    expected = np.random.default_rng(3).random(100).tolist()
+    assert draws(stream, 100) == expected
+
+##########################################################
+# Seeded Simulation Tests
+##########################################################
+
+def test_seeded_runs_repeat(mock_config):
+    """Test that a seeded fast-forward run gives identical results every time."""
+    first = seeded_run()
+    assert seeded_run() == first
+    assert first[0] + first[1] >= config.total_messages
+
+def test_seed_changes_results(mock_config, mocker):
+    """Test that a different seed gives a different run."""
+    first = seeded_run()
+    mocker.patch.object(config, "seed", 43)
+    assert seeded_run() != first
+
+def test_paced_run_matches_fast_forward(mock_config):
+    """Test that pacing a seeded run to the wall clock leaves its results unchanged."""
+    assert seeded_run(paced = True) == seeded_run()
@@ -7,6 +7,8 @@ import asyncio
 import time
 from models.sender_model import SenderModel, Message
 from models.producer_model import ProducerModel
+from models.latency_histogram_model import LatencyHistogram
+from models.retry_scheduler_model import RetryScheduler
 from config import config
 
 import logging
@@ -87,6 +89,27 @@ async def test_send_message_success(sender_model, test_message, mocker):
     assert sender_model.stats['failed'] == 0, "Should not increment failed counter"
     assert sender_model.stats['total_time'] > 0, "Should record sending time"
 
+@pytest.mark.asyncio
+async def test_send_message_records_latency(shared_queue, stats_dict, test_message, mocker):
+    """Test that successful sends are recorded in the latency histogram."""
+    stats_dict['latency'] = LatencyHistogram()
+    sender = SenderModel(1, shared_queue, stats_dict, 0.0, 0.1)
+    mocker.patch('random.expovariate', return_value=0.05)
+    await sender.send_message(test_message)
+    await sender.send_message(test_message)
+
+    assert stats_dict['latency'].count == 2, "Should record one sample per success"
+    assert stats_dict['latency'].max >= 0.05
+
+@pytest.mark.asyncio
+async def test_send_message_zero_mean_time(shared_queue, stats_dict, test_message, mocker):
+    """Test that a zero mean send time skips the simulated delay instead of dividing by zero."""
+    sender = SenderModel(1, shared_queue, stats_dict, 0.0, 0.0)
+    expovariate = mocker.patch('random.expovariate')
+    await sender.send_message(test_message)
+    assert stats_dict['sent'] == 1
+    expovariate.assert_not_called()
+
 @pytest.mark.asyncio
 async def test_send_message_failure(sender_model, test_message, mocker):
     """Test message sending failure."""
@@ -96,6 +119,22 @@ async def test_send_message_failure(sender_model, test_message, mocker):
     assert sender_model.stats['sent'] == 0, "Should not increment sent counter"
     assert sender_model.stats['failed'] == 1, "Should increment failed counter"
 
+@pytest.mark.asyncio
+async def test_send_message_failure_schedules_retry(shared_queue, stats_dict, test_message, mocker):
+    """Test that a failed message is handed to the retry scheduler instead of being dropped."""
+    scheduler = RetryScheduler(shared_queue, stats_dict, max_attempts = 3)
+    sender = SenderModel(1, shared_queue, stats_dict, 1.0, 0.1, retry_scheduler = scheduler)
+    mocker.patch('random.expovariate', return_value=0.01)
+    await sender.send_message(test_message)
+
+    assert stats_dict['failed'] == 1
+    assert stats_dict['retried'] == 1
+    assert scheduler.attempts[test_message.id] == 1
+
+    sender.failure_rate = 0.0
+    await sender.send_message(test_message)
+    assert stats_dict['retry_sent'] == 1, "Success after a failure should count as after-retry"
+
 @pytest.mark.asyncio
 async def test_send_message_exception(sender_model, test_message, mocker):
     """Test error handling during message sending."""
@@ -132,6 +171,19 @@ async def test_run_loop_multiple_messages(sender_model):
 
     assert sender_model.queue.empty(), "Should empty the queue"
 
+@pytest.mark.asyncio
+async def test_run_loop_message_batch(sender_model, producer_model, mocker):
+    """Test that a MessageBatch queue item is sent row by row."""
+    mocker.patch('random.expovariate', return_value=0.001)
+    sender_model.failure_rate = 0
+    batch = producer_model.generate_message_batch(20)
+    await sender_model.queue.put(batch)
+    await sender_model.queue.put(None)
+    await sender_model.run()
+
+    assert sender_model.stats['sent'] == 20, "Every row of the batch should be sent"
+    assert sender_model.queue.empty()
+
 @pytest.mark.asyncio
 async def test_run_loop_error_handling(sender_model, test_message, mocker):
     """Test error handling in run loop."""
@@ -144,6 +196,102 @@ async def test_run_loop_error_handling(sender_model, test_message, mocker):
     
     assert not sender_model.running, "Should stop running on error"
 
+##########################################################
+# Batch Mode Tests
+##########################################################
+
+@pytest.fixture
+def batch_sender(shared_queue, stats_dict):
+    """Fixture to create a sender in batch mode with a fixed delay."""
+    stats_dict['latency'] = LatencyHistogram()
+    return SenderModel(1, shared_queue, stats_dict, 0.0, 0.1,
+                       batch_size = 10, batch_linger = 0.01, batch_base_time = 0.05, batch_message_time = 0.001)
+
+@pytest.mark.asyncio
+async def test_send_batch_counts(batch_sender, mocker):
+    """Test that one batch request records every message it contains."""
+    mocker.patch('random.expovariate', return_value=0.01)
+    messages = [Message(id=f"TEST_MSG_{i}", content="batch") for i in range(5)]
+    sent = await batch_sender.send_batch(messages)
+
+    assert sent == 5
+    assert batch_sender.stats['sent'] == 5
+    assert batch_sender.stats['latency'].count == 5, "Each message should get a latency sample"
+    assert batch_sender.stats['total_time'] >= 5 * (0.01 + 5 * 0.001), "Delay should include per-message cost"
+
+@pytest.mark.asyncio
+async def test_send_batch_per_message_failures(batch_sender, producer_model, mocker):
+    """Test that failures are tracked per message, including MessageBatch rows."""
+    mocker.patch('random.expovariate', return_value=0.01)
+    mocker.patch('random.random', side_effect=[0.0, 0.9, 0.0, 0.9, 0.9, 0.9])
+    batch_sender.failure_rate = 0.5
+    items = [Message(id="TEST_MSG_1", content="a"), Message(id="TEST_MSG_2", content="b"),
+             producer_model.generate_message_batch(4)]
+    sent = await batch_sender.send_batch(items)
+
+    assert sent == 4
+    assert batch_sender.stats['failed'] == 2
+
+@pytest.mark.asyncio
+async def test_run_batched_drains_up_to_batch_size(batch_sender, mocker):
+    """Test that a sender submits at most batch_size messages per request."""
+    mocker.patch('random.expovariate', return_value=0.01)
+    sizes = []
+    original = batch_sender.send_batch
+    async def tracked(items):
+        sizes.append(len(items))
+        return await original(items)
+    batch_sender.send_batch = tracked
+
+    for i in range(25):
+        await batch_sender.queue.put(Message(id=f"TEST_MSG_{i}", content="batch"))
+    await batch_sender.queue.put(None)
+    await batch_sender.run()
+
+    assert sizes == [10, 10, 5]
+    assert batch_sender.stats['sent'] == 25
+    assert batch_sender.queue.empty() and batch_sender.queue._unfinished_tasks == 0
+
+@pytest.mark.asyncio
+async def test_run_batched_linger_collects_late_messages(batch_sender, mocker):
+    """Test that messages arriving within the linger window join the batch."""
+    mocker.patch('random.expovariate', return_value=0.01)
+    sizes = []
+    original = batch_sender.send_batch
+    async def tracked(items):
+        sizes.append(len(items))
+        return await original(items)
+    batch_sender.send_batch = tracked
+
+    async def late_producer():
+        await batch_sender.queue.put(Message(id="TEST_MSG_0", content="first"))
+        await asyncio.sleep(0.002)
+        for i in range(1, 4):
+            await batch_sender.queue.put(Message(id=f"TEST_MSG_{i}", content="late"))
+        await asyncio.sleep(0.05)
+        await batch_sender.queue.put(None)
+
+    await asyncio.gather(late_producer(), batch_sender.run())
+    assert sizes == [4], "Late messages within the linger window should share the request"
+
+@pytest.mark.asyncio
+async def test_batched_senders_process_everything(producer_model, shared_queue, stats_dict, mock_config2):
+    """Test several batch-mode senders with the producer."""
+    config.num_senders = 10
+    config.total_messages = 1000
+    senders = [SenderModel(i, shared_queue, stats_dict, 0.15, 0.01,
+                           batch_size = 16, batch_linger = 0.001, batch_base_time = 0.01, batch_message_time = 0.0001)
+               for i in range(config.num_senders)]
+    producer_task = asyncio.create_task(producer_model.produce_messages())
+    sender_tasks = [asyncio.create_task(sender.run()) for sender in senders]
+    await producer_task
+    await shared_queue.join()
+    for task in sender_tasks:
+        await task
+
+    assert stats_dict['sent'] + stats_dict['failed'] == config.total_messages
+    assert shared_queue.empty()
+
 ##########################################################
 # Multi-Sender Tests
 ##########################################################
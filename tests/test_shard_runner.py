@@ -0,0 +1,138 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_shard_runner.py
+
+import pytest
+from models.shard_runner_model import split_evenly, shard_configs, merge_stats, run_sharded
+from models.simulation_model import new_stats
+from models.autoscaler_model import PoolHistory
+from config import config, Config
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def mock_config(mocker):
+    """Mock configuration settings for a small fast-forward run."""
+    mocker.patch.object(config, "total_messages", 1000)
+    mocker.patch.object(config, "num_senders", 40)
+    mocker.patch.object(config, "sender_failure", 0.15)
+    mocker.patch.object(config, "sender_mean_time", 2.0)
+    mocker.patch.object(config, "monitor_interval", 10.0)
+    mocker.patch.object(config, "fast_forward", True)
+
+##########################################################
+# Sharding Tests
+##########################################################
+
+def test_split_evenly():
+    """Test that totals are split into near-equal shares."""
+    assert split_evenly(10, 3) == [4, 3, 3]
+    assert split_evenly(2, 4) == [1, 1, 0, 0]
+    assert sum(split_evenly(1000003, 32)) == 1000003
+
+def test_shard_configs_cover_workload():
+    """Test that shard configs add up to the original workload."""
+    base = Config(total_messages = 1001, num_senders = 50)
+    shards = shard_configs(base, 4)
+
+    assert len(shards) == 4
+    assert sum(s.total_messages for s in shards) == 1001
+    assert sum(s.num_senders for s in shards) == 50
+    assert all(s.sender_mean_time == base.sender_mean_time for s in shards), "Other settings should be kept"
+    assert all(s.num_workers == 1 for s in shards)
+
+def test_shard_configs_never_exceed_senders():
+    """Test that every shard gets at least one sender."""
+    shards = shard_configs(Config(total_messages = 10, num_senders = 3), 8)
+    assert len(shards) == 3
+    assert all(s.num_senders == 1 for s in shards)
+
+def test_shard_configs_split_carrier_pools():
+    """Test that carrier pool members and rates are divided across shards."""
+    base = Config(num_senders = 10, carrier_pools = {'carrier_a': {'rate': 40.0, 'burst': 5, 'senders': 4}})
+    shards = shard_configs(base, 2)
+    pools = [s.carrier_pools['carrier_a'] for s in shards]
+    assert [pool['senders'] for pool in pools] == [2, 2]
+    assert sum(pool['rate'] for pool in pools) == pytest.approx(40.0)
+    assert base.carrier_pools['carrier_a']['senders'] == 4, "Base config should be left unchanged"
+
+def test_merge_stats_pool_histories():
+    """Test that shard pool histories merge into the combined pool size."""
+    first, second = new_stats(), new_stats()
+    first['pool_history'] = PoolHistory()
+    first['pool_history'].record(0.0, 3)
+    second['pool_history'] = PoolHistory()
+    second['pool_history'].record(0.0, 4)
+    merged = merge_stats([first, second])
+    assert merged['pool_history'].sizes == [7]
+    assert first['pool_history'].sizes == [3]
+
+def test_merge_stats():
+    """Test that shard stats are summed."""
+    merged = merge_stats([
+        {'sent': 3, 'failed': 1, 'total_time': 1.5},
+        {'sent': 2, 'failed': 0, 'total_time': 0.5},
+    ])
+    assert (merged['sent'], merged['failed'], merged['total_time']) == (5, 1, 2.0)
+
+def test_merge_stats_histograms():
+    """Test that latency histograms are merged without changing the inputs."""
+    first, second = new_stats(), new_stats()
+    first['latency'].record(1.0)
+    second['latency'].record(3.0, n = 2)
+    merged = merge_stats([first, second])
+
+    assert merged['latency'].count == 3
+    assert merged['latency'].max == 3.0
+    assert first['latency'].count == 1, "Inputs should not be modified"
+
+def test_merge_stats_empty():
+    """Test merging no shards."""
+    merged = merge_stats([])
+    assert (merged['sent'], merged['failed'], merged['total_time']) == (0, 0, 0.0)
+    assert merged['latency'].count == 0
+
+##########################################################
+# Runner Tests
+##########################################################
+
+def test_run_sharded(mock_config, capsys):
+    """Test a sharded fast-forward run processes every message once."""
+    stats, elapsed = run_sharded(4)
+
+    assert stats['sent'] + stats['failed'] == config.total_messages
+    assert stats['total_time'] / stats['sent'] == pytest.approx(config.sender_mean_time, rel = 0.25)
+    # 1000 messages over 40 senders at 2s each takes roughly 50 simulated seconds
+    assert elapsed > 20.0
+    assert stats['latency'].count == stats['sent'], "Latency distributions should be merged"
+    captured = capsys.readouterr()
+    assert "[Monitor] 10.0s" in captured.out, "Should print merged monitor lines"
+    assert "[Senders] 10.0s" in captured.out, "Should print merged per-sender lines"
+
+def test_run_sharded_sender_counters(mock_config, capsys):
+    """Test that per-sender counters of all shards merge under distinct sender IDs."""
+    stats, _ = run_sharded(4)
+    registry = stats['senders']
+
+    assert len(registry) == config.num_senders, "Shards should not reuse each other's sender IDs"
+    assert sum(counters.sent for counters in registry) == stats['sent']
+    assert sum(counters.failed for counters in registry) == stats['failed']
+
+def test_run_sharded_shard_failure(mock_config, mocker):
+    """Test that a failing shard raises in the parent with its traceback instead of leaving it waiting."""
+    mocker.patch.object(config, "arrival_process", "bogus")
+    with pytest.raises(RuntimeError, match = "bogus"):
+        run_sharded(2)
+
+def test_shard_configs_trace_paths():
+    """Test that each shard records its own trace and replays its share of one."""
+    shards = shard_configs(Config(num_senders = 10, trace_record_path = "run.trace"), 2)
+    assert [s.trace_record_path for s in shards] == ["run.trace.0", "run.trace.1"]
+    assert [(s.trace_replay_shard, s.trace_replay_shards) for s in shards] == [(0, 2), (1, 2)]
+    assert shard_configs(Config(num_senders = 10, trace_record_path = "run.trace"), 1)[0].trace_record_path == "run.trace"
+
+def test_shard_configs_metrics_ports():
+    """Test that each shard serves metrics on its own port."""
+    assert [s.metrics_port for s in shard_configs(Config(num_senders = 10, metrics_port = 9100), 3)] == [9100, 9101, 9102]
+    assert [s.metrics_port for s in shard_configs(Config(num_senders = 10), 3)] == [0, 0, 0]
@@ -0,0 +1,176 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_shm_ring.py
+
+import pytest
+import asyncio
+import numpy as np
+from models.shm_ring_model import ShmRing, RingConsumerGroup, MESSAGE_DTYPE, COMPLETION_DTYPE
+from models.ring_pipeline_model import run_ring_pipeline, message_records, record_completions
+from models.producer_model import ProducerModel
+from models.simulation_model import new_stats
+from models.latency_histogram_model import LatencyHistogram
+from models.virtual_clock_model import run_virtual
+from config import config
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def ring():
+    """Fixture to create a small ring of integers with two readers."""
+    ring = ShmRing(np.int64, 8, consumers = 2)
+    yield ring
+    ring.dispose()
+
+@pytest.fixture
+def message_ring():
+    """Fixture to create a ring of message records and its completion ring."""
+    ring = ShmRing(MESSAGE_DTYPE, 64)
+    completions = ShmRing(COMPLETION_DTYPE, 64)
+    yield ring, completions
+    ring.dispose()
+    completions.dispose()
+
+@pytest.fixture
+def mock_config(mocker):
+    """Mock configuration settings for a fast-forward ring run."""
+    mocker.patch.object(config, "total_messages", 5000)
+    mocker.patch.object(config, "num_senders", 20)
+    mocker.patch.object(config, "sender_failure", 0.1)
+    mocker.patch.object(config, "sender_mean_time", 0.0)
+    mocker.patch.object(config, "monitor_interval", 1000.0)
+    mocker.patch.object(config, "fast_forward", True)
+    mocker.patch.object(config, "ring_capacity", 1024)
+    mocker.patch.object(config, "seed", 3)
+
+##########################################################
+# Ring Tests
+##########################################################
+
+def test_write_and_claim(ring):
+    """Test that records are claimed in the order written, at most claim size at a time."""
+    assert ring.write(np.arange(5)) == 5
+    index, records = ring.claim(0, 3)
+    assert index == 0 and records.tolist() == [0, 1, 2]
+    index, records = ring.claim(1, 3)
+    assert index == 3 and records.tolist() == [3, 4]
+    assert ring.claim(0, 3) is None
+    assert len(ring) == 0
+
+def test_held_slots_block_writes(ring):
+    """Test that a full ring accepts no writes until the reader holding the oldest slots releases them."""
+    assert ring.write(np.arange(10)) == 8, "Only as many as there are slots"
+    ring.claim(0, 4)
+    ring.claim(1, 4)
+    assert ring.write(np.arange(4)) == 0, "Claimed slots are still held"
+    ring.release(1)
+    assert ring.write(np.arange(4)) == 0, "Reader 0 holds the oldest slots"
+    ring.release(0)
+    assert ring.write(np.arange(100, 104)) == 4
+
+def test_wrap_around(ring):
+    """Test that writes wrap around the slots and claims stop at the end of them."""
+    ring.write(np.arange(6))
+    ring.claim(0, 6)
+    ring.release(0)
+    assert ring.write(np.arange(6, 12)) == 6
+    assert ring.records.tolist()[:4] == [8, 9, 10, 11]
+    index, records = ring.claim(0, 8)
+    assert index == 6 and records.tolist() == [6, 7], "A claim stays contiguous"
+    assert ring.claim(0, 8)[1].tolist() == [8, 9, 10, 11]
+
+def test_exhausted_once_closed_and_claimed(ring):
+    """Test that a ring is exhausted only once it is closed and every record is claimed."""
+    ring.write(np.arange(2))
+    ring.close()
+    assert not ring.exhausted()
+    ring.claim(0, 2)
+    assert ring.exhausted()
+
+##########################################################
+# Reader Tests
+##########################################################
+
+def test_records_viewed_as_messages(message_ring):
+    """Test that messages written as records read back unchanged as a MessageBatch over the ring."""
+    ring, completions = message_ring
+    batch = ProducerModel(None).generate_message_batch(10)
+    ring.write(message_records(batch, 1.0))
+    group = RingConsumerGroup(ring, completions, 0, 4, batch.prefix)
+    index, records = ring.claim(0, 10)
+    view = group.batch(index, records)
+    assert [message.content for message in view.to_messages()] == [message.content for message in batch.to_messages()]
+    assert view.message(9).id == batch.message(9).id
+    assert view.created_at == 1.0
+
+@pytest.mark.asyncio
+async def test_reader_reports_chunks(message_ring):
+    """Test that a reader returns chunks, reports each completion and returns the sentinel once drained."""
+    ring, completions = message_ring
+    ring.write(message_records(ProducerModel(None).generate_message_batch(6), 1.0))
+    ring.close()
+    group = RingConsumerGroup(ring, completions, 0, 4, "MSG_")
+    stats = {'sent': 0, 'failed': 0, 'total_time': 0.0}
+    reader = group.reader(0, stats)
+    sizes = []
+    while (chunk := await reader.get()) is not None:
+        sizes.append(len(chunk))
+        stats['sent'] += len(chunk)
+        reader.task_done()
+    assert sizes == [4, 2]
+    assert group.flush()
+    rows = completions.claim(0, 64)[1]
+    assert rows['count'].tolist() == rows['sent'].tolist() == [4, 2]
+    assert ring.write(message_records(ProducerModel(None).generate_message_batch(64), 1.0)) == 64, "All released"
+
+def test_idle_poller_parks(message_ring, mocker):
+    """Test that the poller sleeps while no reader waits and nothing is buffered, rather than polling on the clock."""
+    ring, completions = message_ring
+    group = RingConsumerGroup(ring, completions, 0, 4, "MSG_")
+    flush = mocker.spy(group, "flush")
+
+    async def main():
+        poller = asyncio.create_task(group.run())
+        await asyncio.sleep(10.0) #20000 poll intervals, which would each advance the virtual clock
+        poller.cancel()
+    run_virtual(main())
+    assert flush.call_count == 1
+
+def test_record_completions():
+    """Test that completion records add up to the stats and the stage histograms."""
+    stats = new_stats()
+    for stage in ('producer_time', 'queue_wait', 'service_time', 'total_latency'):
+        stats[stage] = LatencyHistogram()
+    rows = np.array([(0, 4, 3, 1, 0, 0.3, 1.0, 1.5, 2.0, 2.4), (4, 2, 2, 0, 1, 0.2, 1.0, 1.5, 2.0, 2.2)],
+                    dtype = COMPLETION_DTYPE)
+    assert record_completions(stats, rows) == 6
+    assert (stats['sent'], stats['failed']) == (5, 1)
+    assert stats['latency'].count == 5
+    assert stats['total_latency'].count == 6
+    assert stats['queue_wait'].mean() == pytest.approx(0.5, rel = 0.05)
+
+##########################################################
+# Pipeline Tests
+##########################################################
+
+def test_ring_pipeline(mock_config):
+    """Test that a producer process and two worker processes send every message exactly once."""
+    stats, elapsed = run_ring_pipeline(2)
+    assert stats['sent'] + stats['failed'] == config.total_messages
+    assert stats['failed'] == pytest.approx(0.1 * config.total_messages, rel = 0.2)
+    assert stats['total_latency'].count == config.total_messages
+    assert elapsed > 0
+
+def test_workers_finishing_apart(mock_config, mocker):
+    """Test that a worker done with its senders while another still sends its last chunk is not taken as a failure."""
+    mocker.patch.object(config, "total_messages", 2000)
+    mocker.patch.object(config, "sender_mean_time", 0.1)
+    stats, _ = run_ring_pipeline(2)
+    assert stats['sent'] + stats['failed'] == config.total_messages
+
+def test_unsupported_modes(mock_config, mocker):
+    """Test that modes which put messages back on the queue are refused."""
+    mocker.patch.object(config, "retry_max_attempts", 3)
+    with pytest.raises(ValueError):
+        run_ring_pipeline(2)
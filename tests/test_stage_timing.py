@@ -0,0 +1,169 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_stage_timing.py
+
+import pytest
+import asyncio
+from models.producer_model import ProducerModel, Message, TimedMessage
+from models.sender_model import SenderModel
+from models.retry_scheduler_model import RetryScheduler
+from models.latency_histogram_model import LatencyHistogram
+from models.display_monitor_model import format_stages, STAGES
+from config import config
+from conftest import simulate
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def stats_dict():
+    """Fixture to create a stats dictionary with every stage histogram."""
+    stats = {
+        'sent': 0,
+        'failed': 0,
+        'total_time': 0.0
+    }
+    for stage in STAGES:
+        stats[stage] = LatencyHistogram()
+    return stats
+
+@pytest.fixture
+def mock_config(mocker):
+    """Mock configuration settings for a fast-forward run with stage timing."""
+    mocker.patch.object(config, "total_messages", 5000)
+    mocker.patch.object(config, "num_senders", 50)
+    mocker.patch.object(config, "sender_failure", 0.0)
+    mocker.patch.object(config, "sender_mean_time", 1.0)
+    mocker.patch.object(config, "monitor_interval", 1000.0)
+    mocker.patch.object(config, "stage_timing", True)
+    mocker.patch.object(config, "seed", 9)
+
+##########################################################
+# Producer Tests
+##########################################################
+
+@pytest.mark.asyncio
+async def test_producer_stamps_messages(stats_dict, mocker):
+    """Test that a timed producer stamps every message when created and when enqueued."""
+    mocker.patch.object(config, "total_messages", 10)
+    queue = asyncio.Queue()
+    producer = ProducerModel(queue, vectorized = True, stats = stats_dict)
+    await producer.produce_messages(add_sentinels = False)
+    messages = [queue.get_nowait() for _ in range(10)]
+    assert all(isinstance(message, TimedMessage) for message in messages)
+    assert all(message.enqueued_at >= message.created_at for message in messages)
+    assert stats_dict['producer_time'].count == 10
+
+@pytest.mark.asyncio
+async def test_untimed_producer_plain_messages(mocker):
+    """Test that without a producer_time histogram messages are not stamped."""
+    mocker.patch.object(config, "total_messages", 10)
+    queue = asyncio.Queue()
+    await ProducerModel(queue, vectorized = True, stats = {}).produce_messages(add_sentinels = False)
+    assert type(queue.get_nowait()) is Message
+
+def test_backpressure_shows_as_producer_time(mock_config, mocker):
+    """Test that time spent blocked on a full queue is producer time, not queue wait."""
+    mocker.patch.object(config, "queue_maxsize", 100)
+    stats = simulate()
+    assert stats['producer_time'].mean() > 3 * stats['queue_wait'].mean()
+
+def test_timed_batch_rows_keep_stamps():
+    """Test that slices and materialized rows of a timed MessageBatch keep its creation time."""
+    batch = ProducerModel(None).generate_message_batch(10)
+    batch.created_at = 5.0
+    batch.enqueued_at = 6.0
+    row = batch.slice(2, 4).message(0)
+    assert (row.created_at, row.enqueued_at) == (5.0, None), "A slice is enqueued on its own"
+    assert batch.message(3).enqueued_at == 6.0
+
+##########################################################
+# Sender Tests
+##########################################################
+
+@pytest.mark.asyncio
+async def test_failed_send_records_service_time(stats_dict):
+    """Test that a failed attempt counts as service time and, without retries, as a finished message."""
+    sender = SenderModel(1, asyncio.Queue(), stats_dict, failure_rate = 1.0, mean_time = 0.01)
+    now = asyncio.get_running_loop().time()
+    await sender.send_message(TimedMessage("MSG_1", "test", now - 0.2, now - 0.1))
+    assert stats_dict['queue_wait'].mean() == pytest.approx(0.1, abs = 0.01)
+    assert stats_dict['service_time'].count == 1
+    assert stats_dict['total_latency'].count == 1
+    assert stats_dict['total_latency'].mean() > 0.2
+    assert 'latency' not in stats_dict
+
+@pytest.mark.asyncio
+async def test_total_latency_spans_retries(stats_dict):
+    """Test that a retried message is waited on and served per attempt but finished once."""
+    queue = asyncio.Queue()
+    scheduler = RetryScheduler(queue, stats_dict, max_attempts = 3, base_delay = 0.05, max_delay = 0.05)
+    timer = asyncio.create_task(scheduler.run())
+    sender = SenderModel(1, queue, stats_dict, failure_rate = 1.0, mean_time = 0.001, retry_scheduler = scheduler)
+    now = asyncio.get_running_loop().time()
+    await queue.put(TimedMessage("MSG_1", "test", now, now))
+    for _ in range(3):
+        message = await asyncio.wait_for(queue.get(), 1.0)
+        await sender.send_message(message)
+    timer.cancel()
+    assert stats_dict['dead_lettered'] == 1
+    assert stats_dict['queue_wait'].count == 3
+    assert stats_dict['queue_wait'].max < 0.02, "Backoff is not queue wait"
+    assert stats_dict['service_time'].count == 3
+    assert stats_dict['total_latency'].count == 1
+    assert stats_dict['total_latency'].mean() > 0.05, "Total includes the backoff"
+
+@pytest.mark.asyncio
+async def test_batched_sends_record_stages(stats_dict):
+    """Test that chunks and batched requests record one sample of each stage per message."""
+    batch = ProducerModel(None).generate_message_batch(20)
+    now = asyncio.get_running_loop().time()
+    batch.created_at = now
+    chunks = [batch.slice(0, 10), batch.slice(10, 15)]
+    for chunk in chunks:
+        chunk.enqueued_at = now
+    sender = SenderModel(1, asyncio.Queue(), stats_dict, failure_rate = 0.0, mean_time = 0.001, batch_base_time = 0.001)
+    await sender.send_message_batch(chunks[0])
+    await sender.send_batch([chunks[1]] + batch.slice(15, 20).to_messages(now))
+    for stage in ('service_time', 'total_latency'):
+        assert stats_dict[stage].count == 20
+    assert stats_dict['queue_wait'].count == 10 + 5, "Rows materialized without enqueued_at are not waited on"
+
+##########################################################
+# Simulation and Display Tests
+##########################################################
+
+def test_stages_add_up(mock_config):
+    """Test that a backlog run is queue-bound and its stages add up to the end-to-end latency."""
+    stats = simulate()
+    total = stats['total_latency']
+    assert total.count == config.total_messages
+    stage_sum = stats['producer_time'].mean() + stats['queue_wait'].mean() + stats['service_time'].mean()
+    assert stage_sum == pytest.approx(total.mean(), rel = 0.01)
+    assert stats['queue_wait'].mean() > 10 * stats['service_time'].mean(), "100 messages queued per sender"
+
+def test_pull_source_has_no_queue_wait(mock_config, mocker):
+    """Test that messages pulled from a lazy source have neither producer time nor queue wait."""
+    mocker.patch.object(config, "pull_source", True)
+    stats = simulate()
+    assert stats['total_latency'].count == config.total_messages
+    assert stats['producer_time'].max == stats['queue_wait'].max == 0.0
+
+def test_stage_timing_off(mock_config, mocker):
+    """Test that turning stage timing off leaves out the stage histograms."""
+    mocker.patch.object(config, "stage_timing", False)
+    stats = simulate()
+    assert not any(stage in stats for stage in STAGES)
+    assert format_stages(stats) == ""
+
+def test_format_stages(stats_dict):
+    """Test that every stage is shown with its share of the end-to-end mean."""
+    stats_dict['producer_time'].record(0.1)
+    stats_dict['queue_wait'].record(0.6)
+    stats_dict['service_time'].record(0.3)
+    stats_dict['total_latency'].record(1.0)
+    line = format_stages(stats_dict)
+    assert line.startswith("Producer mean: 0.1000")
+    assert "Queue wait mean: 0.6000" in line and "(60%)" in line
+    assert "Service mean: 0.3000" in line and "(30%)" in line
+    assert line.endswith("seconds")
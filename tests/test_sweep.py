@@ -0,0 +1,106 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_sweep.py
+
+import pytest
+import csv
+import os
+import sweep
+from sweep import parse_value, expand_grid, config_key, run_sweep, predict_sweep, main
+from config import Config
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def base():
+    """Small fast-forward configuration the sweep points override."""
+    return Config(total_messages = 200, num_senders = 10, sender_mean_time = 0.5, fast_forward = True)
+
+##########################################################
+# Grid Tests
+##########################################################
+
+def test_parse_value():
+    """Test that values are converted to the type of their config field."""
+    assert parse_value("num_senders", "50") == 50
+    assert parse_value("sender_failure", "0.2") == 0.2
+    assert parse_value("autoscale", "true") is True
+    assert parse_value("carrier_pools", '{"a": {"rate": 5, "senders": 2}}') == {'a': {'rate': 5, 'senders': 2}}
+    with pytest.raises(ValueError):
+        parse_value("num_sender", "50")
+    with pytest.raises(ValueError):
+        parse_value("autoscale", "maybe")
+
+def test_expand_grid():
+    """Test that every combination is generated in order."""
+    points = expand_grid({'num_senders': [10, 50], 'sender_failure': [0.1, 0.2, 0.3]})
+    assert len(points) == 6
+    assert points[0] == {'num_senders': 10, 'sender_failure': 0.1}
+    assert points[-1] == {'num_senders': 50, 'sender_failure': 0.3}
+    assert expand_grid({}) == [{}]
+
+def test_config_key(base):
+    """Test that the cache key changes with any field and with the seed."""
+    assert config_key(base, 0) == config_key(Config(**vars(base)), 0)
+    assert config_key(base, 0) != config_key(base, 1)
+    assert config_key(base, 0) != config_key(Config(**dict(vars(base), sender_failure = 0.5)), 0)
+
+##########################################################
+# Sweep Tests
+##########################################################
+
+def test_run_sweep_caches_points(base, tmp_path, mocker):
+    """Test that a re-run only computes points that were not cached."""
+    cache_dir = str(tmp_path / "cache")
+    rows = run_sweep([{'num_senders': 5}, {'num_senders': 20}], seeds = [0, 1], workers = 2, cache_dir = cache_dir, base = base)
+    assert [(row['num_senders'], row['seed']) for row in rows] == [(5, 0), (5, 1), (20, 0), (20, 1)]
+    assert all(row['sent'] + row['failed'] == 200 and not row['cached'] for row in rows)
+    assert rows[0]['elapsed'] > rows[2]['elapsed'], "More senders should finish sooner"
+    assert len(os.listdir(cache_dir)) == 4
+
+    mocker.patch.object(sweep, "ProcessPoolExecutor", side_effect = AssertionError("Nothing should be recomputed"))
+    again = run_sweep([{'num_senders': 5}, Config(**dict(vars(base), num_senders = 20))], seeds = [0, 1], cache_dir = cache_dir, base = base)
+    assert all(row['cached'] for row in again)
+    assert [row['sent'] for row in again] == [row['sent'] for row in rows]
+
+def test_seeded_runs_repeat(base):
+    """Test that a point run twice with the same seed gives the same results."""
+    first, second, other = run_sweep([{}], seeds = [7, 7, 8], cache_dir = None, base = base)
+    assert (first['sent'], first['elapsed']) == (second['sent'], second['elapsed'])
+    assert first['elapsed'] != other['elapsed']
+
+def test_validate_adds_deviations(base):
+    """Test that validation reports predictions and small deviations next to the results."""
+    row = run_sweep([{'total_messages': 2000}], seeds = [3], cache_dir = None, base = base, validate = True)[0]
+    assert row['predicted_sent'] == pytest.approx(2000 * (1 - base.sender_failure))
+    assert row['elapsed_error'] == pytest.approx(row['elapsed'] / row['predicted_elapsed'] - 1)
+    assert abs(row['elapsed_error']) < 0.1
+
+def test_predict_sweep(base, mocker):
+    """Test that analytic sweeps do not run the simulation."""
+    mocker.patch.object(sweep, "ProcessPoolExecutor", side_effect = AssertionError("Nothing should be simulated"))
+    rows = predict_sweep([{'num_senders': 5}, {'num_senders': 20, 'autoscale': True}], base)
+    assert rows[0]['elapsed'] > rows[1]['elapsed']
+    assert rows[0]['notes'] == "" and "autoscaling" in rows[1]['notes']
+
+def test_main_writes_csv(tmp_path, capsys):
+    """Test the command line end to end."""
+    output = tmp_path / "results.csv"
+    args = ["--grid", "num_senders=5,10", "--set", "total_messages=100", "--set", "sender_mean_time=0.1",
+            "--seeds", "2", "--output", str(output), "--cache-dir", str(tmp_path / "cache")]
+    assert main(args) == 0
+    with open(output) as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 4
+    assert list(rows[0])[:4] == ['total_messages', 'sender_mean_time', 'num_senders', 'seed']
+    assert rows[3]['num_senders'] == '10' and rows[3]['cached'] == 'False'
+
+    main(args)
+    assert "4 runs (4 cached)" in capsys.readouterr().out
+
+    assert main(args + ["--analytic"]) == 0
+    with open(output) as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 2, "Predictions do not depend on the seed"
+    assert 'utilization' in rows[0] and 'cached' not in rows[0]
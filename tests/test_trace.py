@@ -0,0 +1,167 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_trace.py
+
+import pytest
+import asyncio
+import numpy as np
+from models.trace_model import TraceRecorder, TraceReader, TraceReplayProducer
+from models.producer_model import ProducerModel, Message
+from models.virtual_clock_model import run_virtual
+from models.simulation_model import new_stats, run_simulation
+from models.shard_runner_model import run_sharded
+from config import config
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def trace_path(tmp_path):
+    """Fixture with a location for a trace file."""
+    return str(tmp_path / "workload.trace")
+
+@pytest.fixture
+def batch():
+    """Fixture with a batch of 500 generated messages."""
+    return ProducerModel(asyncio.Queue()).generate_message_batch(500)
+
+@pytest.fixture
+def mock_config(mocker):
+    """Mock configuration settings for a small simulation run."""
+    mocker.patch.object(config, "total_messages", 300)
+    mocker.patch.object(config, "num_senders", 10)
+    mocker.patch.object(config, "sender_failure", 0.0)
+    mocker.patch.object(config, "sender_mean_time", 0.5)
+    mocker.patch.object(config, "monitor_interval", 1000.0)
+
+def replay(path, **kwargs) -> list:
+    """Replay a trace into a queue on the virtual clock and return (arrival time, item) pairs."""
+    async def run():
+        queue = asyncio.Queue()
+        producer = TraceReplayProducer(queue, path, **kwargs)
+        loop = asyncio.get_running_loop()
+        arrivals = []
+
+        async def consume():
+            while True:
+                item = await queue.get()
+                arrivals.append((loop.time(), item))
+                queue.task_done()
+
+        consumer = asyncio.create_task(consume())
+        await producer.produce_messages(add_sentinels = False)
+        await queue.join()
+        consumer.cancel()
+        return arrivals
+    return run_virtual(run())
+
+##########################################################
+# Recording Tests
+##########################################################
+
+def test_round_trip_with_content(trace_path, batch):
+    """Test that IDs, lengths, timestamps and content survive a record and read."""
+    with TraceRecorder(trace_path, record_content = True, flush_size = 100) as recorder:
+        recorder.record(batch.slice(0, 200), timestamp = 10.0)
+        recorder.record(batch.slice(200, 500), timestamp = 12.5)
+        recorder.record(Message(id = "MSG_1_9999", content = "hello"), timestamp = 13.0)
+
+    with TraceReader(trace_path) as reader:
+        assert len(reader) == 501
+        assert reader.prefix == batch.prefix
+        records = np.concatenate([chunk.copy() for chunk in reader.chunks(64)])
+
+    assert records['timestamp'][0] == 0.0 and records['timestamp'][200] == 2.5
+    assert records['id'][:500].tolist() == batch.ids.tolist()
+    assert records['length'][:500].tolist() == batch.lengths.tolist()
+    assert records['content'][7].decode('ascii') == batch.content_at(7)
+    assert records['id'][500] == 9999 and records['content'][500] == b"hello"
+
+def test_lengths_only_trace_is_compact(trace_path, batch):
+    """Test that a trace without content stores 18 bytes per message."""
+    with TraceRecorder(trace_path) as recorder:
+        recorder.record(batch, timestamp = 0.0)
+    with TraceReader(trace_path) as reader:
+        assert reader.content_width == 0
+        assert reader.dtype.itemsize == 18
+
+def test_unflushed_trace_is_readable(trace_path, batch):
+    """Test that records already flushed can be read before the recorder is closed."""
+    recorder = TraceRecorder(trace_path, flush_size = 100)
+    recorder.record(batch, timestamp = 0.0)
+    with TraceReader(trace_path) as reader:
+        assert len(reader) == 500
+    recorder.close()
+
+def test_invalid_trace_raises(tmp_path):
+    """Test that a file that is not a trace is rejected."""
+    path = tmp_path / "bad.trace"
+    path.write_bytes(b"not a trace" * 10)
+    with pytest.raises(ValueError, match = "trace"):
+        TraceReader(str(path))
+
+##########################################################
+# Replay Tests
+##########################################################
+
+def test_replay_keeps_arrival_spacing(trace_path):
+    """Test that replay reproduces the recorded inter-arrival times, scaled by speed."""
+    with TraceRecorder(trace_path) as recorder:
+        for i, when in enumerate([5.0, 6.0, 8.0, 8.0]):
+            recorder.record(Message(id = f"MSG_0_{i}", content = "x" * (i + 1)), timestamp = when)
+
+    arrivals = replay(trace_path, speed = 2.0)
+    assert [when for when, _ in arrivals] == pytest.approx([0.0, 0.5, 1.5, 1.5])
+    assert [message.id for _, message in arrivals] == [f"MSG_0_{i}" for i in range(4)]
+    assert [len(message.content) for _, message in arrivals] == [1, 2, 3, 4], "Lengths come from the trace"
+
+def test_replay_streams_in_chunks(trace_path, batch):
+    """Test that a trace replays as MessageBatch chunks with its recorded content."""
+    with TraceRecorder(trace_path, record_content = True) as recorder:
+        recorder.record(batch, timestamp = 0.0)
+
+    arrivals = replay(trace_path, speed = 0, chunk_size = 50, chunk_records = 128)
+    chunks = [item for _, item in arrivals]
+    assert sum(len(chunk) for chunk in chunks) == 500
+    assert max(len(chunk) for chunk in chunks) == 50
+    replayed = [message for chunk in chunks for message in chunk]
+    assert [m.id for m in replayed] == [m.id for m in batch]
+    assert [m.content for m in replayed] == [m.content for m in batch]
+
+def test_replay_dealt_across_shards(trace_path, batch):
+    """Test that shards replay disjoint records that together make up the trace, whatever the chunk boundaries."""
+    with TraceRecorder(trace_path) as recorder:
+        recorder.record(batch, timestamp = 0.0)
+
+    shards = [[message.id for _, message in replay(trace_path, speed = 0, chunk_records = 128, shard = i, num_shards = 3)]
+              for i in range(3)]
+    assert [len(ids) for ids in shards] == [167, 167, 166]
+    assert sorted(sum(shards, [])) == sorted(message.id for message in batch)
+
+def test_record_then_replay_simulation(trace_path, mock_config, mocker):
+    """Test that a recorded simulation replays the same workload."""
+    mocker.patch.object(config, "trace_record_path", trace_path)
+    recorded = new_stats()
+    run_virtual(run_simulation(recorded))
+
+    mocker.patch.object(config, "trace_record_path", "")
+    mocker.patch.object(config, "trace_replay_path", trace_path)
+    mocker.patch.object(config, "total_messages", 1) #ignored, the trace decides the workload
+    replayed = new_stats()
+    run_virtual(run_simulation(replayed))
+
+    assert recorded['sent'] == replayed['sent'] == 300
+
+def test_sharded_record_and_replay(trace_path, mock_config, mocker, capsys):
+    """Test that shards record to their own files and replay a trace once between them."""
+    mocker.patch.object(config, "fast_forward", True)
+    mocker.patch.object(config, "trace_record_path", trace_path)
+    recorded, _ = run_sharded(2)
+    for i in range(2):
+        with TraceReader(f"{trace_path}.{i}") as reader:
+            assert len(reader) == 150
+
+    mocker.patch.object(config, "trace_record_path", "")
+    mocker.patch.object(config, "trace_replay_path", f"{trace_path}.0")
+    replayed, _ = run_sharded(3)
+    assert replayed['sent'] == 150
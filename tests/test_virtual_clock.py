@@ -0,0 +1,148 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_virtual_clock.py
+
+import pytest
+import asyncio
+import socket
+import threading
+import time
+from models.virtual_clock_model import VirtualClockEventLoop, run_virtual
+from models.simulation_model import run_simulation
+from config import config
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def stats_dict():
+    """Fixture to create a fresh stats dictionary for each test."""
+    return {
+        'sent': 0,
+        'failed': 0,
+        'total_time': 0.0
+    }
+
+@pytest.fixture
+def mock_config(mocker):
+    """Mock configuration settings for a full simulation run."""
+    mocker.patch.object(config, "total_messages", 1000)
+    mocker.patch.object(config, "num_senders", 50)
+    mocker.patch.object(config, "sender_failure", 0.15)
+    mocker.patch.object(config, "sender_mean_time", 2.0)
+    mocker.patch.object(config, "monitor_interval", 5.0)
+
+##########################################################
+# Virtual Clock Tests
+##########################################################
+
+def test_sleep_advances_virtual_time():
+    """Test that a long sleep finishes instantly and moves the loop clock."""
+    async def sleeper():
+        await asyncio.sleep(1000)
+        return asyncio.get_running_loop().time()
+
+    start = time.perf_counter()
+    virtual_time = run_virtual(sleeper())
+    assert virtual_time == pytest.approx(1000), "Clock should jump to the timer deadline"
+    assert time.perf_counter() - start < 1.0, "Sleep should not take real time"
+
+def test_timers_fire_in_order():
+    """Test that timers fire in deadline order, like an event heap."""
+    fired = []
+
+    async def waiter(delay):
+        await asyncio.sleep(delay)
+        fired.append((delay, asyncio.get_running_loop().time()))
+
+    async def main():
+        await asyncio.gather(*(waiter(d) for d in (3.0, 1.0, 2.0)))
+
+    run_virtual(main())
+    assert [delay for delay, _ in fired] == [1.0, 2.0, 3.0]
+    assert all(when == pytest.approx(delay) for delay, when in fired)
+
+def test_ready_callbacks_do_not_advance_clock():
+    """Test that the clock stays still while there is work ready to run."""
+    async def main():
+        loop = asyncio.get_running_loop()
+        for _ in range(100):
+            await asyncio.sleep(0)
+        return loop.time()
+
+    assert run_virtual(main()) == 0.0
+
+def test_loop_is_closed_after_run():
+    """Test that leftover tasks are cancelled and the loop is closed."""
+    loops = []
+
+    async def forever():
+        await asyncio.sleep(10**6)
+
+    async def main():
+        loops.append(asyncio.get_running_loop())
+        asyncio.create_task(forever())
+
+    run_virtual(main())
+    assert isinstance(loops[0], VirtualClockEventLoop)
+    assert loops[0].is_closed()
+
+def test_paced_loop_follows_wall_clock():
+    """Test that a paced loop takes real time but reports exact timer deadlines."""
+    async def sleeper():
+        await asyncio.sleep(0.2)
+        return asyncio.get_running_loop().time()
+
+    start = time.perf_counter()
+    assert run_virtual(sleeper(), paced = True) == 0.2, "Clock should land exactly on the deadline"
+    assert time.perf_counter() - start >= 0.19
+
+def test_paced_loop_serves_io_before_timers():
+    """Test that I/O arriving while a paced loop waits for a timer is handled without moving the clock."""
+    ours, theirs = socket.socketpair()
+    writer = threading.Timer(0.05, theirs.send, args = (b"ping",))
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        timer = asyncio.ensure_future(asyncio.sleep(0.3))
+        writer.start()
+        data = await loop.sock_recv(ours, 4)
+        received_at = loop.time()
+        await timer
+        return data, received_at, loop.time()
+
+    ours.setblocking(False)
+    try:
+        data, received_at, finished_at = run_virtual(main(), paced = True)
+    finally:
+        writer.cancel()
+        ours.close()
+        theirs.close()
+    assert data == b"ping"
+    assert received_at == 0.0, "I/O should not advance the clock"
+    assert finished_at == 0.3
+
+##########################################################
+# Simulation Tests
+##########################################################
+
+def test_full_simulation_fast_forward(stats_dict, mock_config, capsys):
+    """Test that a simulation with a 2s mean send time runs faster than real time."""
+    async def simulate():
+        await run_simulation(stats_dict)
+        return asyncio.get_running_loop().time()
+
+    start = time.perf_counter()
+    virtual_elapsed = run_virtual(simulate())
+    real_elapsed = time.perf_counter() - start
+
+    assert stats_dict['sent'] + stats_dict['failed'] == config.total_messages
+    # 1000 messages over 50 senders at 2s each takes roughly 40 simulated seconds
+    assert virtual_elapsed > 20.0
+    assert real_elapsed < virtual_elapsed / 10
+    avg_time = stats_dict['total_time'] / stats_dict['sent']
+    assert avg_time == pytest.approx(config.sender_mean_time, rel = 0.25), \
+        "Average time should be measured in simulated seconds"
+
+    captured = capsys.readouterr()
+    assert "[Monitor] 5.0s" in captured.out, "Monitor should tick on the virtual clock"
@@ -0,0 +1,114 @@
+# Testing was conducted using pytest framework in a virtual env
+# To run the tests, use the command: python3 -m pytest tests/test_work_stealing.py
+
+import pytest
+import asyncio
+from models.work_stealing_model import WorkStealingDispatcher
+from models.virtual_clock_model import run_virtual
+from models.simulation_model import new_stats, run_simulation
+from config import config
+
+##########################################################
+# Fixtures
+##########################################################
+
+@pytest.fixture
+def dispatcher():
+    """Fixture to create a dispatcher with four sender deques."""
+    return WorkStealingDispatcher(4)
+
+@pytest.fixture
+def mock_config(mocker):
+    """Mock configuration settings for a work-stealing simulation run."""
+    mocker.patch.object(config, "total_messages", 1000)
+    mocker.patch.object(config, "num_senders", 50)
+    mocker.patch.object(config, "sender_failure", 0.15)
+    mocker.patch.object(config, "sender_mean_time", 2.0)
+    mocker.patch.object(config, "monitor_interval", 5.0)
+    mocker.patch.object(config, "dispatch", "work_stealing")
+
+##########################################################
+# Dispatch Tests
+##########################################################
+
+def test_items_dealt_round_robin(dispatcher):
+    """Test that items are spread evenly across the sender deques."""
+    for i in range(10):
+        dispatcher.put_nowait(i)
+    assert [len(shard) for shard in dispatcher.shards] == [3, 3, 2, 2]
+    assert dispatcher.qsize() == 10
+    assert dispatcher.queue_for(0).get_nowait() == 0
+    assert dispatcher.queue_for(1).get_nowait() == 1
+
+def test_steal_takes_half_of_busiest(dispatcher):
+    """Test that an idle sender steals the newer half of the busiest deque, keeping order."""
+    for i in range(6):
+        dispatcher.shards[0].append(i)
+    dispatcher._size = 6
+    dispatcher.steal_samples = 4 #sample every deque so the victim is deterministic
+
+    assert dispatcher.get_nowait(1) == 3
+    assert list(dispatcher.shards[0]) == [0, 1, 2]
+    assert list(dispatcher.shards[1]) == [4, 5]
+    assert dispatcher.steals == 1
+    assert dispatcher.qsize() == 5
+
+def test_sentinels_wait_for_empty_deques(dispatcher):
+    """Test that a sentinel is only handed out once no work is left anywhere."""
+    dispatcher.put_nowait("a")
+    dispatcher.put_nowait(None)
+    assert dispatcher.get_nowait(3) == "a", "Work should be stolen before the sentinel is returned"
+    assert dispatcher.get_nowait(3) is None
+    with pytest.raises(asyncio.QueueEmpty):
+        dispatcher.get_nowait(3)
+
+@pytest.mark.asyncio
+async def test_join_waits_for_task_done(dispatcher):
+    """Test that join returns only once every item has been marked done."""
+    local = dispatcher.queue_for(2)
+    await dispatcher.put("a")
+    join_task = asyncio.create_task(dispatcher.join())
+    await asyncio.sleep(0)
+    assert not join_task.done()
+
+    assert await local.get() == "a"
+    local.task_done()
+    await asyncio.wait_for(join_task, timeout = 1.0)
+    with pytest.raises(ValueError):
+        local.task_done()
+
+@pytest.mark.asyncio
+async def test_put_wakes_one_waiter(dispatcher):
+    """Test that each item wakes a single waiting sender, preferring the deque's owner."""
+    getters = [asyncio.create_task(dispatcher.get(i)) for i in range(4)]
+    await asyncio.sleep(0)
+    dispatcher.put_nowait("a") #dealt to deque 0
+    await asyncio.sleep(0)
+
+    assert getters[0].done() and getters[0].result() == "a"
+    assert not any(getter.done() for getter in getters[1:])
+    assert dispatcher.wakeups == 1
+    for getter in getters[1:]:
+        getter.cancel()
+    await asyncio.gather(*getters[1:], return_exceptions = True)
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_passes_wakeup_on(dispatcher):
+    """Test that work is not stranded when a woken sender is cancelled before it runs."""
+    first = asyncio.create_task(dispatcher.get(0))
+    second = asyncio.create_task(dispatcher.get(1))
+    await asyncio.sleep(0)
+    dispatcher.put_nowait("a")
+    first.cancel()
+    assert await asyncio.wait_for(second, timeout = 1.0) == "a"
+
+##########################################################
+# Simulation Tests
+##########################################################
+
+def test_full_simulation_work_stealing(mock_config, capsys):
+    """Test that every message is processed with per-sender deques."""
+    stats = new_stats()
+    run_virtual(run_simulation(stats))
+    assert stats['sent'] + stats['failed'] == config.total_messages
+    assert "[Monitor] 5.0s" in capsys.readouterr().out